@@ -0,0 +1,207 @@
+import argparse
+import datetime
+import hashlib
+import json
+import logging
+import sys
+
+from flask import Flask, Response, jsonify, request, stream_with_context
+
+import App_Logging
+import Connection_Pool
+from Manage_Data import DatabaseManager, to_iso_day
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+DEFAULT_DB = "GYM.db"
+HOST = "127.0.0.1"        # Local network only; put a reverse proxy in front to expose it
+PORT = 5000
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+RESOURCES = {'members': 'Members', 'attendance': 'Attendance', 'payments': 'Payment'}
+
+class ApiError(Exception):
+    """
+    An error reported to the client as {"error": message} with an HTTP status.
+    """
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+def parse_day(name):
+    """
+    Reads an optional 'DD-MM-YYYY' query parameter as an ISO day.
+    """
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return to_iso_day(value)
+    except ValueError:
+        raise ApiError(400, f"'{name}' must be a date in DD-MM-YYYY format") from None
+
+def parse_int(name, default=None, minimum=0):
+    """
+    Reads an optional integer query parameter.
+    """
+    value = request.args.get(name)
+    if value is None or value == "":
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ApiError(400, f"'{name}' must be an integer") from None
+    if number < minimum:
+        raise ApiError(400, f"'{name}' must be at least {minimum}")
+    return number
+
+def create_app(db_name=DEFAULT_DB, pool_size=Connection_Pool.POOL_SIZE, single_writer=False):
+    """
+    Builds the JSON API over the gym database.
+
+    Endpoints (dates are DD-MM-YYYY, like the rest of the app):
+        GET  /api/<members|attendance|payments>?from=&to=&member_id=&after=&limit=
+             One page in id order: {"items": [...], "next_after": id or null}.
+        GET  /api/<members|attendance|payments>/export?from=&to=&member_id=
+             Every matching row, streamed as JSON Lines. Each export opens its
+             own connection, so slow clients do not tie up the pool.
+        GET  /api/members/<id>
+        POST /api/checkins  {"member_id": 3}
+
+    GET responses carry an ETag derived from the tables' change counters,
+    so clients polling with If-None-Match get a 304 until data changes.
+
+    Args:
+        db_name (str): The SQLite database file.
+        pool_size (int): Number of pooled connections.
+        single_writer (bool): Serialize writes through one writer thread.
+
+    Returns:
+        Flask: The application.
+    """
+    app = Flask(__name__)
+    pool = Connection_Pool.ConnectionPool(db_name, pool_size, single_writer=single_writer)
+    app.config['POOL'] = pool
+    columns = {} # Column names per table, read once
+
+    def column_names(db, table):
+        if table not in columns:
+            columns[table] = [name for name, _ in db.get_table_columns(table)]
+        return columns[table]
+
+    def resource_table(resource):
+        table = RESOURCES.get(resource)
+        if table is None:
+            raise ApiError(404, f"Unknown resource: {resource}")
+        return table
+
+    def cached(tables, build):
+        """Serves build(db) as JSON unless the client's ETag is still current."""
+        with pool.connection() as db:
+            versions = db.get_table_versions(tables)
+            tag = hashlib.sha1(json.dumps([sorted(versions.items()), request.full_path]).encode()).hexdigest()
+            if tag in request.if_none_match:
+                response = Response(status=304)
+            else:
+                response = jsonify(build(db))
+        response.set_etag(tag)
+        response.headers['Cache-Control'] = 'no-cache' # Revalidate every time
+        return response
+
+    @app.errorhandler(ApiError)
+    def handle_api_error(error):
+        return jsonify({'error': error.message}), error.status
+
+    @app.errorhandler(TimeoutError)
+    def handle_busy(error):
+        logger.warning("API request timed out waiting for a connection: %s", error)
+        return jsonify({'error': "Server busy, try again."}), 503
+
+    @app.get("/api/<resource>")
+    def list_rows(resource):
+        table = resource_table(resource)
+        start_day, end_day = parse_day('from'), parse_day('to')
+        member_id = parse_int('member_id')
+        after = parse_int('after', 0)
+        limit = min(parse_int('limit', PAGE_SIZE, minimum=1), MAX_PAGE_SIZE)
+
+        def build(db):
+            names = column_names(db, table)
+            rows = db.get_page(table, after, limit, start_day, end_day, member_id)
+            return {
+                'items': [dict(zip(names, row)) for row in rows],
+                'next_after': rows[-1][0] if len(rows) == limit else None,
+            }
+        return cached([table], build)
+
+    @app.get("/api/<resource>/export")
+    def export_rows(resource):
+        table = resource_table(resource)
+        start_day, end_day = parse_day('from'), parse_day('to')
+        member_id = parse_int('member_id')
+
+        def generate():
+            # Held for the whole response, which lasts as long as the client reads
+            db = DatabaseManager(db_name, shared=True)
+            try:
+                names = column_names(db, table)
+                for batch in db.stream_rows(table, start_day, end_day, member_id):
+                    yield "".join(json.dumps(dict(zip(names, row))) + "\n" for row in batch)
+            finally:
+                db.close_connection()
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+    @app.get("/api/members/<int:member_id>")
+    def get_member(member_id):
+        def build(db):
+            rows = db.get_data_by_member_id('Members', member_id)
+            if not rows:
+                raise ApiError(404, f"Member {member_id} not found")
+            return dict(zip(column_names(db, 'Members'), rows[0]))
+        return cached(['Members'], build)
+
+    @app.post("/api/checkins")
+    def check_in():
+        payload = request.get_json(silent=True) or {}
+        member_id = payload.get('member_id')
+        if not isinstance(member_id, int) or isinstance(member_id, bool): # JSON true is an int in Python
+            raise ApiError(400, "'member_id' (integer) is required")
+        now = datetime.datetime.now()
+        date_str = now.strftime('%d-%m-%Y')
+        time_str = now.strftime('%I:%M:%S %p')
+        with pool.connection() as db:
+            if not db.get_data_by_member_id('Members', member_id):
+                raise ApiError(404, f"Member {member_id} not found")
+            attendance_id = db.insert_attendance(member_id, date_str, time_str)
+            if attendance_id is None:
+                raise ApiError(500, "The attendance record could not be saved.")
+        logger.info("API check-in for member %s", member_id)
+        return jsonify({'id': attendance_id, 'member_id': member_id,
+                        'date': date_str, 'check_in_time': time_str}), 201
+
+    return app
+
+def main(argv=None):
+    """
+    Entry point: python Api_Server.py --db GYM.db --port 5000
+    """
+    parser = argparse.ArgumentParser(description="Local JSON API for the gym database.")
+    parser.add_argument("--db", default=DEFAULT_DB, help="Path to the SQLite database (default: GYM.db)")
+    parser.add_argument("--host", default=HOST, help="Interface to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--pool-size", type=int, default=Connection_Pool.POOL_SIZE)
+    parser.add_argument("--single-writer", action="store_true", help="Commit all writes from one writer thread")
+    args = parser.parse_args(argv)
+    App_Logging.setup_logging()
+    app = create_app(args.db, args.pool_size, args.single_writer)
+    try:
+        app.run(host=args.host, port=args.port, threaded=True)
+    finally:
+        app.config['POOL'].close_all()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+import json
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+CONFIG_FILE = "config.json"
+
+_save_lock = threading.Lock() # One read-modify-write of the file at a time
+
+def load_config(path=CONFIG_FILE):
+    """
+    Loads the machine-local settings file.
+
+    Args:
+        path (str): The path to config.json.
+
+    Returns:
+        dict: The settings, or {} if the file is missing/invalid.
+    """
+    try:
+        with open(path, 'r') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+    except json.JSONDecodeError:
+        logger.error("%s is corrupt or poorly formatted. Using defaults.", path)
+        return {}
+
+def get_section(name, defaults=None, path=CONFIG_FILE):
+    """
+    Returns one section of the settings, filled in with defaults.
+
+    Args:
+        name (str): The section name (e.g. 'detector').
+        defaults (dict, optional): Values used for missing keys.
+        path (str): The path to config.json.
+
+    Returns:
+        dict: The merged section.
+    """
+    section = dict(defaults or {})
+    section.update(load_config(path).get(name, {}))
+    return section
+
+def save_section(name, values, path=CONFIG_FILE):
+    """
+    Replaces one section of the settings file, keeping the others.
+
+    Args:
+        name (str): The section name.
+        values (dict): The section's settings (JSON serializable).
+        path (str): The path to config.json.
+    """
+    with _save_lock:
+        config = load_config(path)
+        config[name] = values
+        try:
+            with open(path, 'w') as file:
+                json.dump(config, file, indent=4)
+            logger.info("Saved '%s' settings to %s", name, path)
+        except OSError as e:
+            logger.error("Could not save settings to %s: %s", path, e)
@@ -0,0 +1,92 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+# --- Constants ---
+LOG_DIR = "logs"
+LOG_FILE = os.path.join(LOG_DIR, "gym.log")
+LOG_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+MAX_LOG_BYTES = 5 * 1024 * 1024 # Rotate at 5 MB
+BACKUP_COUNT = 5                # Keep gym.log.1 ... gym.log.5
+LEVEL_ENV = "GYM_LOG_LEVEL"           # e.g. GYM_LOG_LEVEL=WARNING
+MODULE_LEVELS_ENV = "GYM_LOG_LEVELS"  # e.g. GYM_LOG_LEVELS=Manage_Data=WARNING,Mark_Attendance=DEBUG
+
+_listener = None
+
+def parse_module_levels(text):
+    """
+    Parses 'module=LEVEL,module=LEVEL' into a dict.
+
+    Args:
+        text (str): The per-module verbosity specification.
+
+    Returns:
+        dict: {logger_name: level_name}
+    """
+    levels = {}
+    for item in (text or "").split(","):
+        if "=" in item:
+            name, level = item.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+def setup_logging(level=None, module_levels=None, log_file=LOG_FILE, console=True):
+    """
+    Configures application-wide logging once per process.
+
+    Records are handed to a QueueHandler, so the calling thread (the Tk
+    loop, the camera loop, a DB query) never waits on disk or console
+    I/O; a background QueueListener writes them to a rotating log file
+    and, optionally, the console. Loggers use lazy %-style arguments, so
+    messages below the active level cost almost nothing.
+
+    Args:
+        level (str, optional): Root level. Defaults to $GYM_LOG_LEVEL or 'INFO'.
+        module_levels (dict, optional): Per-module levels, e.g. {'Manage_Data': 'WARNING'}.
+                                        Defaults to $GYM_LOG_LEVELS.
+        log_file (str): Rotating log file path (None to disable file logging).
+        console (bool): Also write to stderr.
+    """
+    global _listener
+    if _listener is not None:
+        return # Already configured
+
+    level = (level or os.environ.get(LEVEL_ENV) or "INFO").upper()
+    if module_levels is None:
+        module_levels = parse_module_levels(os.environ.get(MODULE_LEVELS_ENV))
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = []
+    if log_file:
+        os.makedirs(os.path.dirname(log_file) or ".", exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(log_file, maxBytes=MAX_LOG_BYTES,
+                                                            backupCount=BACKUP_COUNT, encoding="utf-8")
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+    if console:
+        console_handler = logging.StreamHandler(sys.stderr)
+        console_handler.setFormatter(formatter)
+        handlers.append(console_handler)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(level)
+    for name, module_level in module_levels.items():
+        logging.getLogger(name).setLevel(module_level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+def shutdown_logging():
+    """
+    Flushes queued records and stops the background writer.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
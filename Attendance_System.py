@@ -5,14 +5,22 @@ from Mark_Attendance import MarkAttendance
 from View_Data import ViewData
 from Edit_Data import EditData
 from Payment import Payment
+from Dashboard import Dashboard
 import pywhatkit as kit
 from pywhatkit.core.exceptions import InternetException, CallTimeException, CountryCodeException
 import json
-from datetime import datetime, timedelta
+from datetime import datetime
 from Manage_Data import DatabaseManager
+import App_Logging
+import Backup_Manager
+import Member_Directory
+import Event_Bus
 import CTkMessagebox
+import logging
 import sys  # Import sys for exiting on critical error
 
+logger = logging.getLogger(__name__)
+
 # --- Globals ---
 JSON_FILE_PATH = 'reminders.json'
 MESSAGE_BOX = CTkMessagebox.CTkMessagebox
@@ -29,26 +37,27 @@ class Home(ctk.CTk):
         and loads initial data.
         """
         super().__init__()
-        print("[INFO] Initializing main application...")
+        logger.info("Initializing main application...")
         self.title("Gym Management System")
-        self.geometry('400x650')
+        self.geometry('400x720')
         ctk.set_appearance_mode('dark')
 
         self.db = None
-        self.members_data = []
+        self.members = []
 
         try:
             # Connect to the database
             self.db = DatabaseManager("GYM.db")
             
-            # --- UPDATED LINE ---
-            # Load all member data on startup using the new secure function
-            self.members_data = self.db.get_all_from_table("Members")
-            # --- END OF UPDATE ---
+            # Load the member directory shared with the other windows
+            self.members = Member_Directory.get_directory(self.db)
+            # Row-level changes for open windows (also from the kiosk or API)
+            self.bus = Event_Bus.get_bus(self.db)
+            self.db.prune_change_log()
             
-            print(f"[INFO] Loaded {len(self.members_data)} members from database.")
+            logger.info("Loaded %s members from database.", len(self.members))
         except Exception as e:
-            print(f"[CRITICAL] Failed to load database: {e}")
+            logger.critical("Failed to load database: %s", e)
             MESSAGE_BOX(title="Critical Error",
                         message=f"Could not load database. The application will close.\n\nError: {e}",
                         icon="cancel")
@@ -59,16 +68,24 @@ class Home(ctk.CTk):
 
         # Check for reminders *after* the main window has loaded
         # This prevents the app from freezing on startup
-        print("[INFO] Scheduling reminder check...")
+        logger.info("Scheduling reminder check...")
         self.after(1000, self.check_membership_status_and_send_reminder)
 
+        # Publish changes made by other processes to the open windows
+        self.after(Event_Bus.POLL_INTERVAL_MS, self.poll_changes)
+
+        # Scheduled online backups run on their own thread and connection
+        self.backup_scheduler = Backup_Manager.BackupScheduler("GYM.db")
+        self.backup_scheduler.start()
+
         self.mainloop()
+        self.backup_scheduler.stop()
 
     def layout(self):
         """
         Creates and places all widgets on the main window.
         """
-        print("[INFO] Building main layout...")
+        logger.info("Building main layout...")
         try:
             # Logo Image
             image_muscleHouse = ctk.CTkImage(light_image=Image.open('images/Muscle House.png'),
@@ -77,7 +94,7 @@ class Home(ctk.CTk):
             image_label = ctk.CTkLabel(self, image=image_muscleHouse, text="")
             image_label.pack(pady=20)
         except FileNotFoundError:
-            print("[ERROR] 'images/Muscle House.png' logo not found.")
+            logger.error("'images/Muscle House.png' logo not found.")
             # Create a placeholder label if image is missing
             image_label = ctk.CTkLabel(self,
                                      text="Muscle House Logo (Not Found)",
@@ -86,7 +103,7 @@ class Home(ctk.CTk):
                                      fg_color="gray20")
             image_label.pack(pady=20)
         except Exception as e:
-            print(f"[ERROR] Failed to load logo: {e}")
+            logger.error("Failed to load logo: %s", e)
 
         # --- Menu Buttons ---
         self.create_button("Add New Member", NewMember)
@@ -94,6 +111,7 @@ class Home(ctk.CTk):
         self.create_button("View Data", ViewData)
         self.create_button("Edit/Delete Data", EditData)
         self.create_button("Payment", Payment)
+        self.create_button("Dashboard", Dashboard)
 
         # --- Exit Button ---
         exit_button = ctk.CTkButton(self, text='Exit', font=("Poppins", 20), width=220,
@@ -123,18 +141,30 @@ class Home(ctk.CTk):
             window_class (Toplevel): The window class to instantiate.
         """
         try:
-            print(f"[INFO] Opening window: {window_class.__name__}")
+            logger.info("Opening window: %s", window_class.__name__)
             window = window_class(self)
             window.grab_set()  # Makes the new window modal
         except Exception as e:
-            print(f"[ERROR] Failed to open window {window_class.__name__}: {e}")
+            logger.error("Failed to open window %s: %s", window_class.__name__, e)
             MESSAGE_BOX(title="Error", message=f"Could not open window.\n\nError: {e}", icon="cancel")
 
+    def poll_changes(self):
+        """
+        Reads new change log entries and publishes them to the open windows.
+        Reschedules itself on the Tk event loop, so subscribers run on the GUI thread.
+        """
+        try:
+            self.bus.poll(self.db)
+        except Exception as e:
+            logger.error("Failed to poll for changes: %s", e)
+        self.after(Event_Bus.POLL_INTERVAL_MS, self.poll_changes)
+
     def exit_app(self):
         """
         Closes the application.
         """
-        print("[INFO] Exiting application.")
+        logger.info("Exiting application.")
+        self.backup_scheduler.stop()
         self.destroy()
 
     def load_reminder_data(self, file_path):
@@ -150,16 +180,16 @@ class Home(ctk.CTk):
         try:
             with open(file_path, 'r') as file:
                 data = json.load(file)
-                print(f"[INFO] Loaded reminder data from {file_path}")
+                logger.info("Loaded reminder data from %s", file_path)
                 return data
         except FileNotFoundError:
-            print(f"[WARN] {file_path} not found. Will create a new one.")
+            logger.warning("%s not found. Will create a new one.", file_path)
             return {}
         except json.JSONDecodeError:
-            print(f"[ERROR] {file_path} is corrupt or poorly formatted. Returning empty data.")
+            logger.error("%s is corrupt or poorly formatted. Returning empty data.", file_path)
             return {}
         except Exception as e:
-            print(f"[ERROR] Failed to load reminder data: {e}")
+            logger.error("Failed to load reminder data: %s", e)
             return {}
 
     def save_reminder_data(self, file_path, data):
@@ -173,35 +203,12 @@ class Home(ctk.CTk):
         try:
             with open(file_path, 'w') as file:
                 json.dump(data, file, indent=4)
-            print(f"[INFO] Saved updated reminder data to {file_path}")
+            logger.info("Saved updated reminder data to %s", file_path)
         except (IOError, PermissionError) as e:
-            print(f"[ERROR] Could not save reminder data to {file_path}: {e}")
+            logger.error("Could not save reminder data to %s: %s", file_path, e)
             MESSAGE_BOX(title="Error", message=f"Could not save reminder file.\n\nError: {e}", icon="cancel")
         except Exception as e:
-            print(f"[ERROR] An unexpected error occurred while saving reminder data: {e}")
-
-    def should_send_reminder(self, last_reminder_date):
-        """
-        Checks if a new reminder should be sent (last reminder was > 3 days ago).
-
-        Args:
-            last_reminder_date (str): The date string (YYYY-MM-DD) of the last reminder.
-
-        Returns:
-            bool: True if a reminder should be sent, False otherwise.
-        """
-        if not last_reminder_date:
-            print("[INFO] No last reminder date found. Sending reminder.")
-            return True  # No reminder sent before
-        try:
-            last_reminder = datetime.strptime(last_reminder_date, '%Y-%m-%d')
-            # Check if more than 3 days have passed
-            should_send = (datetime.now() - last_reminder) > timedelta(days=3)
-            print(f"[INFO] Last reminder: {last_reminder_date}. Send new: {should_send}")
-            return should_send
-        except ValueError:
-            print(f"[ERROR] Invalid date format '{last_reminder_date}' in JSON. Sending reminder just in case.")
-            return True # Send if date is corrupt
+            logger.error("An unexpected error occurred while saving reminder data: %s", e)
 
     def update_reminder_data(self, reminder_data, member):
         """
@@ -209,12 +216,11 @@ class Home(ctk.CTk):
 
         Args:
             reminder_data (dict): The full reminder data dictionary.
-            member (tuple): The member's data tuple from the database.
+            member (MemberRecord): The member from the member directory.
         """
-        # member[0] is ID, member[1] is Name
-        member_id = str(member[0])
+        member_id = str(member.id)
         reminder_data[member_id] = {
-            'name': member[1],
+            'name': member.full_name,
             'last_reminder_date': datetime.now().strftime('%Y-%m-%d')
         }
 
@@ -224,57 +230,48 @@ class Home(ctk.CTk):
         a WhatsApp reminder if they are UNPAID or ROOKIE and haven't
         received a reminder in the last 3 days.
 
-        Uses self.members_data and JSON_FILE_PATH.
+        Uses self.members and JSON_FILE_PATH.
         """
-        print("[INFO] --- Starting membership reminder check ---")
+        logger.info("--- Starting membership reminder check ---")
         reminder_data = self.load_reminder_data(JSON_FILE_PATH)
 
-        for member in self.members_data:
-            # member[6] is payment_status
-            member_status = member[6]
-            if member_status == 'UNPAID' or member_status == "ROOKIE":
-                # member[0] is ID
-                member_id = str(member[0])
-                last_reminder_date = reminder_data.get(member_id, {}).get('last_reminder_date')
-
-                if self.should_send_reminder(last_reminder_date):
-                    # member[3] is phone_no
-                    # NOTE: Assumes all phone numbers are Indian (+91).
-                    phone_number = f"+91{member[3]}"
-                    # member[1] is full_name
-                    message_body = (f"Hello {member[1]},\n\n"
-                                    "This is a reminder from Muscle House Gym.\n"
-                                    "Our records show your membership payment is pending. "
-                                    "Please make the payment at your earliest convenience to continue enjoying our services.\n\n"
-                                    "Thank you!")
-
-                    print(f"[INFO] Attempting to send reminder to {member[1]} ({phone_number})")
-                    try:
-                        # Send the WhatsApp message
-                        kit.sendwhatmsg_instantly(phone_number, message_body, wait_time=15, tab_close=True)
-                        print(f"[SUCCESS] Sent reminder to {member[1]} ({phone_number})")
-
-                        # Update the reminder data
-                        self.update_reminder_data(reminder_data, member)
-
-                    except InternetException:
-                        print("[ERROR] Failed to send message: No internet connection.")
-                        MESSAGE_BOX(title="Error", message="No internet connection. Reminder was not sent.", icon="warning")
-                    except CallTimeException:
-                        print("[ERROR] Failed to send message: Invalid call time (pywhatkit).")
-                    except CountryCodeException:
-                        print(f"[ERROR] Failed to send message: Invalid country code for {phone_number}.")
-                    except Exception as e:
-                        print(f"[ERROR] Failed to send message to {member[1]} ({phone_number}). Error: {e}")
-                        MESSAGE_BOX(title="Error",
-                                    message=f"Failed to send message to {member[1]}.\n\nError: {e}",
-                                    icon="cancel")
-                else:
-                    print(f"[INFO] Skipping reminder for {member[1]} (sent recently).")
+        due = self.members.due_for_reminder(reminder_data)
+        logger.info("%s members are due a reminder.", len(due))
+        for member in due:
+            # NOTE: Assumes all phone numbers are Indian (+91).
+            phone_number = f"+91{member.phone_number}"
+            message_body = (f"Hello {member.full_name},\n\n"
+                            "This is a reminder from Muscle House Gym.\n"
+                            "Our records show your membership payment is pending. "
+                            "Please make the payment at your earliest convenience to continue enjoying our services.\n\n"
+                            "Thank you!")
+
+            logger.info("Attempting to send reminder to %s (%s)", member.full_name, phone_number)
+            try:
+                # Send the WhatsApp message
+                kit.sendwhatmsg_instantly(phone_number, message_body, wait_time=15, tab_close=True)
+                logger.info("Sent reminder to %s (%s)", member.full_name, phone_number)
+
+                # Update the reminder data
+                self.update_reminder_data(reminder_data, member)
+
+            except InternetException:
+                logger.error("Failed to send message: No internet connection.")
+                MESSAGE_BOX(title="Error", message="No internet connection. Reminder was not sent.", icon="warning")
+            except CallTimeException:
+                logger.error("Failed to send message: Invalid call time (pywhatkit).")
+            except CountryCodeException:
+                logger.error("Failed to send message: Invalid country code for %s.", phone_number)
+            except Exception as e:
+                logger.error("Failed to send message to %s (%s). Error: %s", member.full_name, phone_number, e)
+                MESSAGE_BOX(title="Error",
+                            message=f"Failed to send message to {member.full_name}.\n\nError: {e}",
+                            icon="cancel")
 
         # Save any updates to the reminder file
         self.save_reminder_data(JSON_FILE_PATH, reminder_data)
-        print("[INFO] --- Finished membership reminder check ---")
+        logger.info("--- Finished membership reminder check ---")
 
 if __name__ == "__main__":
+    App_Logging.setup_logging()
     Home()
\ No newline at end of file
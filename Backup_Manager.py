@@ -0,0 +1,292 @@
+import gzip
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import App_Config
+from Manage_Data import BUSY_TIMEOUT_MS, archive_path
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+CONFIG_SECTION = "backup"
+DEFAULT_SETTINGS = {
+    'enabled': True,          # Scheduled snapshots while the app runs
+    'directory': "backups",
+    'keep': 7,                # Generations kept per database
+    'interval_hours': 24,
+    'compress': True,
+}
+PAGES_PER_STEP = 1024         # Pages copied per backup step (4 MB with 4 KB pages)
+STEP_PAUSE = 0.005            # Seconds between steps, leaving disk time for the app
+STARTUP_DELAY = 60            # Seconds after start before a due snapshot is taken
+FAILURE_RETRY = 15 * 60       # Seconds before retrying a failed scheduled snapshot
+COPY_CHUNK = 1024 * 1024
+
+class BackupAborted(Exception):
+    """
+    Raised inside a running backup when it is cancelled.
+    """
+
+def load_settings():
+    """
+    Returns the backup settings from config.json, filled in with defaults.
+    """
+    return App_Config.get_section(CONFIG_SECTION, DEFAULT_SETTINGS)
+
+def list_snapshots(backup_dir, db_name):
+    """
+    Lists the snapshots of a database, oldest first.
+
+    Args:
+        backup_dir (str): The backup folder.
+        db_name (str): The database the snapshots were taken from.
+
+    Returns:
+        list: Snapshot file paths (names sort by time).
+    """
+    prefix = os.path.splitext(os.path.basename(db_name))[0] + "-"
+    try:
+        names = os.listdir(backup_dir)
+    except FileNotFoundError:
+        return []
+    return [os.path.join(backup_dir, name) for name in sorted(names)
+            if name.startswith(prefix) and name.endswith((".db", ".db.gz"))]
+
+def create_snapshot(db_name, backup_dir, compress=True, pages=PAGES_PER_STEP, pause=STEP_PAUSE,
+                    progress=None, cancel=None):
+    """
+    Copies a live database with SQLite's online backup API, checks the
+    copy with PRAGMA integrity_check and (optionally) gzips it.
+
+    In WAL mode the copy reads from one snapshot of the database, so
+    check-ins written meanwhile neither wait for the backup nor force it
+    to start over; they simply are not in this snapshot. Pages are copied
+    in steps of 'pages' with a short pause between them.
+
+    Args:
+        db_name (str): The database to back up.
+        backup_dir (str): Where the snapshot is written.
+        compress (bool): Write '<name>.db.gz' instead of '<name>.db'.
+        pages (int): Pages copied per step.
+        pause (float): Seconds to sleep between steps.
+        progress (callable, optional): Called as progress(copied_pages, total_pages).
+        cancel (threading.Event, optional): Aborts the backup when set.
+
+    Returns:
+        dict: 'path', 'pages', 'bytes', 'seconds'.
+
+    Raises:
+        BackupAborted: If 'cancel' was set.
+        RuntimeError: If the copy failed its integrity check.
+        sqlite3.Error, OSError: If the backup could not be written.
+    """
+    started = time.perf_counter()
+    os.makedirs(backup_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(db_name))[0]
+    name = f"{stem}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.db"
+    path = os.path.join(backup_dir, name + (".gz" if compress else ""))
+    part = os.path.join(backup_dir, name + ".part")
+
+    def on_step(status, remaining, total):
+        if cancel is not None and cancel.is_set():
+            raise BackupAborted("Backup cancelled.")
+        if progress:
+            progress(total - remaining, total)
+        time.sleep(pause)
+
+    logger.info("Backing up %s to %s...", db_name, path)
+    source = sqlite3.connect(db_name, timeout=BUSY_TIMEOUT_MS / 1000)
+    target = sqlite3.connect(part)
+    try:
+        # 1. Pin one read snapshot (WAL only; with a rollback journal this
+        #    would lock writers out for the whole copy)
+        wal = source.execute("PRAGMA journal_mode").fetchone()[0].lower() == 'wal'
+        if wal:
+            source.execute("BEGIN")
+            source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+
+        # 2. Copy the pages step by step
+        source.backup(target, pages=pages, progress=on_step)
+        total_pages = target.execute("PRAGMA page_count").fetchone()[0]
+
+        # 3. Make the copy a self-contained file and check it
+        target.execute("PRAGMA journal_mode = DELETE")
+        result = target.execute("PRAGMA integrity_check").fetchone()[0]
+        if result != 'ok':
+            raise RuntimeError(f"Snapshot failed integrity check: {result}")
+    except BaseException:
+        target.close()
+        os.remove(part)
+        raise
+    finally:
+        source.close() # Also ends the read snapshot
+    target.close()
+
+    # 4. Compress (or just move) the checked copy into place
+    try:
+        if compress:
+            with open(part, 'rb') as src, gzip.open(part + ".gz", 'wb') as dst:
+                shutil.copyfileobj(src, dst, COPY_CHUNK)
+            os.replace(part + ".gz", path)
+            os.remove(part)
+        else:
+            os.replace(part, path)
+    except OSError:
+        for leftover in (part, part + ".gz"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+        raise
+
+    snapshot = {
+        'path': path,
+        'pages': total_pages,
+        'bytes': os.path.getsize(path),
+        'seconds': time.perf_counter() - started,
+    }
+    logger.info("Backup written: %s (%s pages, %.1f MB, %.1f s)", path, total_pages,
+                snapshot['bytes'] / 1e6, snapshot['seconds'])
+    return snapshot
+
+def verify_snapshot(path):
+    """
+    Runs PRAGMA integrity_check on a snapshot (decompressing it first if needed).
+
+    Args:
+        path (str): A '.db' or '.db.gz' snapshot.
+
+    Returns:
+        str: 'ok', or SQLite's description of the first problem.
+    """
+    if not path.endswith(".gz"):
+        return _integrity_check(path)
+    handle, temp_path = tempfile.mkstemp(suffix=".db")
+    try:
+        with os.fdopen(handle, 'wb') as dst, gzip.open(path, 'rb') as src:
+            shutil.copyfileobj(src, dst, COPY_CHUNK)
+        return _integrity_check(temp_path)
+    except (OSError, EOFError) as e:
+        return f"unreadable: {e}"
+    finally:
+        os.remove(temp_path)
+
+def _integrity_check(path):
+    """Returns the first line of PRAGMA integrity_check for a database file."""
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            return conn.execute("PRAGMA integrity_check").fetchone()[0]
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        return f"unreadable: {e}"
+
+def rotate_snapshots(backup_dir, db_name, keep):
+    """
+    Deletes all but the newest 'keep' snapshots (and unfinished '.part' files).
+
+    Returns:
+        list: The deleted paths.
+    """
+    snapshots = list_snapshots(backup_dir, db_name)
+    stale = snapshots[:-keep] if keep > 0 else []
+    prefix = os.path.splitext(os.path.basename(db_name))[0] + "-"
+    stale += [os.path.join(backup_dir, name) for name in os.listdir(backup_dir)
+              if name.startswith(prefix) and name.endswith((".part", ".part.gz"))]
+    removed = []
+    for path in stale:
+        try:
+            os.remove(path)
+            removed.append(path)
+            logger.info("Removed old backup %s", path)
+        except OSError as e:
+            logger.warning("Could not remove old backup %s: %s", path, e)
+    return removed
+
+def run_backup(db_name, settings=None, progress=None, cancel=None):
+    """
+    Takes one snapshot (plus one of the attendance archive, if there is
+    one) and applies the retention policy.
+
+    Returns:
+        dict: The snapshot (see create_snapshot) plus the 'removed' paths
+              and, if archived, the 'archive' snapshot.
+    """
+    settings = settings or load_settings()
+    snapshot = create_snapshot(db_name, settings['directory'], compress=settings['compress'],
+                               progress=progress, cancel=cancel)
+    snapshot['removed'] = rotate_snapshots(settings['directory'], db_name, settings['keep'])
+    archive = archive_path(db_name)
+    if archive and os.path.exists(archive):
+        snapshot['archive'] = create_snapshot(archive, settings['directory'], compress=settings['compress'],
+                                              cancel=cancel)
+        snapshot['removed'] += rotate_snapshots(settings['directory'], archive, settings['keep'])
+    return snapshot
+
+class BackupScheduler:
+    """
+    Takes a snapshot every 'interval_hours' on a background thread while
+    the app runs. The newest snapshot's time is read from the backup
+    folder, so restarting the app does not trigger an extra backup.
+    """
+
+    def __init__(self, db_name, settings=None):
+        """
+        Args:
+            db_name (str): The database to back up.
+            settings (dict, optional): Backup settings. Defaults to config.json.
+        """
+        self.db_name = db_name
+        self.settings = settings or load_settings()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def due_in(self):
+        """
+        Returns the seconds until the next snapshot is due (0 if overdue).
+        """
+        snapshots = list_snapshots(self.settings['directory'], self.db_name)
+        if not snapshots:
+            return 0.0
+        last = os.path.getmtime(snapshots[-1])
+        return max(0.0, last + self.settings['interval_hours'] * 3600 - time.time())
+
+    def start(self):
+        """
+        Starts the scheduler thread (does nothing if backups are disabled).
+        """
+        if not self.settings['enabled'] or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="backup-scheduler", daemon=True)
+        self._thread.start()
+        logger.info("Backups scheduled every %s h into '%s'", self.settings['interval_hours'], self.settings['directory'])
+
+    def stop(self, timeout=5.0):
+        """
+        Stops the scheduler, cancelling a snapshot that is still being copied.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        """
+        Scheduler thread: waits until a snapshot is due, then takes it.
+        """
+        delay = max(self.due_in(), STARTUP_DELAY)
+        while not self._stop.wait(delay):
+            try:
+                run_backup(self.db_name, self.settings, cancel=self._stop)
+                delay = self.due_in()
+            except BackupAborted:
+                logger.info("Scheduled backup cancelled.")
+                return
+            except Exception as e:
+                logger.error("Scheduled backup failed: %s", e)
+                delay = FAILURE_RETRY
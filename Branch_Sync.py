@@ -0,0 +1,352 @@
+import gzip
+import json
+import logging
+import sqlite3
+from datetime import datetime
+
+from Manage_Data import ALLOWED_TABLES, ARCHIVE_ORIGIN, TABLE_COLUMNS, set_change_origin
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+SYNC_FORMAT = "gym-changes"
+SYNC_VERSION = 1
+# Each branch numbers new rows from branch_number * ID_BLOCK, so rows
+# created in different branches never share an id.
+ID_BLOCK = 10_000_000
+
+class SyncError(Exception):
+    """
+    Raised when a change file cannot be exported or applied safely.
+    """
+
+def get_state(db, name, default=None):
+    """
+    Reads one value from the SyncState table.
+    """
+    row = db.new_cursor().execute("SELECT value FROM SyncState WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else default
+
+def _set_state(cursor, name, value):
+    """Writes one value to the SyncState table (inside a transaction)."""
+    cursor.execute("INSERT OR REPLACE INTO SyncState (name, value) VALUES (?, ?)", (name, str(value)))
+
+def branch_info(db):
+    """
+    Returns this database's branch identity.
+
+    Returns:
+        dict: 'branch_id' (random, set when the database is created or
+              initialised) and 'branch_number' (0 until init_branch).
+    """
+    return {'branch_id': get_state(db, 'branch_id'),
+            'branch_number': int(get_state(db, 'branch_number', 0))}
+
+def init_branch(db, branch_number):
+    """
+    Prepares a database for syncing as branch 'branch_number'.
+
+    Start every branch from a copy of the same database and give each a
+    different number. This gives the copy its own branch id, makes new
+    rows use ids from branch_number * ID_BLOCK, and starts the change
+    log from here (the shared history is not exported again).
+
+    Args:
+        db (DatabaseManager): The branch database.
+        branch_number (int): 1, 2, 3... (different in every branch).
+
+    Returns:
+        dict: The new branch_info().
+    """
+    if branch_number < 1:
+        raise SyncError("The branch number must be 1 or higher.")
+
+    def init(cursor):
+        cursor.execute("DELETE FROM SyncState")
+        _set_state(cursor, 'branch_id', cursor.execute("SELECT lower(hex(randomblob(8)))").fetchone()[0])
+        _set_state(cursor, 'branch_number', branch_number)
+        _set_state(cursor, 'baseline', cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM ChangeLog").fetchone()[0])
+        for table in sorted(ALLOWED_TABLES):
+            _set_id_counter(cursor, table, _own_id_counter(cursor, table, branch_number))
+
+    db.run_write(init)
+    info = branch_info(db)
+    logger.info("Initialised branch %s (id %s); new rows start at id %s.",
+                branch_number, info['branch_id'], branch_number * ID_BLOCK + 1)
+    return info
+
+def _own_id_counter(cursor, table, branch_number):
+    """
+    Returns the last id this branch handed out in 'table': its
+    AUTOINCREMENT counter if that is inside the branch's own id block,
+    otherwise the largest id of the block in use (or the block start).
+    """
+    first_id = branch_number * ID_BLOCK
+    last_id = first_id + ID_BLOCK - 1
+    seq = cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+    top = cursor.execute(f"SELECT MAX(id) FROM {table} WHERE id BETWEEN ? AND ?", (first_id, last_id)).fetchone()[0]
+    counters = [first_id, top or first_id]
+    if seq and first_id <= seq[0] <= last_id:
+        counters.append(seq[0])
+    return max(counters)
+
+def _set_id_counter(cursor, table, value):
+    """Sets the AUTOINCREMENT counter of 'table' (inside a transaction)."""
+    cursor.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = ?", (value, table))
+    if not cursor.rowcount:
+        cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (table, value))
+
+def _require_branch(info):
+    """Raises SyncError if init_branch was never run on this database."""
+    if not info['branch_number']:
+        raise SyncError("This database is not a sync branch yet. Run 'Gym_Tools.py sync-init' first.")
+
+def export_changes(db, path, peer=None, since=None):
+    """
+    Writes the changes made since a checkpoint to a gzipped JSON Lines
+    file: one header line, then one line per changed row. Several changes
+    to the same row are shipped once, with the row as it is now (as an
+    INSERT if the row was created since the checkpoint).
+
+    The header also lists how far this branch has applied each other
+    branch's changes ('seen'), so the receiver can tell which of its own
+    edits this file was made without.
+
+    Args:
+        db (DatabaseManager): The branch database.
+        path (str): The file to write (e.g. 'branch1-to-branch2.jsonl.gz').
+        peer (str, optional): Name of the receiving branch. Its checkpoint
+                              is read before and advanced after the export.
+        since (int, optional): Export changes after this sequence number
+                               (overrides the peer's checkpoint).
+
+    Returns:
+        dict: The header written ('after_seq', 'last_seq', 'count', ...).
+
+    Raises:
+        SyncError: If this is not a branch, or changes after 'since' were pruned.
+    """
+    info = branch_info(db)
+    _require_branch(info)
+    if since is None:
+        since = int(get_state(db, f'exported:{peer}', 0) if peer else 0)
+        since = max(since, int(get_state(db, 'baseline', 0)))
+
+    cursor = db.new_cursor()
+    cursor.execute("BEGIN") # One consistent read of the log
+    try:
+        first = cursor.execute("SELECT MIN(seq) FROM ChangeLog").fetchone()[0]
+        last = cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'ChangeLog'").fetchone()
+        last_seq = last[0] if last else 0
+        if last_seq > since and (first is None or first > since + 1):
+            raise SyncError(f"Changes after #{since} were pruned from the change log; "
+                            "start the peer from a copy of this database instead.")
+
+        # 1. Keep the newest change of each row, in log order
+        latest = {}
+        cursor.execute("SELECT seq, table_name, action, row_id, payload, origin FROM ChangeLog "
+                       "WHERE seq > ? ORDER BY seq", (since,))
+        for seq, table_name, action, row_id, payload, origin in cursor:
+            if origin == ARCHIVE_ORIGIN:
+                continue # Archiving is local to each branch
+            if action != 'DELETE' and payload is None:
+                logger.warning("Skipping %s #%s: logged without a payload.", table_name, row_id)
+                continue
+            previous = latest.pop((table_name, row_id), None)
+            if previous and previous[2] == 'INSERT' and action == 'UPDATE':
+                action = 'INSERT' # New to the receiver either way
+            latest[(table_name, row_id)] = (seq, table_name, action, row_id, payload, origin)
+        seen = {name.split(':', 1)[1]: int(value) for name, value in cursor.execute(
+            "SELECT name, value FROM SyncState WHERE name LIKE 'applied:%'")}
+    finally:
+        cursor.execute("COMMIT")
+
+    # 2. Write the file
+    header = {
+        'format': SYNC_FORMAT,
+        'version': SYNC_VERSION,
+        'origin': info['branch_id'],
+        'branch_number': info['branch_number'],
+        'after_seq': since,
+        'last_seq': max(last_seq, since),
+        'count': len(latest),
+        'seen': seen,
+        'created': datetime.now().isoformat(timespec='seconds'),
+    }
+    with gzip.open(path, 'wt', encoding='utf-8') as file:
+        file.write(json.dumps(header) + "\n")
+        for seq, table_name, action, row_id, payload, origin in latest.values():
+            change = {'seq': seq, 'table': table_name, 'action': action, 'id': row_id,
+                      'row': json.loads(payload) if payload else None,
+                      'origin': origin or info['branch_id']}
+            file.write(json.dumps(change) + "\n")
+
+    if peer:
+        db.run_write(lambda cursor: _set_state(cursor, f'exported:{peer}', header['last_seq']))
+    logger.info("Exported %s changes (#%s to #%s) to %s", header['count'], since, header['last_seq'], path)
+    return header
+
+def read_change_file(path):
+    """
+    Reads a file written by export_changes.
+
+    Returns:
+        tuple: (header dict, list of change dicts)
+
+    Raises:
+        SyncError: If the file is not a change file of a supported version.
+    """
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            header = json.loads(file.readline() or "{}")
+            if header.get('format') != SYNC_FORMAT or header.get('version') != SYNC_VERSION:
+                raise SyncError(f"{path} is not a version {SYNC_VERSION} change file.")
+            changes = [json.loads(line) for line in file if line.strip()]
+    except (OSError, EOFError, ValueError) as e:
+        raise SyncError(f"Could not read {path}: {e}") from e
+    if len(changes) != header['count']:
+        raise SyncError(f"{path} is incomplete ({len(changes)} of {header['count']} changes).")
+    return header, changes
+
+def _apply_change(cursor, change):
+    """
+    Inserts, upserts or deletes the row of one change. A new row whose id
+    is already taken raises sqlite3.IntegrityError instead of overwriting it.
+
+    Returns:
+        bool: False if the change was already applied (the same row exists).
+    """
+    table = change['table']
+    if table not in ALLOWED_TABLES:
+        raise SyncError(f"Unknown table {table!r} in change file.")
+    if change['action'] == 'DELETE':
+        cursor.execute(f"DELETE FROM {table} WHERE id = ?", (change['id'],))
+        return True
+    columns = TABLE_COLUMNS[table]
+    values = [change['row'].get(column) for column in columns]
+    placeholders = ", ".join("?" for _ in columns)
+    if change['action'] == 'INSERT':
+        try:
+            cursor.execute(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", values)
+            return True
+        except sqlite3.IntegrityError:
+            existing = cursor.execute(f"SELECT {', '.join(columns)} FROM {table} WHERE id = ?",
+                                      (change['id'],)).fetchone()
+            if existing is not None and list(existing) == values:
+                return False # Sent again after a conflict further down the file
+            raise
+    updates = ", ".join(f"{column} = excluded.{column}" for column in columns[1:])
+    cursor.execute(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) "
+                   f"ON CONFLICT(id) DO UPDATE SET {updates}", values)
+    return True
+
+def _edited_here(cursor, change, after_seq, sender):
+    """
+    Tells whether this branch changed the row of 'change' after 'after_seq'
+    (the last of its changes the sender had applied), i.e. both branches
+    edited the row without seeing each other's edit.
+    """
+    return cursor.execute(
+        "SELECT 1 FROM ChangeLog WHERE table_name = ? AND row_id = ? AND seq > ? "
+        "AND (origin IS NULL OR origin NOT IN (?, ?, ?)) LIMIT 1",
+        (change['table'], change['id'], after_seq, sender, change['origin'], ARCHIVE_ORIGIN)).fetchone() is not None
+
+def apply_changes(db, path):
+    """
+    Applies a change file from another branch in one transaction.
+
+    Inserts and updates write the whole row (the newest version wins),
+    deletes remove it. Members are written first and deleted last, so
+    check-ins and payments always find their member; otherwise changes
+    are applied in log order. Changes this branch made itself, or already
+    applied from an earlier file, are skipped.
+
+    If both branches changed the same row since they last synced, the
+    branch with the lower number wins on both sides: its change is
+    applied, and the other branch's change is skipped and reported in
+    'concurrent'. Both branches end up with the same row.
+
+    After applying, the id counters are set back into this branch's own
+    id block, so rows from the other branch never move them.
+
+    A change that breaks a constraint (e.g. the same phone number
+    registered in both branches) is skipped and reported; everything else
+    is still applied. The checkpoint then stays before the first conflict,
+    so once it is fixed, re-exporting from there applies the rest.
+
+    Args:
+        db (DatabaseManager): The branch database.
+        path (str): A file written by export_changes.
+
+    Returns:
+        dict: 'origin', 'applied', 'skipped', 'last_seq' (the new
+              checkpoint), 'conflicts' (a list of (change, error message))
+              and 'concurrent' (a list of (change, winning branch number)).
+
+    Raises:
+        SyncError: If the file is from this branch, not from a branch, or
+                   earlier changes from its branch have not been applied.
+    """
+    header, changes = read_change_file(path)
+    info = branch_info(db)
+    _require_branch(info)
+    origin = header['origin']
+    if origin == info['branch_id'] or header['branch_number'] == info['branch_number']:
+        raise SyncError(f"{path} comes from this branch (or one with the same branch number).")
+    checkpoint = get_state(db, f'applied:{origin}')
+    applied_seq = int(checkpoint) if checkpoint is not None else None
+    if applied_seq is not None and header['after_seq'] > applied_seq:
+        raise SyncError(f"Changes #{applied_seq + 1} to #{header['after_seq']} from branch "
+                        f"{header['branch_number']} are missing; export again with --since {applied_seq}.")
+
+    def apply_order(change):
+        if change['table'] != 'Members':
+            return (1, change['seq'])
+        return (2 if change['action'] == 'DELETE' else 0, change['seq'])
+
+    # Our changes the sender had applied when it wrote the file
+    seen_seq = int(header.get('seen', {}).get(info['branch_id'], get_state(db, 'baseline', 0)))
+    we_win = info['branch_number'] < header['branch_number']
+
+    def apply(cursor):
+        report = {'origin': origin, 'applied': 0, 'skipped': 0, 'last_seq': header['last_seq'],
+                  'conflicts': [], 'concurrent': []}
+        counters = {table: _own_id_counter(cursor, table, info['branch_number']) for table in ALLOWED_TABLES}
+        for change in sorted(changes, key=apply_order):
+            if change['origin'] == info['branch_id'] or (applied_seq is not None and change['seq'] <= applied_seq):
+                report['skipped'] += 1 # Our own change coming back, or already applied
+                continue
+            if change['action'] != 'INSERT' and _edited_here(cursor, change, seen_seq, origin):
+                winner = info['branch_number'] if we_win else header['branch_number']
+                report['concurrent'].append((change, winner))
+                if we_win:
+                    report['skipped'] += 1 # The sender applies our version instead
+                    continue
+            set_change_origin(cursor, change['origin'])
+            cursor.execute("SAVEPOINT sync_change")
+            try:
+                if _apply_change(cursor, change):
+                    report['applied'] += 1
+                else:
+                    report['skipped'] += 1
+            except sqlite3.IntegrityError as e:
+                cursor.execute("ROLLBACK TO SAVEPOINT sync_change")
+                report['conflicts'].append((change, str(e)))
+            cursor.execute("RELEASE SAVEPOINT sync_change")
+        set_change_origin(cursor, None)
+        for table, counter in counters.items():
+            _set_id_counter(cursor, table, counter)
+        if report['conflicts']:
+            report['last_seq'] = min(change['seq'] for change, _ in report['conflicts']) - 1
+        if applied_seq is None or report['last_seq'] > applied_seq:
+            _set_state(cursor, f'applied:{origin}', report['last_seq'])
+        return report
+
+    report = db.run_write(apply)
+    for change, winner in report['concurrent']:
+        logger.warning("Both branches changed %s #%s; kept branch %s's version.", change['table'], change['id'], winner)
+    for change, error in report['conflicts']:
+        logger.warning("Not applied: %s %s #%s (%s)", change['action'], change['table'], change['id'], error)
+    logger.info("Applied %s changes from branch %s (%s skipped, %s conflicts).", report['applied'],
+                header['branch_number'], report['skipped'], len(report['conflicts']))
+    return report
@@ -0,0 +1,246 @@
+import logging
+import platform
+import threading
+import time
+from collections import deque
+
+import App_Config
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+CONFIG_SECTION = "camera"
+DEFAULT_SETTINGS = {
+    'index': 0,            # Device number (or a video file / stream URL)
+    'backend': 'auto',     # 'auto', 'any', 'dshow', 'msmf', 'v4l2', 'gstreamer', 'avfoundation'
+    'width': 640,
+    'height': 480,
+    'fps': 30,
+    'buffer_size': 4,      # Recent frames kept in the ring buffer
+}
+BACKENDS = {
+    'any': 'CAP_ANY',
+    'dshow': 'CAP_DSHOW',        # Windows DirectShow (most stable on Windows)
+    'msmf': 'CAP_MSMF',          # Windows Media Foundation
+    'v4l2': 'CAP_V4L2',          # Linux
+    'gstreamer': 'CAP_GSTREAMER',
+    'avfoundation': 'CAP_AVFOUNDATION', # macOS
+}
+AUTO_BACKENDS = {'Windows': 'dshow', 'Linux': 'v4l2', 'Darwin': 'avfoundation'}
+RELEASE_DELAY = 5.0        # Seconds the device stays open after the last consumer leaves
+MAX_READ_FAILURES = 30     # Consecutive failed reads before the camera is considered lost
+
+def resolve_backend(name):
+    """
+    Maps a backend name from the settings to an OpenCV API preference.
+
+    Args:
+        name (str): One of BACKENDS, or 'auto' for this platform's usual choice.
+
+    Returns:
+        int: The cv2.CAP_* constant (CAP_ANY if unknown/unsupported).
+    """
+    if name == 'auto':
+        name = AUTO_BACKENDS.get(platform.system(), 'any')
+    backend = getattr(cv2, BACKENDS.get(name, 'CAP_ANY'), None)
+    if backend is None:
+        logger.warning("Camera backend '%s' is not available; using CAP_ANY.", name)
+        return cv2.CAP_ANY
+    return backend
+
+class CameraService:
+    """
+    One camera device shared by every window that needs it.
+
+    A dedicated thread opens the device on first use, keeps reading and
+    stores frames in a small ring buffer; consumers subscribe, then take
+    the latest frame whenever they are ready, so a slow consumer never
+    holds up the device or the other windows. The device is released a
+    few seconds after the last consumer unsubscribes, so switching
+    windows or retaking a photo does not pay the camera start-up again.
+    """
+
+    def __init__(self, settings=None):
+        """
+        Args:
+            settings (dict, optional): Camera settings. Defaults to the 'camera' section of config.json.
+        """
+        if settings is None:
+            settings = App_Config.get_section(CONFIG_SECTION, DEFAULT_SETTINGS)
+        self.settings = dict(DEFAULT_SETTINGS, **settings)
+        self.frames = deque(maxlen=self.settings['buffer_size'])
+        self.error = None
+        self._subscribers = 0
+        self._released_at = None
+        self._sequence = 0
+        self._thread = None
+        self._ready = threading.Event()
+        self._condition = threading.Condition()
+
+    def subscribe(self):
+        """
+        Registers a consumer, starting the capture thread if needed.
+        """
+        with self._condition:
+            self._subscribers += 1
+            self._released_at = None
+            if self._thread is None:
+                self.error = None
+                self._ready.clear()
+                self._thread = threading.Thread(target=self._run, name="CameraService", daemon=True)
+                self._thread.start()
+            logger.info("Camera subscribers: %s", self._subscribers)
+
+    def unsubscribe(self):
+        """
+        Removes a consumer; the device closes RELEASE_DELAY seconds after the last one.
+        """
+        with self._condition:
+            self._subscribers = max(self._subscribers - 1, 0)
+            if self._subscribers == 0:
+                self._released_at = time.monotonic()
+            logger.info("Camera subscribers: %s", self._subscribers)
+
+    def wait_ready(self, timeout=10.0):
+        """
+        Blocks until the first frame arrives or opening failed.
+
+        Returns:
+            bool: True if frames are available.
+        """
+        self._ready.wait(timeout)
+        return self.error is None and bool(self.frames)
+
+    def latest(self):
+        """
+        Returns the newest frame.
+
+        Returns:
+            tuple: (sequence_number, frame), or (0, None) before the first frame.
+                   Compare sequence numbers to skip frames already processed.
+        """
+        with self._condition:
+            if not self.frames:
+                return 0, None
+            sequence, _, frame, _ = self.frames[-1]
+            return sequence, frame
+
+    def read_time(self, sequence):
+        """
+        Returns how long the device took to deliver a buffered frame
+        (cap.read(): grab and decode), in seconds, or None if the frame
+        is no longer in the buffer.
+        """
+        with self._condition:
+            for buffered_sequence, _, _, seconds in reversed(self.frames):
+                if buffered_sequence == sequence:
+                    return seconds
+            return None
+
+    def wait_frame(self, after_sequence=0, timeout=1.0):
+        """
+        Waits for a frame newer than after_sequence (for non-GUI consumers).
+
+        Returns:
+            tuple: (sequence_number, frame), or (after_sequence, None) on timeout/error.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._sequence > after_sequence or self.error is not None, timeout)
+            if self._sequence > after_sequence and self.frames:
+                sequence, _, frame, _ = self.frames[-1]
+                return sequence, frame
+            return after_sequence, None
+
+    def recent(self):
+        """
+        Returns the buffered frames, oldest first, as
+        (sequence, timestamp, frame, read_seconds).
+        """
+        with self._condition:
+            return list(self.frames)
+
+    def _open(self):
+        """Opens the device with the configured backend and format."""
+        source = self.settings['index']
+        backend = resolve_backend(self.settings['backend'])
+        cap = cv2.VideoCapture(source, backend)
+        if not cap.isOpened():
+            cap.release()
+            raise RuntimeError(f"Cannot open camera {source} (backend '{self.settings['backend']}').")
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.settings['width'])
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.settings['height'])
+        cap.set(cv2.CAP_PROP_FPS, self.settings['fps'])
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1) # We keep our own buffer; don't let the driver queue stale frames
+        return cap
+
+    def _should_stop(self):
+        """True once nobody has been subscribed for RELEASE_DELAY seconds."""
+        with self._condition:
+            return (self._subscribers == 0 and self._released_at is not None
+                    and time.monotonic() - self._released_at >= RELEASE_DELAY)
+
+    def _capture(self):
+        """Opens the device and keeps the ring buffer filled until told to stop."""
+        started = time.perf_counter()
+        try:
+            cap = self._open()
+        except Exception as e:
+            logger.error("Camera failed to start: %s", e)
+            self.error = str(e)
+            return
+        logger.info("Camera opened in %.1f s", time.perf_counter() - started)
+
+        failures = 0
+        try:
+            while not self._should_stop():
+                read_started = time.perf_counter()
+                ret, frame = cap.read()
+                read_seconds = time.perf_counter() - read_started
+                if not ret:
+                    failures += 1
+                    if failures >= MAX_READ_FAILURES:
+                        self.error = "Camera stopped delivering frames."
+                        logger.error(self.error)
+                        return
+                    time.sleep(0.01)
+                    continue
+                failures = 0
+                with self._condition:
+                    self._sequence += 1
+                    self.frames.append((self._sequence, time.monotonic(), frame, read_seconds))
+                    self._condition.notify_all()
+                self._ready.set()
+        finally:
+            cap.release()
+            logger.info("Camera released.")
+
+    def _run(self):
+        """Capture thread body; reopens if someone subscribed while it was closing."""
+        while True:
+            self._capture()
+            with self._condition:
+                self.frames.clear()
+                self._condition.notify_all()
+                if self._subscribers > 0 and self.error is None:
+                    continue
+                self._thread = None
+                self._ready.set() # Wake wait_ready() callers (error or stopped)
+                return
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_camera():
+    """
+    Returns the process-wide camera service (created on first use).
+    """
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = CameraService()
+        return _service
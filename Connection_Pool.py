@@ -0,0 +1,96 @@
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+
+import Manage_Data
+import Write_Queue
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+POOL_SIZE = 4
+POOL_TIMEOUT = 10.0 # Seconds to wait for a free connection
+
+class ConnectionPool:
+    """
+    A fixed set of DatabaseManager connections shared by worker threads
+    (e.g. the API server). Connections are opened on demand up to 'size'
+    and reused, so requests do not pay for connecting and re-checking
+    the schema each time. A connection is used by one thread at a time.
+    """
+
+    def __init__(self, db_name, size=POOL_SIZE, timeout=POOL_TIMEOUT, single_writer=False):
+        """
+        Args:
+            db_name (str): The SQLite database file.
+            size (int): Maximum number of open connections.
+            timeout (float): Seconds to wait for a free connection.
+            single_writer (bool): Route every connection's writes through one WriteQueue.
+        """
+        self.db_name = db_name
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue() # Most recently used first (warm page cache)
+        self._created = 0
+        self._lock = threading.Lock()
+        self._all = []
+        self.writer = Write_Queue.WriteQueue(db_name) if single_writer else None
+
+    def acquire(self):
+        """
+        Takes a connection, opening a new one if the pool is not full.
+
+        Returns:
+            DatabaseManager: A connection for the calling thread's exclusive use.
+
+        Raises:
+            TimeoutError: If no connection became free in time.
+        """
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                db = Manage_Data.DatabaseManager(self.db_name, shared=True, writer=self.writer)
+                self._all.append(db)
+                logger.info("Opened pooled connection %s/%s", self._created, self.size)
+                return db
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No database connection free after {self.timeout} s") from None
+
+    def release(self, db):
+        """
+        Returns a connection to the pool (rolling back anything left open).
+        """
+        if db.conn is not None and db.conn.in_transaction:
+            db.conn.rollback()
+        self._idle.put(db)
+
+    @contextmanager
+    def connection(self):
+        """
+        Context manager: 'with pool.connection() as db: ...'
+        """
+        db = self.acquire()
+        try:
+            yield db
+        finally:
+            self.release(db)
+
+    def close_all(self):
+        """
+        Closes every connection the pool opened.
+        """
+        with self._lock:
+            for db in self._all:
+                db.close_connection()
+            self._all.clear()
+            self._created = 0
+            self._idle = queue.LifoQueue()
+        if self.writer is not None:
+            self.writer.close()
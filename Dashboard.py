@@ -0,0 +1,342 @@
+import customtkinter as ctk
+import tkinter as tk
+from tkinter import ttk
+import Manage_Data
+import CTkMessagebox
+import numpy as np
+import logging
+import time
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+BUTTON_FONT = ("Poppins", 20)
+LABEL_FONT = ("Poppins", 16)
+MESSAGE_BOX = CTkMessagebox.CTkMessagebox
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+HISTORY_DAYS = 365 * 5    # How far back the heatmap and weekly totals look
+DAILY_CHART_DAYS = 30     # Days shown in the daily bar chart
+RECENT_DAYS = 30          # Churn: "recent" activity window
+PRIOR_DAYS = 60           # Churn: window before the recent one, used for the trend
+CHURN_ROWS = 50           # Number of at-risk members listed
+
+# ------------------ Vectorized figure computations ------------------
+# These functions take column data straight from the rollup queries and
+# never loop over rows in Python.
+
+def daily_series(rows, start_day, end_day):
+    """
+    Turns sparse (day, visits) rows into a dense per-day series.
+
+    Args:
+        rows (list): (day, visits) tuples with ISO day strings.
+        start_day (str): First ISO day of the series.
+        end_day (str): Last ISO day of the series.
+
+    Returns:
+        tuple: (days, counts) as numpy arrays (datetime64[D], int64).
+    """
+    days = np.arange(np.datetime64(start_day), np.datetime64(end_day) + 1, dtype='datetime64[D]')
+    counts = np.zeros(len(days), dtype=np.int64)
+    if rows:
+        row_days, visits = zip(*rows)
+        index = (np.array(row_days, dtype='datetime64[D]') - days[0]).astype(np.int64)
+        np.add.at(counts, index, np.array(visits, dtype=np.int64))
+    return days, counts
+
+def weekly_totals(days, counts):
+    """
+    Sums a dense daily series into Monday-based weeks.
+
+    Returns:
+        tuple: (week_start_days, totals) as numpy arrays.
+    """
+    # 1970-01-01 was a Thursday, so (epoch_day + 3) % 7 gives Monday = 0
+    weekday = (days.astype(np.int64) + 3) % 7
+    week_starts = days - weekday.astype('timedelta64[D]')
+    unique_weeks, week_index = np.unique(week_starts, return_inverse=True)
+    totals = np.bincount(week_index, weights=counts).astype(np.int64)
+    return unique_weeks, totals
+
+def weekday_hour_matrix(rows):
+    """
+    Builds a 7 x 24 visits matrix (weekday x hour) from hourly rollup rows.
+
+    Args:
+        rows (list): (day, hour, visits) tuples with ISO day strings.
+
+    Returns:
+        numpy.ndarray: The 7 x 24 matrix (Monday first).
+    """
+    matrix = np.zeros((7, 24), dtype=np.int64)
+    if rows:
+        row_days, hours, visits = zip(*rows)
+        weekday = (np.array(row_days, dtype='datetime64[D]').astype(np.int64) + 3) % 7
+        np.add.at(matrix, (weekday, np.array(hours, dtype=np.int64) % 24), np.array(visits, dtype=np.int64))
+    return matrix
+
+def revenue_pivot(rows):
+    """
+    Pivots (month, method, total, count) rows into a month x method table.
+
+    Returns:
+        tuple: (months, methods, totals) where totals is a 2D numpy array.
+    """
+    if not rows:
+        return np.array([]), np.array([]), np.zeros((0, 0))
+    months, methods, totals, _counts = zip(*rows)
+    unique_months, month_index = np.unique(np.array(months), return_inverse=True)
+    unique_methods, method_index = np.unique(np.array(methods), return_inverse=True)
+    table = np.zeros((len(unique_months), len(unique_methods)))
+    np.add.at(table, (month_index, method_index), np.array(totals, dtype=float))
+    return unique_months, unique_methods, table
+
+def churn_scores(rows, today):
+    """
+    Scores members by churn risk (0 = safe, 1 = very likely to leave).
+
+    The score blends how long since the last visit, how much the visit
+    rate dropped versus the prior window, and whether the membership is
+    about to expire.
+
+    Args:
+        rows (list): Rows from DatabaseManager.get_member_activity.
+        today (numpy.datetime64): The reference day.
+
+    Returns:
+        tuple: (ids, names, days_since_visit, scores), sorted highest risk first.
+    """
+    if not rows:
+        empty = np.array([])
+        return empty, empty, empty, empty
+    ids, names, end_days, last_days, recent, prior = zip(*rows)
+    last = np.array([d if d else 'NaT' for d in last_days], dtype='datetime64[D]')
+    end = np.array([d if d else 'NaT' for d in end_days], dtype='datetime64[D]')
+
+    days_since = (today - last).astype(float)
+    days_since[np.isnat(last)] = HISTORY_DAYS # Never visited
+    recency = np.clip(days_since / RECENT_DAYS, 0, 1)
+
+    recent_rate = np.array(recent, dtype=float)
+    prior_rate = np.array(prior, dtype=float) * (RECENT_DAYS / PRIOR_DAYS)
+    drop = np.clip(1 - recent_rate / np.maximum(prior_rate, 1), 0, 1)
+    drop[prior_rate == 0] = 0 # No history to compare against
+
+    days_to_expiry = (end - today).astype(float)
+    expiring = (~np.isnat(end)) & (days_to_expiry <= 7)
+
+    scores = 0.5 * recency + 0.3 * drop + 0.2 * expiring
+    order = np.argsort(-scores, kind='stable')
+    return np.array(ids)[order], np.array(names)[order], days_since[order], scores[order]
+
+class Dashboard(ctk.CTkToplevel):
+    """
+    Toplevel window showing attendance and revenue analytics.
+    All figures are read from the rollup tables with set-based SQL
+    and aggregated with NumPy, so it stays fast on years of history.
+    """
+
+    def __init__(self, parent):
+        """
+        Initializes the Dashboard window and database connection.
+        """
+        super().__init__(parent)
+        logger.info("Initializing 'Dashboard' window...")
+        self.title("Dashboard")
+        self.geometry("1400x750")
+        ctk.set_appearance_mode('dark')
+
+        try:
+            self.db = Manage_Data.DatabaseManager("GYM.db")
+        except Exception as e:
+            logger.critical("Dashboard: Failed to load database: %s", e)
+            MESSAGE_BOX(title="Critical Error", message=f"Could not load database: {e}", icon="cancel")
+            self.destroy()
+            return
+
+        self.layout()
+        self.refresh()
+
+    def layout(self):
+        """
+        Creates and places all widgets for the Dashboard window.
+        """
+        logger.info("Building 'Dashboard' layout...")
+        header = ctk.CTkFrame(self, fg_color='transparent')
+        ctk.CTkLabel(header, text='Dashboard', font=("Poppins", 30, 'bold')).pack(side='left', padx=20)
+        ctk.CTkButton(header, text='Refresh', font=BUTTON_FONT, width=150,
+                      fg_color="#fff", corner_radius=7, text_color='#000000',
+                      hover_color="#CAF4FF", command=self.refresh).pack(side='right', padx=20)
+        self.status_label = ctk.CTkLabel(header, text='', font=LABEL_FONT)
+        self.status_label.pack(side='right', padx=20)
+        header.pack(fill='x', pady=10)
+
+        self.tabs = ctk.CTkTabview(self)
+        self.tabs.pack(fill='both', expand=True, padx=10, pady=10)
+        visits_tab = self.tabs.add("Visits")
+        heatmap_tab = self.tabs.add("Peak Hours")
+        revenue_tab = self.tabs.add("Revenue")
+        churn_tab = self.tabs.add("Churn Risk")
+
+        # --- Visits: daily bar chart + weekly table ---
+        ctk.CTkLabel(visits_tab, text=f'Daily visits (last {DAILY_CHART_DAYS} days)', font=LABEL_FONT).pack(anchor='w')
+        self.daily_canvas = tk.Canvas(visits_tab, height=260, bg="#2b2b2b", highlightthickness=0)
+        self.daily_canvas.pack(fill='x', padx=10, pady=10)
+        ctk.CTkLabel(visits_tab, text='Weekly visits', font=LABEL_FONT).pack(anchor='w')
+        self.weekly_table = self.create_table(visits_tab, ("week_start", "visits"))
+
+        # --- Peak hours heatmap ---
+        self.heatmap_canvas = tk.Canvas(heatmap_tab, bg="#2b2b2b", highlightthickness=0)
+        self.heatmap_canvas.pack(fill='both', expand=True, padx=10, pady=10)
+
+        # --- Revenue by month and payment method ---
+        self.revenue_frame = ctk.CTkFrame(revenue_tab, fg_color='transparent')
+        self.revenue_frame.pack(fill='both', expand=True)
+        self.revenue_table = None
+
+        # --- Churn risk ---
+        self.churn_table = self.create_table(churn_tab, ("member_id", "full_name", "days_since_visit", "risk"))
+
+    def create_table(self, parent, columns):
+        """
+        Helper to create a Treeview with a vertical scrollbar.
+
+        Returns:
+            ttk.Treeview: The created table.
+        """
+        frame = ctk.CTkFrame(parent, fg_color='transparent')
+        table = ttk.Treeview(frame, columns=columns, show='headings')
+        for col in columns:
+            table.heading(col, text=col.replace("_", " ").title())
+            table.column(col, width=150 if col == 'full_name' else 100, anchor='center')
+        scrollbar = ttk.Scrollbar(frame, orient='vertical', command=table.yview)
+        table.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side='right', fill='y')
+        table.pack(fill='both', expand=True)
+        frame.pack(fill='both', expand=True, padx=10, pady=10)
+        return table
+
+    def refresh(self):
+        """
+        Re-queries all figures and redraws every tab.
+        """
+        logger.info("Refreshing dashboard...")
+        started = time.perf_counter()
+        today = datetime.now()
+        today_day = np.datetime64(today.strftime('%Y-%m-%d'))
+        history_start = (today - timedelta(days=HISTORY_DAYS)).strftime('%Y-%m-%d')
+        chart_start = (today - timedelta(days=DAILY_CHART_DAYS - 1)).strftime('%Y-%m-%d')
+        today_str = today.strftime('%Y-%m-%d')
+
+        try:
+            days, counts = daily_series(self.db.get_daily_visit_totals(history_start, today_str),
+                                        history_start, today_str)
+            matrix = weekday_hour_matrix(self.db.get_hourly_visits(history_start, today_str))
+            months, methods, revenue = revenue_pivot(self.db.get_revenue_by_month())
+            recent_start = (today - timedelta(days=RECENT_DAYS)).strftime('%Y-%m-%d')
+            prior_start = (today - timedelta(days=RECENT_DAYS + PRIOR_DAYS)).strftime('%Y-%m-%d')
+            churn = churn_scores(self.db.get_member_activity(recent_start, prior_start), today_day)
+        except Exception as e:
+            logger.error("Failed to compute dashboard figures: %s", e)
+            MESSAGE_BOX(title="Error", message=f"Failed to load dashboard data:\n{e}", icon="cancel")
+            return
+
+        chart_mask = days >= np.datetime64(chart_start)
+        self.draw_daily_chart(days[chart_mask], counts[chart_mask])
+        self.fill_weekly_table(*weekly_totals(days, counts))
+        self.draw_heatmap(matrix)
+        self.fill_revenue_table(months, methods, revenue)
+        self.fill_churn_table(*churn)
+
+        elapsed = time.perf_counter() - started
+        self.status_label.configure(text=f"Updated in {elapsed * 1000:.0f} ms")
+        logger.info("Dashboard refreshed in %.3fs", elapsed)
+
+    def draw_daily_chart(self, days, counts):
+        """
+        Draws a simple bar chart of visits per day on the daily canvas.
+        """
+        canvas = self.daily_canvas
+        canvas.delete('all')
+        canvas.update_idletasks()
+        width = max(canvas.winfo_width(), 600)
+        height = int(canvas['height'])
+        if len(days) == 0:
+            return
+        peak = max(int(counts.max()), 1)
+        bar_width = width / len(days)
+        for i, (day, count) in enumerate(zip(days, counts)):
+            bar_height = (height - 40) * count / peak
+            x0 = i * bar_width + 2
+            canvas.create_rectangle(x0, height - 20 - bar_height, x0 + bar_width - 4, height - 20,
+                                    fill="#77C3EC", outline="")
+            canvas.create_text(x0 + bar_width / 2, height - 10, text=str(day)[8:], fill="#FFF1DB", font=("Poppins", 8))
+            if count:
+                canvas.create_text(x0 + bar_width / 2, height - 28 - bar_height, text=str(count),
+                                   fill="#FFF1DB", font=("Poppins", 8))
+
+    def fill_weekly_table(self, week_starts, totals):
+        """
+        Shows weekly visit totals, newest week first.
+        """
+        self.weekly_table.delete(*self.weekly_table.get_children())
+        for week, total in zip(week_starts[::-1], totals[::-1]):
+            self.weekly_table.insert(parent='', index='end', values=(str(week), int(total)))
+
+    def draw_heatmap(self, matrix):
+        """
+        Draws a weekday x hour heatmap of visits.
+        """
+        canvas = self.heatmap_canvas
+        canvas.delete('all')
+        canvas.update_idletasks()
+        width = max(canvas.winfo_width(), 900)
+        height = max(canvas.winfo_height(), 400)
+        left, top = 60, 30
+        cell_w = (width - left - 10) / 24
+        cell_h = (height - top - 10) / 7
+        # Normalize once for the whole matrix, then map to a blue ramp
+        intensity = matrix / max(int(matrix.max()), 1)
+        for hour in range(24):
+            canvas.create_text(left + (hour + 0.5) * cell_w, top / 2, text=f"{hour:02d}",
+                               fill="#FFF1DB", font=("Poppins", 9))
+        for weekday in range(7):
+            canvas.create_text(left / 2, top + (weekday + 0.5) * cell_h, text=WEEKDAYS[weekday],
+                               fill="#FFF1DB", font=("Poppins", 10))
+            for hour in range(24):
+                level = intensity[weekday, hour]
+                color = "#%02x%02x%02x" % (int(30 + 89 * level), int(30 + 165 * level), int(40 + 196 * level))
+                x0 = left + hour * cell_w
+                y0 = top + weekday * cell_h
+                canvas.create_rectangle(x0, y0, x0 + cell_w - 2, y0 + cell_h - 2, fill=color, outline="")
+                if matrix[weekday, hour]:
+                    canvas.create_text(x0 + cell_w / 2, y0 + cell_h / 2, text=str(matrix[weekday, hour]),
+                                       fill="#000000" if level > 0.5 else "#FFF1DB", font=("Poppins", 8))
+
+    def fill_revenue_table(self, months, methods, revenue):
+        """
+        Rebuilds the revenue table with one column per payment method.
+        """
+        if self.revenue_table is not None:
+            self.revenue_table.master.destroy()
+        columns = ("month",) + tuple(str(m) for m in methods) + ("total",)
+        self.revenue_table = self.create_table(self.revenue_frame, columns)
+        totals = revenue.sum(axis=1) if revenue.size else np.array([])
+        for i in range(len(months) - 1, -1, -1): # Newest month first
+            row = (str(months[i]),) + tuple(f"{v:.2f}" for v in revenue[i]) + (f"{totals[i]:.2f}",)
+            self.revenue_table.insert(parent='', index='end', values=row)
+        if revenue.size:
+            grand = revenue.sum(axis=0)
+            self.revenue_table.insert(parent='', index='end',
+                                      values=("All",) + tuple(f"{v:.2f}" for v in grand) + (f"{grand.sum():.2f}",))
+
+    def fill_churn_table(self, ids, names, days_since, scores):
+        """
+        Lists the members most at risk of leaving.
+        """
+        self.churn_table.delete(*self.churn_table.get_children())
+        for member_id, name, days, score in zip(ids[:CHURN_ROWS], names[:CHURN_ROWS],
+                                                days_since[:CHURN_ROWS], scores[:CHURN_ROWS]):
+            days_text = "Never" if days >= HISTORY_DAYS else int(days)
+            self.churn_table.insert(parent='', index='end', values=(member_id, name, days_text, f"{score:.2f}"))
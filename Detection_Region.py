@@ -0,0 +1,152 @@
+import logging
+from collections import deque
+
+import App_Config
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+CONFIG_SECTION = "roi"
+DEFAULT_SETTINGS = {
+    'enabled': False,
+    'rect': None,          # [left, top, right, bottom] as fractions of the frame
+    'scale': 0.5,          # Crop downscale (finer than the 0.25 full-frame downscale)
+    'auto_learn': False,   # Learn the region from where faces are found
+}
+LEARN_SAMPLES = 200        # Recent face boxes kept for auto-learning
+MIN_LEARN_SAMPLES = 30     # Faces needed before a learned region is used
+LEARN_MARGIN = 0.10        # Extra border around learned faces (fraction of frame)
+FULL_SCAN_EVERY = 30       # While learning, scan the whole frame every Nth processed frame
+MIN_SIZE = 0.05            # Smallest region accepted from a drag (fraction of frame)
+
+def normalize_rect(x0, y0, x1, y1):
+    """
+    Orders and clips a rectangle given in frame fractions.
+
+    Returns:
+        list: [left, top, right, bottom] within 0-1.
+    """
+    left, right = sorted((min(max(x0, 0.0), 1.0), min(max(x1, 0.0), 1.0)))
+    top, bottom = sorted((min(max(y0, 0.0), 1.0), min(max(y1, 0.0), 1.0)))
+    return [left, top, right, bottom]
+
+class DetectionRegion:
+    """
+    The part of the camera frame where members stand to check in.
+
+    Detection runs on a crop of that region at a finer scale than the
+    whole-frame downscale, which means fewer pixels to search and larger
+    faces for the detector. The region can be set by hand (dragging on
+    the preview) or learned from where faces are usually found.
+    """
+
+    def __init__(self, settings=None):
+        """
+        Args:
+            settings (dict, optional): ROI settings. Defaults to the 'roi' section of config.json.
+        """
+        if settings is None:
+            settings = App_Config.get_section(CONFIG_SECTION, DEFAULT_SETTINGS)
+        self.settings = dict(DEFAULT_SETTINGS, **settings)
+        self.faces = deque(maxlen=LEARN_SAMPLES)
+        self.scans = 0
+
+    @property
+    def rect(self):
+        """The active region as [left, top, right, bottom] fractions, or None."""
+        return self.settings['rect'] if self.settings['enabled'] else None
+
+    def detection_scale(self, full_scale):
+        """
+        The downscale detection runs at: the region's own scale while a
+        region is set, otherwise 'full_scale' (the whole-frame downscale).
+        """
+        return self.settings['scale'] if self.rect is not None else full_scale
+
+    def set_rect(self, x0, y0, x1, y1):
+        """
+        Sets the region from two corners (frame fractions) and enables it.
+
+        Returns:
+            bool: False if the rectangle was too small to be meant as a region.
+        """
+        rect = normalize_rect(x0, y0, x1, y1)
+        if rect[2] - rect[0] < MIN_SIZE or rect[3] - rect[1] < MIN_SIZE:
+            return False
+        self.settings.update(rect=rect, enabled=True)
+        self.faces.clear()
+        logger.info("Detection region set to %s", [round(v, 3) for v in rect])
+        return True
+
+    def clear(self):
+        """Goes back to whole-frame detection (and restarts learning)."""
+        self.settings.update(rect=None, enabled=False)
+        self.faces.clear()
+        logger.info("Detection region cleared.")
+
+    def save(self):
+        """Stores the region in config.json."""
+        App_Config.save_section(CONFIG_SECTION, self.settings)
+
+    def prepare(self, frame, full_scale):
+        """
+        Cuts the image that detection should run on out of a camera frame.
+
+        Args:
+            frame (numpy.ndarray): The full-resolution BGR frame.
+            full_scale (float): Downscale used when the whole frame is searched.
+
+        Returns:
+            tuple: (rgb, transform) where rgb is the image to search and
+                   transform = (x_offset, y_offset, scale) maps its pixels
+                   back to the frame: frame_x = x_offset + x / scale.
+        """
+        rect = self.rect
+        learning = self.settings['auto_learn']
+        self.scans += 1
+        if rect is None or (learning and self.scans % FULL_SCAN_EVERY == 0):
+            small = cv2.resize(frame, (0, 0), fx=full_scale, fy=full_scale)
+            return cv2.cvtColor(small, cv2.COLOR_BGR2RGB), (0, 0, full_scale)
+
+        height, width = frame.shape[:2]
+        left, top = int(rect[0] * width), int(rect[1] * height)
+        right, bottom = max(int(rect[2] * width), left + 1), max(int(rect[3] * height), top + 1)
+        scale = self.settings['scale']
+        crop = cv2.resize(frame[top:bottom, left:right], (0, 0), fx=scale, fy=scale)
+        return cv2.cvtColor(crop, cv2.COLOR_BGR2RGB), (left, top, scale)
+
+    def observe(self, boxes, transform, frame_shape):
+        """
+        Feeds the faces found in a prepared image to auto-learning.
+
+        Args:
+            boxes (list): (top, right, bottom, left) boxes in the prepared image.
+            transform (tuple): The transform returned by prepare().
+            frame_shape (tuple): The full frame's shape.
+        """
+        if not self.settings['auto_learn'] or not boxes:
+            return
+        x_offset, y_offset, scale = transform
+        height, width = frame_shape[:2]
+        for top, right, bottom, left in boxes:
+            self.faces.append(((x_offset + left / scale) / width, (y_offset + top / scale) / height,
+                               (x_offset + right / scale) / width, (y_offset + bottom / scale) / height))
+        if len(self.faces) >= MIN_LEARN_SAMPLES and len(self.faces) % 10 == 0:
+            self._learn()
+
+    def _learn(self):
+        """Fits the region around the recent faces (5th-95th percentile of their edges)."""
+        def edge(index, fraction):
+            values = sorted(face[index] for face in self.faces)
+            return values[min(int(fraction * len(values)), len(values) - 1)]
+
+        rect = normalize_rect(edge(0, 0.05) - LEARN_MARGIN, edge(1, 0.05) - LEARN_MARGIN,
+                              edge(2, 0.95) + LEARN_MARGIN, edge(3, 0.95) + LEARN_MARGIN)
+        if rect != self.settings['rect']:
+            self.settings.update(rect=rect, enabled=True)
+            logger.info("Learned detection region %s from %s faces", [round(v, 3) for v in rect], len(self.faces))
@@ -3,9 +3,14 @@ import customtkinter as ctk
 from CTkMessagebox import CTkMessagebox
 from tkinter import ttk
 import Manage_Data
+import Member_Directory
+import Event_Bus
 import os # Added for file path checking
+import logging
 import sys # Added for safe exit on critical error
 
+logger = logging.getLogger(__name__)
+
 # --- Constants ---
 BUTTON_FONT = ("Poppins", 20)
 LABEL_FONT = ("Poppins", 16)
@@ -31,15 +36,17 @@ class EditData(ctk.CTkToplevel):
         Initializes the EditData window, database connection, and default state.
         """
         super().__init__(parent)
-        print("[INFO] Initializing 'Edit Data' window...")
+        logger.info("Initializing 'Edit Data' window...")
         self.title("Edit Member Data")
         self.geometry("1400x750")
         ctk.set_appearance_mode('dark')
         
         try:
             self.db = Manage_Data.DatabaseManager("GYM.db")
+            self.members = Member_Directory.get_directory(self.db) # Shared member lookup
+            self.bus = Event_Bus.get_bus(self.db) # Row-level change notifications
         except Exception as e:
-            print(f"[CRITICAL] EditData: Failed to load database: {e}")
+            logger.critical("EditData: Failed to load database: %s", e)
             MESSAGE_BOX(title="Critical Error", message=f"Could not load database: {e}", icon="cancel")
             self.destroy()
             return
@@ -51,6 +58,7 @@ class EditData(ctk.CTkToplevel):
 
         self.layout()
         self.refresh_table() # Display the 'Members' table on startup
+        self.bus.subscribe(self.on_change, tables=("Members",)) # Patch rows as members change
 
         # Set a custom close action
         self.protocol("WM_DELETE_WINDOW", self.on_close)
@@ -78,7 +86,7 @@ class EditData(ctk.CTkToplevel):
         """
         Creates and places all widgets for the EditData window.
         """
-        print("[INFO] Building 'Edit Data' layout...")
+        logger.info("Building 'Edit Data' layout...")
         # --- Left Panel (Info Frame) ---
         infoFrame = ctk.CTkScrollableFrame(self, fg_color='transparent')
         
@@ -150,7 +158,7 @@ class EditData(ctk.CTkToplevel):
         Destroys the old table and creates a new one for the 'Members' table.
         Filters by self.person_id if one is selected.
         """
-        print(f"[INFO] Refreshing 'Members' table. User ID: {self.person_id}")
+        logger.info("Refreshing 'Members' table. User ID: %s", self.person_id)
 
         # 1. Destroy the old table frame if it exists
         if self.table_frame:
@@ -168,13 +176,14 @@ class EditData(ctk.CTkToplevel):
         try:
             if self.person_id:
                 # Get data for the single searched member
-                data_to_display = self.db.get_data_by_member_id("Members", self.person_id)
+                records = [self.members.get(self.person_id)]
             else:
                 # Get all members
-                data_to_display = self.db.get_all_from_table("Members")
+                records = self.members
+            data_to_display = [record.to_row() for record in records if record is not None]
         
         except Exception as e:
-            print(f"[ERROR] Failed to fetch data for 'Members' table: {e}")
+            logger.error("Failed to fetch data for 'Members' table: %s", e)
             MESSAGE_BOX(title="Error", message=f"Failed to load member data:\n{e}", icon="cancel")
             return
 
@@ -197,7 +206,7 @@ class EditData(ctk.CTkToplevel):
         self.table.pack(side='left', fill='both', expand=True)
 
         for row in data_to_display:
-            self.table.insert(parent='', index='end', values=row)
+            self.table.insert(parent='', index='end', iid=str(row[0]), values=row)
             
         # 5. Add Scrollbars
         table_scrollbar_y = ttk.Scrollbar(self.table_frame, orient='vertical', command=self.table.yview)
@@ -208,6 +217,19 @@ class EditData(ctk.CTkToplevel):
         self.table.configure(xscrollcommand=table_scrollbar_x.set)
         table_scrollbar_x.pack(side='bottom', fill='x')
 
+    def on_change(self, change):
+        """
+        Event bus subscriber: updates, adds or removes the changed member's
+        row (only the searched member's, while a search is active).
+
+        Args:
+            change (Event_Bus.Change): A change to the Members table.
+        """
+        if self.person_id and str(change.row_id) != str(self.person_id):
+            return
+        if self.table_frame is not None and self.table.winfo_exists():
+            Event_Bus.patch_row(self.table, change, change.row)
+
     def person_photo(self, parent):
         """
         Creates the frame and label for displaying the member's photo.
@@ -221,7 +243,7 @@ class EditData(ctk.CTkToplevel):
             self.default_image = Image.open(DEFAULT_PHOTO)
             self.default_image = self.default_image.resize(image_size, Image.LANCZOS)
         except FileNotFoundError:
-            print(f"[ERROR] Default photo '{DEFAULT_PHOTO}' not found. Creating placeholder.")
+            logger.error("Default photo '%s' not found. Creating placeholder.", DEFAULT_PHOTO)
             self.default_image = Image.new("RGB", image_size, (10, 10, 10))
             
         self.image_person = ctk.CTkImage(self.default_image, size=image_size)
@@ -232,13 +254,13 @@ class EditData(ctk.CTkToplevel):
 
     def reset_photo(self):
         """Resets the image label to the default placeholder."""
-        print("[INFO] Resetting photo to default.")
+        logger.info("Resetting photo to default.")
         if self.default_image:
             self.image_person.configure(dark_image=self.default_image, size=(300, 300))
             
     def clear_search(self):
         """Clears the search fields, resets the photo, and clears the person_id."""
-        print("[INFO] Clearing search fields.")
+        logger.info("Clearing search fields.")
         self.person_id = None
         self.full_name_entry.delete(0, 'end')
         self.dob_entry.delete(0, 'end')
@@ -251,7 +273,7 @@ class EditData(ctk.CTkToplevel):
         Searches for a member using the form fields.
         If found, sets self.person_id and refreshes the table.
         """
-        print("[INFO] Searching for user...")
+        logger.info("Searching for user...")
         name = self.full_name_entry.get().strip().title()
         dob = self.dob_entry.get().strip()
         phone = self.phone_entry.get().strip()
@@ -265,12 +287,11 @@ class EditData(ctk.CTkToplevel):
             return
             
         try:
-            # Use the new secure function
-            member_data = self.db.get_member_by_details(name, dob, phone)
+            member = self.members.find(name, dob, phone)
             
-            if member_data:
-                self.person_id = member_data[0] # member_data[0] is the 'id'
-                print(f"[INFO] Member found with ID: {self.person_id}")
+            if member:
+                self.person_id = member.id
+                logger.info("Member found with ID: %s", self.person_id)
                 
                 # --- Load Member Photo (Safely) ---
                 image_path = os.path.join(PHOTO_DIR, f"{self.person_id}.jpg")
@@ -278,19 +299,19 @@ class EditData(ctk.CTkToplevel):
                     new_image = Image.open(image_path)
                     new_image = new_image.resize((300, 300), Image.LANCZOS)
                     self.image_person.configure(dark_image=new_image, size=(300, 300))
-                    print(f"[INFO] Loaded photo: {image_path}")
+                    logger.info("Loaded photo: %s", image_path)
                 except FileNotFoundError:
-                    print(f"[WARN] Photo not found for member ID {self.person_id} at {image_path}")
+                    logger.warning("Photo not found for member ID %s at %s", self.person_id, image_path)
                     self.reset_photo()
                     MESSAGE_BOX(title="Info", message="Member found, but no photo exists.", icon="info")
                 
             else:
-                print("[WARN] No matching member found.")
+                logger.warning("No matching member found.")
                 self.clear_search()
                 MESSAGE_BOX(title="Error", message="No matching member found", icon="cancel")
         
         except Exception as e:
-            print(f"[ERROR] Error during user search: {e}")
+            logger.error("Error during user search: %s", e)
             self.clear_search()
             MESSAGE_BOX(title="Error", message=f"An error occurred: {e}", icon="cancel")
             
@@ -302,7 +323,7 @@ class EditData(ctk.CTkToplevel):
         Deletes the currently searched member after confirmation.
         Offers 'Minimal' (sets status to 'Closed') or 'Full' (deletes all data).
         """
-        print("[INFO] 'Delete' button clicked.")
+        logger.info("'Delete' button clicked.")
         # 1. Check if a user is selected
         if self.person_id is None:
             MESSAGE_BOX(title="Error", message="Please search for a member to delete first.", icon="cancel")
@@ -314,7 +335,7 @@ class EditData(ctk.CTkToplevel):
                                   icon="question", option_1="YES", option_2="NO")
         
         if confirm_box.get() == "YES":
-            print(f"[INFO] User confirmed first delete prompt for ID: {self.person_id}")
+            logger.info("User confirmed first delete prompt for ID: %s", self.person_id)
             # 3. Second confirmation (Minimal vs. Full)
             delete_type_box = MESSAGE_BOX(title="Delete Type",
                                           message="Choose delete method:\n\nMinimal: Sets member status to 'Closed'.\nFully: Deletes member and all related attendance/payment data.",
@@ -324,35 +345,36 @@ class EditData(ctk.CTkToplevel):
 
             try:
                 if delete_type == "Fully Delete":
-                    print(f"[WARN] Performing FULL DELETE for member ID: {self.person_id}")
+                    logger.warning("Performing FULL DELETE for member ID: %s", self.person_id)
                     # Uses cascading delete setup in DB
                     self.db.fully_delete_member(self.person_id)
                     MESSAGE_BOX(title="Success", message="Member fully deleted.", icon="check")
                 
                 elif delete_type == "Minimal Delete":
-                    print(f"[INFO] Performing MINIMAL DELETE for member ID: {self.person_id}")
+                    logger.info("Performing MINIMAL DELETE for member ID: %s", self.person_id)
                     self.db.minimal_delete_member(self.person_id)
                     MESSAGE_BOX(title="Success", message="Member status set to 'Closed'.", icon="check")
                 
                 else:
-                    print("[INFO] Delete action cancelled.")
+                    logger.info("Delete action cancelled.")
                     return
+                self.bus.poll(self.db) # Update the member directory and other windows
 
                 # If delete was successful, clear the search and refresh the table
                 self.clear_search()
                 self.refresh_table()
 
             except Exception as e:
-                print(f"[ERROR] Failed to delete member ID {self.person_id}: {e}")
+                logger.error("Failed to delete member ID %s: %s", self.person_id, e)
                 MESSAGE_BOX(title="Error", message=f"Failed to delete member:\n{e}", icon="cancel")
         else:
-            print("[INFO] Delete action cancelled by user.")
+            logger.info("Delete action cancelled by user.")
 
     def edit_user(self):
         """
         Updates a single field for the currently searched member.
         """
-        print("[INFO] 'Save Edit' button clicked.")
+        logger.info("'Save Edit' button clicked.")
         # 1. Check if a user is selected
         if self.person_id is None:
             MESSAGE_BOX(title="Error", message="Please search for a member to edit first.", icon="cancel")
@@ -374,7 +396,7 @@ class EditData(ctk.CTkToplevel):
             MESSAGE_BOX(title="Error", message="Gender must be 'Male' or 'Female'.", icon="cancel")
             return
             
-        print(f"[INFO] Attempting to update member ID {self.person_id}, field '{field_to_edit}' to '{new_value}'")
+        logger.info("Attempting to update member ID %s, field '%s' to '%s'", self.person_id, field_to_edit, new_value)
         try:
             # 4. Call the secure database function
             self.db.update_field_by_id(
@@ -383,16 +405,17 @@ class EditData(ctk.CTkToplevel):
                 field_name=field_to_edit,
                 new_data=new_value
             )
+            # Patches this table, the member directory and other open windows
+            self.bus.poll(self.db)
             
             MESSAGE_BOX(title="Success", message=f"Member data updated successfully.", icon="check")
             
-            # 5. Clear the entry field and refresh the table
+            # 5. Clear the entry field
             self.fieldentry.delete(0, 'end')
-            self.refresh_table()
             
             
         except Exception as e:
-            print(f"[ERROR] Failed to update member ID {self.person_id}: {e}")
+            logger.error("Failed to update member ID %s: %s", self.person_id, e)
             MESSAGE_BOX(title="Error", message=f"Failed to update data:\n{e}", icon="cancel")
 
     def on_close(self):
@@ -400,9 +423,10 @@ class EditData(ctk.CTkToplevel):
         Handles the window 'X' button click.
         Safely closes the database connection.
         """
-        print("[INFO] 'Edit Data' window closing...")
+        logger.info("'Edit Data' window closing...")
+        self.bus.unsubscribe(self.on_change)
         try:
             self.db.close_connection()
         except Exception as e:
-            print(f"[ERROR] Error closing DB connection: {e}")
+            logger.error("Error closing DB connection: %s", e)
         self.destroy() # Close the Toplevel window
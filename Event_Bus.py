@@ -0,0 +1,162 @@
+import logging
+import threading
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+POLL_INTERVAL_MS = 1000 # How often the app reads new changes from the change log
+
+# One row-level change read from the ChangeLog table. 'row' is the row as
+# it is now (a 'SELECT *' tuple), or None after a delete.
+Change = namedtuple('Change', 'seq table_name action row_id member_id row')
+
+class EventBus:
+    """
+    Publishes row-level changes (insert, update, delete on Members,
+    Attendance and Payment) to subscribers inside the app.
+
+    Changes are not published by the code that writes them: triggers
+    record every write in the ChangeLog table and poll() reads the new
+    entries. So writes from this window, another window, the kiosk or the
+    API server all arrive the same way, in commit order.
+
+    Callbacks run on the thread that calls poll(); the app polls from the
+    Tk event loop, so subscribers may update widgets directly.
+    """
+
+    def __init__(self, last_seq=0):
+        """
+        Args:
+            last_seq (int): Changes up to this sequence number are not published.
+        """
+        self.last_seq = last_seq
+        self._subscribers = []
+        self._lock = threading.RLock()
+
+    def subscribe(self, callback, tables=None):
+        """
+        Registers callback(change) for changes to the given tables (all if None).
+        """
+        with self._lock:
+            self.unsubscribe(callback)
+            self._subscribers.append((callback, set(tables) if tables else None))
+
+    def unsubscribe(self, callback):
+        """
+        Removes a callback registered with subscribe().
+        """
+        with self._lock:
+            self._subscribers = [entry for entry in self._subscribers if entry[0] != callback]
+
+    def publish(self, change):
+        """
+        Calls every subscriber of the change's table, logging (not raising) their errors.
+        """
+        with self._lock:
+            subscribers = [callback for callback, tables in self._subscribers
+                           if tables is None or change.table_name in tables]
+        for callback in subscribers:
+            try:
+                callback(change)
+            except Exception as e:
+                logger.error("Change subscriber failed on %s %s #%s: %s",
+                             change.action, change.table_name, change.row_id, e)
+
+    def poll(self, db):
+        """
+        Reads the changes committed since the last poll and publishes them.
+        Call it right after a write to update other windows at once, or
+        periodically to pick up writes from other processes.
+
+        Args:
+            db (DatabaseManager): An open connection to the database.
+
+        Returns:
+            int: The number of changes published.
+        """
+        published = 0
+        with self._lock:
+            while True:
+                entries = db.get_changes(self.last_seq)
+                if not entries:
+                    break
+
+                # 1. Fetch the current rows of everything that was not deleted
+                wanted = {}
+                for _, table_name, action, row_id, _ in entries:
+                    if action != 'DELETE':
+                        wanted.setdefault(table_name, set()).add(row_id)
+                rows = {table_name: db.get_rows_by_ids(table_name, row_ids)
+                        for table_name, row_ids in wanted.items()}
+
+                # 2. Publish in commit order
+                for seq, table_name, action, row_id, member_id in entries:
+                    row = None if action == 'DELETE' else rows[table_name].get(row_id)
+                    self.last_seq = seq
+                    self.publish(Change(seq, table_name, action, row_id, member_id, row))
+                    published += 1
+        if published:
+            logger.debug("Published %s changes (up to #%s).", published, self.last_seq)
+        return published
+
+def patch_row(table, change, values):
+    """
+    Applies one change to a ttk.Treeview whose item ids are the row ids:
+    the row is updated in place, appended, or deleted, instead of the
+    whole table being rebuilt.
+
+    Args:
+        table (ttk.Treeview): The table to patch.
+        change (Change): The change.
+        values (tuple): The row as displayed, or None to remove it.
+    """
+    iid = str(change.row_id)
+    if values is None:
+        if table.exists(iid):
+            table.delete(iid)
+    elif table.exists(iid):
+        table.item(iid, values=values)
+    else:
+        table.insert(parent='', index='end', iid=iid, values=values)
+
+def patch_member_name(table, change, member_column=1, name_column=2):
+    """
+    Applies a Members change to a Treeview of Attendance or Payment rows
+    that shows each member's name: rows of a renamed member get the new name.
+
+    Args:
+        table (ttk.Treeview): The table to patch.
+        change (Change): A change to the Members table.
+        member_column (int): Index of the member id in the displayed values.
+        name_column (int): Index of the name in the displayed values.
+    """
+    if change.row is None:
+        return
+    member_id, full_name = str(change.row_id), change.row[1]
+    for iid in table.get_children():
+        values = list(table.item(iid, 'values'))
+        if str(values[member_column]) == member_id and values[name_column] != full_name:
+            values[name_column] = full_name
+            table.item(iid, values=values)
+
+# --- Shared buses ---
+_buses = {}
+_buses_lock = threading.Lock()
+
+def get_bus(db):
+    """
+    Returns the shared event bus for db's database file. A new bus starts
+    at the current end of the change log, so history is not replayed.
+
+    Args:
+        db (DatabaseManager): Used to find the current change log position.
+
+    Returns:
+        EventBus: The process-wide bus of that database.
+    """
+    with _buses_lock:
+        bus = _buses.get(db.db_name)
+        if bus is None:
+            bus = _buses[db.db_name] = EventBus(db.get_last_change_seq())
+    return bus
@@ -0,0 +1,123 @@
+import csv
+import json
+import logging
+import os
+
+try:
+    # Optional: only needed for Parquet exports
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+EXPORT_FORMATS = ("csv", "jsonl", "parquet")
+BATCH_SIZE = 1000
+
+def detect_format(path):
+    """
+    Guesses the export format from a file extension.
+
+    Args:
+        path (str): The output file path.
+
+    Returns:
+        str: One of EXPORT_FORMATS ('csv' when the extension is unknown).
+    """
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    if extension in ("jsonl", "ndjson"):
+        return "jsonl"
+    if extension in ("parquet", "pq"):
+        return "parquet"
+    return "csv"
+
+def _arrow_schema(columns):
+    """
+    Maps SQLite declared column types to a pyarrow schema.
+    """
+    fields = []
+    for name, declared in columns:
+        declared = (declared or "").upper()
+        if "INT" in declared:
+            fields.append(pa.field(name, pa.int64()))
+        elif "REAL" in declared or "FLOA" in declared or "DOUB" in declared:
+            fields.append(pa.field(name, pa.float64()))
+        else:
+            fields.append(pa.field(name, pa.string()))
+    return pa.schema(fields)
+
+def export_table(db, table_name, path, fmt=None, start_day=None, end_day=None,
+                 member_id=None, batch_size=BATCH_SIZE, progress=None, include_archive=True):
+    """
+    Streams a table from the database into a CSV, JSON Lines or Parquet file.
+    Rows are read with fetchmany and written batch by batch, so memory use
+    does not grow with the size of the table.
+
+    Args:
+        db (DatabaseManager): An open database manager.
+        table_name (str): The table to export (must be in ALLOWED_TABLES).
+        path (str): The output file path.
+        fmt (str, optional): 'csv', 'jsonl' or 'parquet'. Guessed from path if None.
+        start_day (str, optional): First ISO day to include.
+        end_day (str, optional): Last ISO day to include.
+        member_id (int, optional): Only export rows for this member.
+        batch_size (int): Rows per batch.
+        progress (callable, optional): Called as progress(rows_done, rows_total).
+        include_archive (bool): Include archived check-ins when exporting Attendance.
+
+    Returns:
+        int: The number of rows written.
+
+    Raises:
+        ValueError: If the table or format is not supported.
+        RuntimeError: If Parquet is requested but pyarrow is not installed.
+    """
+    fmt = fmt or detect_format(path)
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    if fmt == "parquet" and pa is None:
+        raise RuntimeError("Parquet export needs the 'pyarrow' package (pip install pyarrow).")
+
+    columns = db.get_table_columns(table_name)
+    if not columns:
+        raise ValueError(f"Cannot export table: {table_name}")
+    names = [name for name, _ in columns]
+
+    total = db.count_rows(table_name, start_day, end_day, member_id, include_archive=include_archive)
+    logger.info("Exporting %s rows from '%s' to %s (%s)", total, table_name, path, fmt)
+    batches = db.stream_rows(table_name, start_day, end_day, member_id, batch_size, include_archive=include_archive)
+    done = 0
+    if progress:
+        progress(done, total)
+
+    if fmt == "parquet":
+        schema = _arrow_schema(columns)
+        writer = pq.ParquetWriter(path, schema)
+        try:
+            for batch in batches:
+                arrays = [pa.array(column, type=field.type) for column, field in zip(zip(*batch), schema)]
+                writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+                done += len(batch)
+                if progress:
+                    progress(done, total)
+        finally:
+            writer.close()
+    else:
+        with open(path, 'w', newline='', encoding='utf-8') as file:
+            if fmt == "csv":
+                writer = csv.writer(file)
+                writer.writerow(names)
+            for batch in batches:
+                if fmt == "csv":
+                    writer.writerows(batch)
+                else:
+                    file.writelines(json.dumps(dict(zip(names, row))) + "\n" for row in batch)
+                done += len(batch)
+                if progress:
+                    progress(done, total)
+
+    logger.info("Exported %s rows to %s", done, path)
+    return done
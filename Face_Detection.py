@@ -0,0 +1,262 @@
+import logging
+import os
+import statistics
+import time
+from datetime import datetime
+
+import App_Config
+import Face_Encoding
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+try:
+    import face_recognition
+except ImportError:
+    face_recognition = None
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+DETECTORS = ("hog", "haar", "yunet", "dnn")
+CONFIG_SECTION = "detector"
+DEFAULT_SETTINGS = {
+    'name': 'hog',          # Used until a calibration has run
+    'scale': 0.25,          # Frame downscale before detection
+    'confidence': 0.6,      # Minimum score for the YuNet/DNN detectors
+    'yunet_model': os.path.join("models", "face_detection_yunet_2023mar.onnx"),
+    'dnn_config': os.path.join("models", "deploy.prototxt"),
+    'dnn_model': os.path.join("models", "res10_300x300_ssd_iter_140000.caffemodel"),
+    'calibrated': None,     # When calibration last ran (also after a failed attempt)
+    'calibrated_scale': None,
+}
+HAAR_CASCADE = "haarcascade_frontalface_default.xml"
+CALIBRATION_WIDTH = 640     # Photos are resized to a webcam-sized frame before downscaling
+MIN_ACCURACY = 0.95         # Share of enrolled photos a detector must get right
+MATCH_TOLERANCE = 0.6       # face_recognition.compare_faces default
+
+class FaceDetector:
+    """
+    Locates faces for dlib encoding with one of several CPU detectors:
+    'hog' (dlib, the face_recognition default), 'haar' (OpenCV cascade,
+    fastest), 'yunet' (OpenCV FaceDetectorYN) or 'dnn' (OpenCV res10 SSD).
+    The last two need model files (paths in the 'detector' settings).
+
+    Boxes are always returned as face_recognition's (top, right, bottom, left).
+    """
+
+    def __init__(self, name='hog', settings=None):
+        """
+        Args:
+            name (str): One of DETECTORS.
+            settings (dict, optional): Detector settings (see DEFAULT_SETTINGS).
+
+        Raises:
+            ValueError: If the detector is unknown or cannot be loaded here.
+        """
+        if name not in DETECTORS:
+            raise ValueError(f"Unknown face detector: {name}")
+        self.name = name
+        self.settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+        self.scale = self.settings['scale']
+        self._model = None
+        self._input_size = None
+
+        if name != 'hog' and cv2 is None:
+            raise ValueError(f"The '{name}' detector needs OpenCV.")
+        if name == 'haar':
+            self._model = cv2.CascadeClassifier(os.path.join(cv2.data.haarcascades, HAAR_CASCADE))
+            if self._model.empty():
+                raise ValueError("Could not load the Haar cascade.")
+        elif name == 'yunet':
+            path = self.settings['yunet_model']
+            if not hasattr(cv2, 'FaceDetectorYN') or not os.path.exists(path):
+                raise ValueError(f"YuNet needs OpenCV >= 4.5.4 and the model file {path}")
+            self._model = cv2.FaceDetectorYN.create(path, "", (320, 320), self.settings['confidence'])
+        elif name == 'dnn':
+            config, model = self.settings['dnn_config'], self.settings['dnn_model']
+            if not (os.path.exists(config) and os.path.exists(model)):
+                raise ValueError(f"The DNN detector needs {config} and {model}")
+            self._model = cv2.dnn.readNetFromCaffe(config, model)
+
+    def locate(self, rgb):
+        """
+        Finds faces in an RGB image.
+
+        Args:
+            rgb (numpy.ndarray): The (already downscaled) RGB image.
+
+        Returns:
+            list: (top, right, bottom, left) boxes in the image's coordinates.
+        """
+        height, width = rgb.shape[:2]
+        if self.name == 'hog':
+            return face_recognition.face_locations(rgb, model='hog')
+
+        if self.name == 'haar':
+            gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
+            faces = self._model.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(20, 20))
+            return [(int(y), int(x + w), int(y + h), int(x)) for (x, y, w, h) in faces]
+
+        if self.name == 'yunet':
+            if self._input_size != (width, height):
+                self._model.setInputSize((width, height))
+                self._input_size = (width, height)
+            _, faces = self._model.detect(cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR))
+            boxes = []
+            for face in faces if faces is not None else []:
+                x, y, w, h = (int(v) for v in face[:4])
+                boxes.append(self._clip(y, x + w, y + h, x, width, height))
+            return boxes
+
+        # 'dnn': res10 SSD expects a 300x300 BGR blob
+        blob = cv2.dnn.blobFromImage(cv2.resize(rgb, (300, 300)), 1.0, (300, 300),
+                                     (123.0, 177.0, 104.0), swapRB=True)
+        self._model.setInput(blob)
+        detections = self._model.forward()
+        boxes = []
+        for detection in detections[0, 0]:
+            if detection[2] < self.settings['confidence']:
+                continue
+            left, top, right, bottom = (detection[3:7] * [width, height, width, height]).astype(int)
+            boxes.append(self._clip(top, right, bottom, left, width, height))
+        return boxes
+
+    @staticmethod
+    def _clip(top, right, bottom, left, width, height):
+        """Keeps a box inside the image (dlib rejects boxes past the edge)."""
+        return (max(int(top), 0), min(int(right), width - 1), min(int(bottom), height - 1), max(int(left), 0))
+
+def load_settings():
+    """
+    Returns the detector settings from config.json (with defaults).
+    """
+    return App_Config.get_section(CONFIG_SECTION, DEFAULT_SETTINGS)
+
+def load_detector():
+    """
+    Builds the configured detector, falling back to HOG if it
+    cannot be loaded on this machine (e.g. a model file was removed).
+
+    Returns:
+        FaceDetector: The detector to use for live recognition.
+    """
+    settings = load_settings()
+    try:
+        return FaceDetector(settings['name'], settings)
+    except ValueError as e:
+        logger.warning("Configured detector unavailable (%s); using HOG.", e)
+        return FaceDetector('hog', settings)
+
+def needs_calibration(scale):
+    """
+    True if calibration has not run yet at this detection scale. A failed
+    attempt counts as having run, so it is not retried on every start.
+    """
+    settings = load_settings()
+    return not settings.get('calibrated') or settings.get('calibrated_scale') != scale
+
+def save_failed_calibration(scale, error):
+    """
+    Records a failed calibration in config.json. The configured detector
+    is kept; 'Gym_Tools.py calibrate-detector' can be run again later.
+    """
+    settings = load_settings()
+    settings.update(calibrated=datetime.now().isoformat(timespec='seconds'), calibrated_scale=scale,
+                    calibration_error=str(error))
+    App_Config.save_section(CONFIG_SECTION, settings)
+
+def calibration_frame(image, scale):
+    """
+    Resizes an enrolled photo to webcam width, then applies the live
+    downscale, so the detector sees faces at the size it will in use.
+    """
+    height, width = image.shape[:2]
+    frame_scale = CALIBRATION_WIDTH / float(width)
+    return cv2.resize(image, (0, 0), fx=frame_scale * scale, fy=frame_scale * scale)
+
+def calibrate(photo_dir, candidates=DETECTORS, min_accuracy=MIN_ACCURACY, save=True, scale=None):
+    """
+    Benchmarks each available detector on the enrolled photos and picks
+    the fastest one that is accurate enough.
+
+    A photo counts as correct when the detector finds a face whose dlib
+    encoding matches the photo's reference encoding (HOG at full size,
+    enrollment profile), so a detector is only chosen if its boxes also
+    encode well.
+
+    Args:
+        photo_dir (str): The enrolled photos ('Members Photo').
+        candidates (tuple): Detector names to try.
+        min_accuracy (float): Required share of correct photos (0-1).
+        save (bool): Store the choice in config.json.
+        scale (float, optional): Detection downscale to test at (the region's
+                                 scale when a detection region is set).
+                                 Defaults to the detector's whole-frame scale.
+
+    Returns:
+        dict: {'name': chosen detector, 'results': {name: {'accuracy', 'median_ms'}}}
+
+    Raises:
+        RuntimeError: If OpenCV/face_recognition are missing or there are no usable photos.
+    """
+    if cv2 is None or face_recognition is None:
+        raise RuntimeError("Calibration needs OpenCV and face_recognition.")
+    settings = load_settings()
+    if scale is None:
+        scale = settings['scale']
+    enrollment = Face_Encoding.get_profile('enrollment')
+    live = Face_Encoding.get_profile('live')
+
+    # 1. Reference encodings from full-size photos
+    samples = []
+    for file in sorted(os.listdir(photo_dir)):
+        if not file.lower().endswith(('.jpg', '.jpeg', '.png')):
+            continue
+        image = cv2.imread(os.path.join(photo_dir, file))
+        if image is None:
+            continue
+        rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        reference = face_recognition.face_encodings(rgb, num_jitters=enrollment['num_jitters'],
+                                                    model=enrollment['model'])
+        if reference:
+            samples.append((calibration_frame(rgb, scale), reference[0]))
+    if not samples:
+        raise RuntimeError(f"No usable face photos in {photo_dir}")
+    logger.info("Calibrating face detectors on %s photos...", len(samples))
+
+    # 2. Time and score each detector
+    results = {}
+    for name in candidates:
+        try:
+            detector = FaceDetector(name, settings)
+        except ValueError as e:
+            logger.info("Skipping detector '%s': %s", name, e)
+            continue
+        timings = []
+        correct = 0
+        for frame, reference in samples:
+            started = time.perf_counter()
+            boxes = detector.locate(frame)
+            timings.append((time.perf_counter() - started) * 1000.0)
+            if boxes:
+                encodings = Face_Encoding.encode_faces(frame, boxes, live)
+                if any(face_recognition.face_distance([reference], e)[0] <= MATCH_TOLERANCE for e in encodings):
+                    correct += 1
+        results[name] = {'accuracy': correct / len(samples), 'median_ms': statistics.median(timings)}
+        logger.info("Detector %-5s accuracy %.0f%%  median %.1f ms", name,
+                    results[name]['accuracy'] * 100, results[name]['median_ms'])
+
+    # 3. Fastest detector that is accurate enough (HOG if none is)
+    accurate = [name for name, r in results.items() if r['accuracy'] >= min_accuracy]
+    chosen = min(accurate, key=lambda n: results[n]['median_ms']) if accurate else 'hog'
+    logger.info("Selected face detector: %s", chosen)
+
+    if save:
+        settings.update(name=chosen, calibrated=datetime.now().isoformat(timespec='seconds'),
+                        calibrated_scale=scale, results=results, min_accuracy=min_accuracy)
+        settings.pop('calibration_error', None)
+        App_Config.save_section(CONFIG_SECTION, settings)
+    return {'name': chosen, 'results': results}
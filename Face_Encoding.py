@@ -0,0 +1,63 @@
+import logging
+
+import App_Config
+
+try:
+    import face_recognition
+except ImportError:
+    face_recognition = None
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+CONFIG_SECTION = "encoding"
+# num_jitters: how many randomly distorted copies of the face are encoded and averaged.
+# model: 'large' = 68-point landmarks, 'small' = 5-point (faster alignment).
+DEFAULT_PROFILES = {
+    'enrollment': {'num_jitters': 10, 'model': 'large'}, # Once per photo: favour accuracy
+    'live': {'num_jitters': 1, 'model': 'small'},        # Every processed frame: favour speed
+}
+LANDMARK_MODELS = ("small", "large")
+
+def get_profile(name):
+    """
+    Returns the encoding settings for a call site. Defaults can be
+    overridden per machine in the 'encoding' section of config.json,
+    e.g. {"encoding": {"live": {"num_jitters": 2}}}.
+
+    Args:
+        name (str): 'enrollment' or 'live'.
+
+    Returns:
+        dict: {'num_jitters': int, 'model': 'small' | 'large'}
+
+    Raises:
+        ValueError: If the profile is unknown or misconfigured.
+    """
+    if name not in DEFAULT_PROFILES:
+        raise ValueError(f"Unknown encoding profile: {name}")
+    profile = dict(DEFAULT_PROFILES[name])
+    profile.update(App_Config.get_section(CONFIG_SECTION).get(name, {}))
+    if profile['model'] not in LANDMARK_MODELS or int(profile['num_jitters']) < 1:
+        raise ValueError(f"Invalid '{name}' encoding profile: {profile}")
+    profile['num_jitters'] = int(profile['num_jitters'])
+    return profile
+
+def encode_faces(rgb, boxes, profile='live'):
+    """
+    Computes 128-d dlib encodings for already located faces.
+
+    Args:
+        rgb (numpy.ndarray): The RGB image.
+        boxes (list): (top, right, bottom, left) face boxes in that image.
+        profile (str or dict): A profile name or explicit settings.
+
+    Returns:
+        list: One encoding per box.
+    """
+    if not boxes:
+        return []
+    settings = get_profile(profile) if isinstance(profile, str) else profile
+    return face_recognition.face_encodings(rgb, known_face_locations=boxes,
+                                           num_jitters=settings['num_jitters'],
+                                           model=settings['model'])
@@ -0,0 +1,65 @@
+import logging
+
+try:
+    import cv2
+    import numpy as np
+    from PIL import Image, ImageTk
+except ImportError:
+    cv2 = None
+    np = None
+    Image = None
+    ImageTk = None
+
+logger = logging.getLogger(__name__)
+
+class FrameRenderer:
+    """
+    Shows camera frames in a Tk label without allocating per frame.
+
+    The resize and color conversion write into buffers allocated once,
+    a PIL image shares the color buffer's memory (Image.frombuffer maps
+    4-byte 'RGBX' pixels without copying, unlike 'RGB'), and a single
+    PhotoImage is updated in place with paste(). The label keeps pointing
+    at that PhotoImage, so Tk just redraws it.
+    """
+
+    def __init__(self, label, width, height):
+        """
+        Args:
+            label (ctk.CTkLabel): The label that shows the preview.
+            width (int): Preview width in pixels.
+            height (int): Preview height in pixels.
+        """
+        self.label = label
+        self.size = (width, height)
+        self._resized = np.empty((height, width, 3), dtype=np.uint8) # BGR, display size
+        self._rgb = np.empty((height, width, 4), dtype=np.uint8)     # RGBX, shared with _image
+        self._image = Image.frombuffer('RGBX', self.size, self._rgb, 'raw', 'RGBX', 0, 1)
+        self._photo = ImageTk.PhotoImage(image=self._image)
+        self._attached = False
+
+    def render(self, frame, draw=None):
+        """
+        Displays one BGR frame.
+
+        Args:
+            frame (numpy.ndarray): The BGR frame (any size).
+            draw (callable, optional): Called with the display buffer (RGB plus a
+                                       padding byte) to draw overlays in place.
+        """
+        cv2.resize(frame, self.size, dst=self._resized)
+        cv2.cvtColor(self._resized, cv2.COLOR_BGR2RGBA, dst=self._rgb)
+        if draw is not None:
+            draw(self._rgb)
+        self._photo.paste(self._image)
+        if not self._attached:
+            self.label.configure(image=self._photo, text="")
+            self.label.image = self._photo # Keep a reference
+            self._attached = True
+
+    def clear(self, text=""):
+        """
+        Detaches the preview from the label and shows a text instead.
+        """
+        self.label.configure(image=None, text=text)
+        self._attached = False
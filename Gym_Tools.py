@@ -0,0 +1,437 @@
+import argparse
+import logging
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from Manage_Data import DatabaseManager, ALLOWED_TABLES, ARCHIVE_AGE_DAYS, to_iso_day
+import App_Config
+import Export_Data
+import Import_Members
+import Face_Detection
+import Detection_Region
+import Backup_Manager
+import Branch_Sync
+import App_Logging
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+DEFAULT_DB = "GYM.db"
+
+def rebuild_rollups(args):
+    """
+    Rebuilds the attendance reporting rollups from the full Attendance history.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+
+    Returns:
+        int: The process exit code.
+    """
+    db = DatabaseManager(args.db)
+    try:
+        return 0 if db.rebuild_attendance_rollups() else 1
+    finally:
+        db.close_connection()
+
+def archive_attendance(args):
+    """
+    Moves old check-ins out of the hot Attendance table into the per-year
+    tables of the archive database.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+
+    Returns:
+        int: The process exit code.
+    """
+    days = args.older_than_days
+    if days is None:
+        days = App_Config.get_section("archive", {'older_than_days': ARCHIVE_AGE_DAYS})['older_than_days']
+    db = DatabaseManager(args.db)
+    try:
+        moved = db.archive_attendance(days)
+        if moved is None:
+            return 1
+        for year, rows in sorted(moved.items()):
+            print(f"{year}: {rows} check-ins archived")
+        print(f"Total: {sum(moved.values())} check-ins moved to {db.archive_name}")
+        return 0
+    finally:
+        db.close_connection()
+
+def reconcile_payments(args):
+    """
+    Checks the payment ledger against every payment and (unless
+    --check-only) rebuilds it if they differ.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+
+    Returns:
+        int: The process exit code (1 if the check failed, or found differences with --check-only).
+    """
+    db = DatabaseManager(args.db)
+    try:
+        differences = db.reconcile_payment_ledger(repair=not args.check_only)
+    finally:
+        db.close_connection()
+    if differences is None:
+        return 1
+    for kind, key, recorded, expected in differences:
+        print(f"{kind} {key}: ledger {recorded[0]} payments / {recorded[1]:.2f}, "
+              f"actual {expected[0]} payments / {expected[1]:.2f}")
+    if not differences:
+        print("Payment ledger matches the payments.")
+        return 0
+    print(f"{len(differences)} difference(s) " + ("found." if args.check_only else "found; ledger rebuilt."))
+    return 1 if args.check_only else 0
+
+def list_plans(args):
+    """
+    Prints the membership plans and the renewals due in the next --days days.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+
+    Returns:
+        int: The process exit code.
+    """
+    today = datetime.now()
+    db = DatabaseManager(args.db)
+    try:
+        plans = db.get_membership_plans()
+        renewals = {row[0]: row for row in db.get_expected_renewals(
+            today.strftime('%Y-%m-%d'), (today + timedelta(days=args.days)).strftime('%Y-%m-%d'))}
+    finally:
+        db.close_connection()
+    for name, duration_days, price, grace_days in plans:
+        members, expected = renewals[name][2:4] if name in renewals else (0, 0.0)
+        print(f"{name}: {duration_days} days, {price:.2f}, {grace_days} grace days; "
+              f"{members} renewals due ({expected:.2f})")
+    return 0
+
+def set_plan(args):
+    """
+    Adds a membership plan or changes an existing one.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+
+    Returns:
+        int: The process exit code.
+    """
+    if args.days < 1 or args.price < 0 or args.grace < 0:
+        logger.error("Days must be 1 or more; price and grace days cannot be negative.")
+        return 1
+    db = DatabaseManager(args.db)
+    try:
+        return 0 if db.save_membership_plan(args.name, args.days, args.price, args.grace) else 1
+    finally:
+        db.close_connection()
+
+def expire_memberships(args):
+    """
+    Marks members whose membership (plus grace period) has ended as 'UNPAID'.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+
+    Returns:
+        int: The process exit code.
+    """
+    db = DatabaseManager(args.db)
+    try:
+        print(f"{db.expire_memberships()} members marked UNPAID")
+        return 0
+    finally:
+        db.close_connection()
+
+def export(args):
+    """
+    Streams a table (optionally a date range) to a CSV, JSON Lines or Parquet file.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+
+    Returns:
+        int: The process exit code.
+    """
+    try:
+        start_day = to_iso_day(args.start) if args.start else None
+        end_day = to_iso_day(args.end) if args.end else None
+    except ValueError:
+        logger.error("--from and --to must be dates in DD-MM-YYYY format.")
+        return 1
+
+    def on_progress(done, total):
+        print(f"\r[INFO] {done}/{total} rows", end="", file=sys.stderr)
+
+    db = DatabaseManager(args.db)
+    try:
+        Export_Data.export_table(db, args.table, args.out, fmt=args.format,
+                                 start_day=start_day, end_day=end_day, progress=on_progress)
+        print(file=sys.stderr)
+        return 0
+    except (ValueError, RuntimeError) as e:
+        logger.error("Export failed: %s", e)
+        return 1
+    finally:
+        db.close_connection()
+
+def import_members(args):
+    """
+    Bulk-imports members from a CSV file, optionally linking photos from a folder.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+
+    Returns:
+        int: The process exit code (1 if the import failed or any row was rejected).
+    """
+    db = DatabaseManager(args.db)
+    try:
+        report = Import_Members.import_members_csv(db, args.csv, args.photos)
+        print(Import_Members.format_report(report))
+        return 1 if report['error'] or report['invalid'] or report['duplicates'] else 0
+    finally:
+        db.close_connection()
+
+def calibrate_detector(args):
+    """
+    Benchmarks the face detectors on the enrolled photos and stores the
+    fastest accurate one in config.json for Mark Attendance to use.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+
+    Returns:
+        int: The process exit code.
+    """
+    try:
+        scale = Detection_Region.DetectionRegion().detection_scale(Face_Detection.load_settings()['scale'])
+        result = Face_Detection.calibrate(args.photos, min_accuracy=args.min_accuracy, scale=scale)
+    except (RuntimeError, OSError) as e:
+        logger.error("Calibration failed: %s", e)
+        return 1
+    for name, stats in result['results'].items():
+        print(f"{name:<6} accuracy {stats['accuracy']:6.1%}  median {stats['median_ms']:7.1f} ms")
+    print(f"Selected: {result['name']}")
+    return 0
+
+def backup(args):
+    """
+    Takes an online snapshot of the database (safe while the app is running)
+    and deletes snapshots beyond the retention count.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+
+    Returns:
+        int: The process exit code.
+    """
+    settings = Backup_Manager.load_settings()
+    settings.update(directory=args.dir or settings['directory'], compress=not args.no_compress)
+    if args.keep is not None:
+        settings['keep'] = args.keep
+
+    def on_progress(done, total):
+        print(f"\r[INFO] {done}/{total} pages", end="", file=sys.stderr)
+
+    try:
+        snapshot = Backup_Manager.run_backup(args.db, settings, progress=on_progress)
+    except (RuntimeError, OSError, sqlite3.Error) as e:
+        print(file=sys.stderr)
+        logger.error("Backup failed: %s", e)
+        return 1
+    print(file=sys.stderr)
+    print(f"{snapshot['path']}: {snapshot['bytes'] / 1e6:.1f} MB in {snapshot['seconds']:.1f} s, "
+          f"{len(snapshot['removed'])} old snapshot(s) removed")
+    return 0
+
+def verify_backup(args):
+    """
+    Runs PRAGMA integrity_check on snapshots (default: every snapshot of --db).
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+
+    Returns:
+        int: The process exit code (1 if any snapshot is damaged).
+    """
+    paths = args.snapshots or Backup_Manager.list_snapshots(args.dir or Backup_Manager.load_settings()['directory'], args.db)
+    if not paths:
+        logger.error("No snapshots found.")
+        return 1
+    status = 0
+    for path in paths:
+        result = Backup_Manager.verify_snapshot(path)
+        print(f"{path}: {result}")
+        if result != 'ok':
+            status = 1
+    return status
+
+def sync_init(args):
+    """
+    Makes the database a sync branch with its own id range.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+
+    Returns:
+        int: The process exit code.
+    """
+    db = DatabaseManager(args.db)
+    try:
+        info = Branch_Sync.init_branch(db, args.branch_number)
+    except Branch_Sync.SyncError as e:
+        logger.error("%s", e)
+        return 1
+    finally:
+        db.close_connection()
+    print(f"Branch {info['branch_number']} ({info['branch_id']}): new rows start at id "
+          f"{info['branch_number'] * Branch_Sync.ID_BLOCK + 1}")
+    return 0
+
+def sync_export(args):
+    """
+    Writes the changes since the last export to a peer into a change file.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+
+    Returns:
+        int: The process exit code.
+    """
+    db = DatabaseManager(args.db)
+    try:
+        header = Branch_Sync.export_changes(db, args.out, peer=args.peer, since=args.since)
+    except (Branch_Sync.SyncError, OSError, sqlite3.Error) as e:
+        logger.error("Export failed: %s", e)
+        return 1
+    finally:
+        db.close_connection()
+    print(f"{args.out}: {header['count']} changed rows (#{header['after_seq']} to #{header['last_seq']})")
+    return 0
+
+def sync_apply(args):
+    """
+    Applies change files from other branches, in the given order.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+
+    Returns:
+        int: The process exit code (1 if a file failed or had conflicts).
+    """
+    db = DatabaseManager(args.db)
+    status = 0
+    try:
+        for path in args.files:
+            try:
+                report = Branch_Sync.apply_changes(db, path)
+            except (Branch_Sync.SyncError, sqlite3.Error) as e:
+                logger.error("%s not applied: %s", path, e)
+                return 1
+            print(f"{path}: {report['applied']} applied, {report['skipped']} skipped, "
+                  f"{len(report['conflicts'])} conflicts, {len(report['concurrent'])} edited in both branches")
+            if report['conflicts']:
+                status = 1
+        return status
+    finally:
+        db.close_connection()
+
+def build_parser():
+    """
+    Creates the command line parser with one sub-command per maintenance task.
+
+    Returns:
+        argparse.ArgumentParser: The configured parser.
+    """
+    parser = argparse.ArgumentParser(description="Gym Management System maintenance commands.")
+    parser.add_argument("--db", default=DEFAULT_DB, help="Path to the SQLite database (default: GYM.db)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rollups = subparsers.add_parser("rebuild-rollups", help="Recompute attendance rollup tables from history.")
+    rollups.set_defaults(func=rebuild_rollups)
+
+    archiver = subparsers.add_parser("archive-attendance", help="Move old check-ins into the yearly archive.")
+    archiver.add_argument("--older-than-days", type=int,
+                          help="Archive check-ins older than this (default: 365 or config.json)")
+    archiver.set_defaults(func=archive_attendance)
+
+    reconciler = subparsers.add_parser("reconcile-payments", help="Check (and repair) the payment ledger totals.")
+    reconciler.add_argument("--check-only", action="store_true", help="Report differences without rebuilding")
+    reconciler.set_defaults(func=reconcile_payments)
+
+    planner = subparsers.add_parser("plans", help="List membership plans and the renewals due soon.")
+    planner.add_argument("--days", type=int, default=30, help="Renewals due within this many days (default: 30)")
+    planner.set_defaults(func=list_plans)
+
+    plan_setter = subparsers.add_parser("set-plan", help="Add or change a membership plan.")
+    plan_setter.add_argument("name", help="Plan name, as stored in the members' membership type")
+    plan_setter.add_argument("--days", type=int, required=True, help="Membership length in days")
+    plan_setter.add_argument("--price", type=float, required=True, help="Price of the plan")
+    plan_setter.add_argument("--grace", type=int, default=0, help="Days after the end date before it expires (default: 0)")
+    plan_setter.set_defaults(func=set_plan)
+
+    expirer = subparsers.add_parser("expire-memberships", help="Mark lapsed memberships as UNPAID.")
+    expirer.set_defaults(func=expire_memberships)
+
+    exporter = subparsers.add_parser("export", help="Stream a table to CSV, JSON Lines or Parquet.")
+    exporter.add_argument("table", choices=sorted(ALLOWED_TABLES))
+    exporter.add_argument("out", help="Output file path")
+    exporter.add_argument("--format", choices=Export_Data.EXPORT_FORMATS,
+                          help="Output format (default: guessed from the file extension)")
+    exporter.add_argument("--from", dest="start", help="First date to include (DD-MM-YYYY)")
+    exporter.add_argument("--to", dest="end", help="Last date to include (DD-MM-YYYY)")
+    exporter.set_defaults(func=export)
+
+    importer = subparsers.add_parser("import-members", help="Bulk-import members from a CSV file.")
+    importer.add_argument("csv", help="CSV file with one member per row")
+    importer.add_argument("--photos", help="Folder with member photos ('photo' column or <phone>.jpg)")
+    importer.set_defaults(func=import_members)
+
+    calibrator = subparsers.add_parser("calibrate-detector", help="Pick the fastest accurate face detector for this machine.")
+    calibrator.add_argument("--photos", default=Import_Members.PHOTO_DIR, help="Enrolled photos (default: 'Members Photo')")
+    calibrator.add_argument("--min-accuracy", type=float, default=Face_Detection.MIN_ACCURACY,
+                            help="Share of photos a detector must get right (default: 0.95)")
+    calibrator.set_defaults(func=calibrate_detector)
+
+    backer = subparsers.add_parser("backup", help="Snapshot the database while it is in use.")
+    backer.add_argument("--dir", help="Backup folder (default: 'backups' or config.json)")
+    backer.add_argument("--keep", type=int, help="Snapshots to keep (default: 7 or config.json)")
+    backer.add_argument("--no-compress", action="store_true", help="Write a plain .db instead of .db.gz")
+    backer.set_defaults(func=backup)
+
+    verifier = subparsers.add_parser("verify-backup", help="Check snapshots with PRAGMA integrity_check.")
+    verifier.add_argument("snapshots", nargs="*", help="Snapshot files (default: all snapshots of --db)")
+    verifier.add_argument("--dir", help="Backup folder to search (default: 'backups' or config.json)")
+    verifier.set_defaults(func=verify_backup)
+
+    initer = subparsers.add_parser("sync-init", help="Make this database a sync branch (once per branch).")
+    initer.add_argument("--branch-number", type=int, required=True, help="1, 2, 3... (different in every branch)")
+    initer.set_defaults(func=sync_init)
+
+    sync_exporter = subparsers.add_parser("sync-export", help="Write the changes since the last export to a file.")
+    sync_exporter.add_argument("out", help="Change file to write (.jsonl.gz)")
+    sync_exporter.add_argument("--peer", help="Receiving branch; remembers what it was sent")
+    sync_exporter.add_argument("--since", type=int, help="Export changes after this sequence number")
+    sync_exporter.set_defaults(func=sync_export)
+
+    applier = subparsers.add_parser("sync-apply", help="Apply change files from other branches.")
+    applier.add_argument("files", nargs="+", help="Change files, oldest first")
+    applier.set_defaults(func=sync_apply)
+
+    return parser
+
+def main(argv=None):
+    """
+    Entry point for the maintenance command line tool.
+    """
+    args = build_parser().parse_args(argv)
+    App_Logging.setup_logging()
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+import argparse
+import json
+import logging
+import sys
+from datetime import datetime
+
+import App_Config
+import App_Logging
+import Camera_Service
+import Manage_Data
+import Recognition_Engine
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+DEFAULT_DB = "GYM.db"
+CAMERA_TIMEOUT = 10.0 # Seconds to wait for the first frame / between frames
+
+def video_frames(path):
+    """
+    Yields every frame of a video file (or stream URL) as fast as it decodes.
+    """
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Cannot open video: {path}")
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                return
+            yield frame
+    finally:
+        cap.release()
+
+def camera_frames(index, backend=None):
+    """
+    Yields each new frame from a camera device through the camera service.
+    """
+    settings = App_Config.get_section(Camera_Service.CONFIG_SECTION, Camera_Service.DEFAULT_SETTINGS)
+    settings.update(index=index)
+    if backend:
+        settings.update(backend=backend)
+    camera = Camera_Service.CameraService(settings)
+    camera.subscribe()
+    try:
+        if not camera.wait_ready(CAMERA_TIMEOUT):
+            raise RuntimeError(camera.error or f"Cannot open camera {index}")
+        sequence = 0
+        while True:
+            sequence, frame = camera.wait_frame(sequence, CAMERA_TIMEOUT)
+            if frame is None:
+                raise RuntimeError(camera.error or "Camera stopped delivering frames.")
+            yield frame
+    finally:
+        camera.unsubscribe()
+
+def open_source(source, backend=None):
+    """
+    Picks the frame source: a device number ('0') or a video file/URL.
+    """
+    if source.isdigit():
+        return camera_frames(int(source), backend)
+    return video_frames(source)
+
+def emit(stream, event):
+    """
+    Writes one event as a JSON line (with a timestamp) and flushes it.
+    """
+    event = dict(event, timestamp=datetime.now().isoformat(timespec='milliseconds'))
+    stream.write(json.dumps(event) + "\n")
+    stream.flush()
+
+def run(args, stream=sys.stdout):
+    """
+    Recognizes members in the source's frames and records their check-ins.
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments.
+        stream (file): Where the JSON events are written.
+
+    Returns:
+        int: The process exit code.
+    """
+    db = Manage_Data.DatabaseManager(args.db)
+    engine = Recognition_Engine.RecognitionEngine(db, args.photos, process_every=args.every)
+    frames = 0
+    status = 0
+    try:
+        count = engine.start(calibrate=not args.no_calibrate)
+        if not count:
+            emit(stream, {'event': 'error', 'message': "No known faces found."})
+            return 1
+        emit(stream, {'event': 'start', 'source': args.source, 'known_faces': count,
+                      'detector': engine.detector.name})
+
+        for frame in open_source(args.source, args.backend):
+            for event in engine.process(frame):
+                emit(stream, event)
+            engine.stats.tick_frame()
+            frames += 1
+            if args.max_frames and frames >= args.max_frames:
+                break
+    except KeyboardInterrupt:
+        logger.info("Kiosk stopped by user.")
+    except (RuntimeError, OSError) as e:
+        logger.error("Kiosk stopped: %s", e)
+        emit(stream, {'event': 'error', 'message': str(e)})
+        status = 1
+    finally:
+        engine.stop()
+        emit(stream, {'event': 'stop', 'frames': frames, 'fps': engine.stats.fps(),
+                      'checked_in': sorted(int(i) for i in engine.recognized_ids),
+                      'stages': engine.stats.summary()})
+        db.close_connection()
+    return status
+
+def build_parser():
+    """
+    Creates the command line parser for the kiosk.
+    """
+    parser = argparse.ArgumentParser(description="Headless face recognition attendance kiosk.")
+    parser.add_argument("source", nargs="?", default="0", help="Camera number (default: 0) or a video file/URL")
+    parser.add_argument("--db", default=DEFAULT_DB, help="Path to the SQLite database (default: GYM.db)")
+    parser.add_argument("--photos", default=Recognition_Engine.PHOTO_DIR, help="Enrolled photos (default: 'Members Photo')")
+    parser.add_argument("--backend", choices=sorted(Camera_Service.BACKENDS) + ['auto'], help="Camera backend (default: from config.json)")
+    parser.add_argument("--every", type=int, default=Recognition_Engine.PROCESS_EVERY,
+                        help="Recognize on every Nth frame (default: 5)")
+    parser.add_argument("--max-frames", type=int, help="Stop after this many frames")
+    parser.add_argument("--no-calibrate", action="store_true", help="Skip the one-time detector calibration")
+    return parser
+
+def main(argv=None):
+    """
+    Entry point: python Headless_Kiosk.py [source] --db GYM.db
+    JSON events go to stdout, logs to stderr and logs/gym.log.
+    """
+    args = build_parser().parse_args(argv)
+    App_Logging.setup_logging()
+    if cv2 is None:
+        logger.critical("The kiosk needs OpenCV, numpy and face_recognition.")
+        return 1
+    return run(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
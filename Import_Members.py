@@ -0,0 +1,181 @@
+import csv
+import logging
+import os
+import shutil
+import sqlite3
+from Manage_Data import MEMBER_COLUMNS, validate_member_fields
+
+try:
+    # Only needed to convert non-JPEG photos to the '<id>.jpg' the app expects
+    from PIL import Image
+except ImportError:
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+PHOTO_DIR = "Members Photo"
+PHOTO_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+TITLE_CASE_COLUMNS = ('full_name', 'emergency_name') # Normalized like the 'Add New Member' form
+
+def normalize_header(name):
+    """
+    Maps a spreadsheet header such as 'Phone Number' to 'phone_number'.
+    """
+    return name.strip().lower().replace(" ", "_").replace("-", "_")
+
+def read_member_rows(csv_path):
+    """
+    Reads and normalizes member rows from a CSV file.
+
+    The header must name the Members columns (case and spaces do not
+    matter, e.g. 'Full Name'). An optional 'photo' column names the
+    member's photo file; 'member_status' defaults to 'ROOKIE'.
+
+    Args:
+        csv_path (str): Path to the CSV file.
+
+    Returns:
+        list: (line_number, record) tuples.
+    """
+    rows = []
+    with open(csv_path, newline='', encoding='utf-8-sig') as file:
+        reader = csv.DictReader(file)
+        reader.fieldnames = [normalize_header(name) for name in reader.fieldnames or []]
+        for line_number, raw in enumerate(reader, start=2): # Line 1 is the header
+            record = {key: (value or "").strip() for key, value in raw.items() if key}
+            for column in TITLE_CASE_COLUMNS:
+                if column in record:
+                    record[column] = record[column].title()
+            record['member_status'] = record.get('member_status') or "ROOKIE"
+            rows.append((line_number, record))
+    return rows
+
+def find_photo(photo_dir, record):
+    """
+    Finds a member's photo in the import folder: the file named in the
+    'photo' column, or else '<phone_number>.jpg/.jpeg/.png'.
+
+    Returns:
+        str: The photo path, or None if not found.
+    """
+    if not photo_dir:
+        return None
+    candidates = []
+    if record.get('photo'):
+        candidates.append(record['photo'])
+    candidates += [record['phone_number'] + extension for extension in PHOTO_EXTENSIONS]
+    for name in candidates:
+        path = os.path.join(photo_dir, name)
+        if os.path.isfile(path):
+            return path
+    return None
+
+def link_photo(source_path, member_id, dest_dir=PHOTO_DIR):
+    """
+    Stores an imported photo as '<member_id>.jpg', the name every window expects.
+
+    Returns:
+        bool: True if the photo was saved.
+    """
+    dest_path = os.path.join(dest_dir, f"{member_id}.jpg")
+    try:
+        if source_path.lower().endswith(('.jpg', '.jpeg')):
+            shutil.copyfile(source_path, dest_path)
+        elif Image is not None:
+            Image.open(source_path).convert("RGB").save(dest_path, quality=90)
+        else:
+            logger.warning("Cannot convert %s to JPEG without Pillow, skipped.", source_path)
+            return False
+        return True
+    except (OSError, ValueError) as e:
+        logger.error("Failed to save photo for member ID %s: %s", member_id, e)
+        return False
+
+def import_members_csv(db, csv_path, photo_dir=None, dest_dir=PHOTO_DIR):
+    """
+    Bulk-imports members from a CSV file (and optionally a photo folder).
+
+    Every row is validated with the same rules as the 'Add New Member'
+    form; valid rows are inserted in one transaction with
+    DatabaseManager.insert_members_bulk, and photos are then linked to
+    the new member IDs.
+
+    Args:
+        db (DatabaseManager): An open database manager.
+        csv_path (str): Path to the CSV file.
+        photo_dir (str, optional): Folder holding the members' photos.
+        dest_dir (str): Folder the app reads member photos from.
+
+    Returns:
+        dict: A report with 'inserted' (count), 'duplicates' (phone numbers),
+              'invalid' ((line, message) tuples), 'photos_linked' (count),
+              'photos_missing' (member IDs) and 'error' (why the insert
+              failed and nothing was imported, or None).
+    """
+    logger.info("Importing members from %s (photos: %s)", csv_path, photo_dir)
+    rows = read_member_rows(csv_path)
+
+    invalid = []
+    valid = []
+    for line_number, record in rows:
+        missing_columns = [column for column in MEMBER_COLUMNS if column not in record]
+        error = (f"Missing column(s): {', '.join(missing_columns)}" if missing_columns
+                 else validate_member_fields(record))
+        if error:
+            invalid.append((line_number, error))
+        else:
+            valid.append(record)
+
+    error = None
+    try:
+        inserted, duplicates = db.insert_members_bulk(valid) if valid else ({}, [])
+    except sqlite3.Error as e:
+        error = str(e)
+        inserted, duplicates = {}, []
+
+    photos_linked = 0
+    photos_missing = []
+    if photo_dir:
+        os.makedirs(dest_dir, exist_ok=True)
+        first_records = {}
+        for record in valid:
+            first_records.setdefault(record['phone_number'], record) # The row that was inserted
+        for phone, member_id in inserted.items():
+            source = find_photo(photo_dir, first_records[phone])
+            if source and link_photo(source, member_id, dest_dir):
+                photos_linked += 1
+            else:
+                photos_missing.append(member_id)
+
+    report = {
+        'inserted': len(inserted),
+        'duplicates': duplicates,
+        'invalid': invalid,
+        'photos_linked': photos_linked,
+        'photos_missing': photos_missing,
+        'error': error,
+    }
+    logger.info("Import finished: %s inserted, %s duplicates, %s invalid, %s photos linked.",
+                report['inserted'], len(duplicates), len(invalid), photos_linked)
+    return report
+
+def format_report(report):
+    """
+    Builds a short human-readable summary of an import report.
+
+    Returns:
+        str: The summary text.
+    """
+    lines = [f"Import failed, nothing was inserted: {report['error']}"] if report['error'] else []
+    lines += [f"Inserted: {report['inserted']}",
+             f"Duplicate phone numbers skipped: {len(report['duplicates'])}",
+             f"Invalid rows: {len(report['invalid'])}",
+             f"Photos linked: {report['photos_linked']}"]
+    if report['photos_missing']:
+        lines.append(f"Members without photo: {len(report['photos_missing'])}")
+    for line_number, message in report['invalid'][:10]:
+        lines.append(f"  Line {line_number}: {message}")
+    if len(report['invalid']) > 10:
+        lines.append(f"  ... and {len(report['invalid']) - 10} more")
+    return "\n".join(lines)
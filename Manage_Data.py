@@ -1,4 +1,13 @@
+import logging
+import os
+import random
 import sqlite3
+import time
+from datetime import datetime, timedelta
+
+import Query_Profiler
+
+logger = logging.getLogger(__name__)
 
 # --- Whitelists for secure queries ---
 # Used to prevent SQL injection by validating table/field names
@@ -14,6 +23,215 @@ ALLOWED_FIELDS = {
     'Payment': {'member_id', 'payment_date', 'amount', 'payment_method'}
 }
 
+# Member columns in insert order (everything except the auto 'id')
+MEMBER_COLUMNS = (
+    'full_name', 'date_of_birth', 'phone_number', 'gender', 'address',
+    'member_status', 'join_date', 'membership_type', 'membership_start_date',
+    'membership_end_date', 'emergency_name', 'emergency_number'
+)
+
+# Columns of each table in 'SELECT *' order
+TABLE_COLUMNS = {
+    'Members': ('id',) + MEMBER_COLUMNS,
+    'Attendance': ('id', 'member_id', 'date', 'check_in_time'),
+    'Payment': ('id', 'member_id', 'payment_date', 'amount', 'payment_method'),
+}
+
+# Column holding each table's "business" date (stored as 'DD-MM-YYYY').
+# Used for date-range filtering when streaming rows out of a table.
+DATE_COLUMNS = {'Members': 'join_date', 'Attendance': 'date', 'Payment': 'payment_date'}
+
+# --- Concurrency ---
+# The desktop app, the kiosk and the API server may all write to GYM.db at
+# once. In WAL mode readers never block the writer; a writer waits up to
+# BUSY_TIMEOUT_MS for the lock, then its transaction is retried with
+# jittered exponential backoff so competing processes do not retry in step.
+BUSY_TIMEOUT_MS = 5000
+WRITE_RETRIES = 5
+RETRY_BASE_DELAY = 0.05 # Seconds, doubled per attempt
+RETRY_MAX_DELAY = 1.0
+
+# --- Archive ---
+# Old check-ins can be moved out of the hot Attendance table into one table
+# per year ('Attendance_2023', ...) in an attached archive database. The
+# TEMP view AttendanceAll spans both for exports and rollup rebuilds.
+ARCHIVE_SCHEMA = "archive"
+ARCHIVE_VIEW = "AttendanceAll"
+ARCHIVE_AGE_DAYS = 365
+
+# --- Change log ---
+# Triggers append one row per insert, update and delete on the main tables
+# to ChangeLog. 'seq' only grows, so any connection (or another process)
+# can ask for "everything after seq N" to learn which rows changed.
+# Inserts and updates also record the new row as JSON ('payload'), so the
+# log can be replayed into another branch's database (Branch_Sync).
+# 'origin' is NULL for changes made here; a transaction that writes a row
+# into ChangeCapture tags its changes with that origin instead (changes
+# applied from another branch, or housekeeping that must not be synced).
+CHANGE_ACTIONS = ("INSERT", "UPDATE", "DELETE")
+ARCHIVE_ORIGIN = "archive" # Check-ins moved to the archive are not deleted elsewhere
+CHANGE_BATCH = 500         # Changes read per get_changes() call
+CHANGE_LOG_KEEP = 100000   # Newest changes kept by prune_change_log()
+
+# --- Membership plans ---
+# Seeded into MembershipPlans when the table is created; edit the table
+# (Gym_Tools.py set-plan) to change prices or add plans.
+# (name, duration_days, price, grace_days)
+DEFAULT_PLANS = (
+    ("Monthly", 30, 700.0, 0),
+    ("Quarterly", 90, 1800.0, 0),
+    ("Half-yearly", 182, 3000.0, 0), # Approx 6 months
+    ("Yearly", 365, 4800.0, 0),
+)
+
+def to_iso_day(date_str):
+    """
+    Converts an app date ('DD-MM-YYYY') into an ISO day ('YYYY-MM-DD').
+
+    Args:
+        date_str (str): The date as typed in the app.
+
+    Returns:
+        str: The ISO day.
+
+    Raises:
+        ValueError: If the date is not in 'DD-MM-YYYY' format.
+    """
+    return datetime.strptime(date_str.strip(), '%d-%m-%Y').strftime('%Y-%m-%d')
+
+def validate_member_fields(record):
+    """
+    Validates a new member's fields with the same rules as the
+    'Add New Member' form. Shared by the form and the bulk importer.
+
+    Args:
+        record (dict): Member fields keyed by MEMBER_COLUMNS.
+
+    Returns:
+        str: An error message, or None if the record is valid.
+    """
+    required = [column for column in MEMBER_COLUMNS if column != 'member_status']
+    if not all(record.get(column) for column in required):
+        return "Please fill all fields"
+    phone = record['phone_number']
+    if len(phone) != 10 or not phone.isdigit():
+        return "Phone Number must be 10 digits."
+    emergency = record['emergency_number']
+    if len(emergency) != 10 or not emergency.isdigit():
+        return "Emergency Contact must be 10 digits."
+    return None
+
+def is_lock_error(error):
+    """
+    Tells whether a SQLite error means another connection holds a lock
+    (SQLITE_BUSY / SQLITE_LOCKED), i.e. the statement may succeed if retried.
+    """
+    message = str(error).lower()
+    return isinstance(error, sqlite3.OperationalError) and ("locked" in message or "busy" in message)
+
+def retry_locked(operation, retries=WRITE_RETRIES, base_delay=RETRY_BASE_DELAY):
+    """
+    Calls operation() and retries it while the database is locked, sleeping
+    a random time up to base_delay * 2**attempt (capped at RETRY_MAX_DELAY)
+    between attempts.
+
+    Args:
+        operation (callable): A whole transaction; it must roll back on failure.
+        retries (int): Retries after the first attempt.
+        base_delay (float): Backoff for the first retry, in seconds.
+
+    Returns:
+        Whatever operation returns.
+
+    Raises:
+        sqlite3.Error: The last error if every attempt failed, or any non-lock error.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return operation()
+        except sqlite3.OperationalError as e:
+            if attempt == retries or not is_lock_error(e):
+                raise
+            delay = random.uniform(0, min(RETRY_MAX_DELAY, base_delay * 2 ** attempt))
+            logger.warning("Database busy (%s), retry %s/%s in %.0f ms", e, attempt + 1, retries, delay * 1000)
+            time.sleep(delay)
+
+def set_change_origin(cursor, origin):
+    """
+    Tags the change log entries of the current transaction with 'origin'
+    (None to stop tagging). Call it inside the transaction, and clear it
+    before the commit.
+    """
+    cursor.execute("DELETE FROM ChangeCapture")
+    if origin is not None:
+        cursor.execute("INSERT INTO ChangeCapture (origin) VALUES (?)", (origin,))
+
+def archive_path(db_name):
+    """
+    Returns the archive database belonging to a database file
+    ('GYM.db' -> 'GYM_archive.db'), or None for in-memory databases.
+    """
+    if db_name == ":memory:" or db_name.startswith("file:"):
+        return None
+    stem, ext = os.path.splitext(db_name)
+    return f"{stem}_archive{ext or '.db'}"
+
+def iso_date_sql(column):
+    """
+    Builds a SQL expression that turns a 'DD-MM-YYYY' column into an
+    ISO 'YYYY-MM-DD' string, so dates can be compared and grouped in SQL.
+
+    Args:
+        column (str): The column (or NEW.column) holding the date.
+
+    Returns:
+        str: The SQL expression.
+    """
+    return f"(substr({column}, 7, 4) || '-' || substr({column}, 4, 2) || '-' || substr({column}, 1, 2))"
+
+def hour_sql(column):
+    """
+    Builds a SQL expression that extracts the 24h hour from a check-in time.
+    Handles both 'HH:MM:SS AM/PM' (used by the app) and 'HH:MM:SS'.
+
+    Args:
+        column (str): The column (or NEW.column) holding the time.
+
+    Returns:
+        str: The SQL expression.
+    """
+    return (f"(CASE WHEN {column} LIKE '%PM' THEN CAST(substr({column}, 1, 2) AS INTEGER) % 12 + 12 "
+            f"WHEN {column} LIKE '%AM' THEN CAST(substr({column}, 1, 2) AS INTEGER) % 12 "
+            f"ELSE CAST(substr({column}, 1, 2) AS INTEGER) END)")
+
+def month_sql(column):
+    """
+    Builds a SQL expression that turns a 'DD-MM-YYYY' column into its
+    'YYYY-MM' month.
+
+    Args:
+        column (str): The column (or NEW.column) holding the date.
+
+    Returns:
+        str: The SQL expression.
+    """
+    return f"(substr({column}, 7, 4) || '-' || substr({column}, 4, 2))"
+
+def next_id_sql(table):
+    """
+    Builds a SQL expression for the id of the next new row in 'table':
+    one above its AUTOINCREMENT counter. SQLite would pick one above the
+    largest id in the table, which after a sync can be a row from another
+    branch's id block (see Branch_Sync), so inserts name the id themselves.
+
+    Args:
+        table (str): A whitelisted table name.
+
+    Returns:
+        str: The SQL expression.
+    """
+    return f"(SELECT COALESCE(MAX(seq), 0) + 1 FROM sqlite_sequence WHERE name = '{table}')"
+
 class DatabaseManager:
     """
     Manages all database operations for the Gym application using SQLite.
@@ -21,22 +239,42 @@ class DatabaseManager:
     relational integrity and security.
     """
 
-    def __init__(self, db_name):
+    def __init__(self, db_name, profile=None, shared=False, wal=True, writer=None):
         """
         Initializes the database connection and cursor, and ensures
         tables and foreign key support are enabled.
 
         Args:
             db_name (str): The filename for the SQLite database (e.g., "GYM.db").
+            profile (bool, optional): Record every statement with a QueryProfiler.
+                                      Defaults to the GYM_DB_PROFILE environment variable.
+            shared (bool): Allow use from threads other than the creating one
+                           (one thread at a time, e.g. from a ConnectionPool).
+            wal (bool): Switch the database to write-ahead logging, so other
+                        processes can read while one writes.
+            writer (WriteQueue, optional): Send all writes through this
+                                           single-writer queue instead of this connection.
         """
+        if profile is None:
+            profile = Query_Profiler.profiling_enabled()
+        self.profiler = Query_Profiler.QueryProfiler() if profile else None
+        self.db_name = db_name
+        self.writer = writer
+        self.archive_name = archive_path(db_name)
         try:
-            self.conn = sqlite3.connect(db_name)
-            self.cursor = self.conn.cursor()
-            print(f"[INFO] Connected to database: {db_name}")
+            # 'timeout' is SQLite's busy timeout: wait for a lock instead of failing at once
+            self.conn = sqlite3.connect(db_name, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=not shared)
+            self.cursor = self.new_cursor()
+            logger.info("Connected to database: %s", db_name)
+            if wal:
+                self.enable_wal()
             self.enable_foreign_keys()
             self.create_tables()  # Ensure tables exist on startup
+            if self.archive_name and os.path.exists(self.archive_name):
+                self.attach_archive()
+            self.refresh_archive_view()
         except sqlite3.Error as e:
-            print(f"[CRITICAL] Database connection failed: {e}")
+            logger.critical("Database connection failed: %s", e)
             raise  # Re-raise the exception to stop the app if DB fails
 
     def __del__(self):
@@ -46,6 +284,160 @@ class DatabaseManager:
         """
         self.close_connection()
 
+    def new_cursor(self):
+        """
+        Opens a cursor on the connection, wrapped for profiling if enabled.
+        """
+        cursor = self.conn.cursor()
+        if self.profiler is not None:
+            return Query_Profiler.ProfilingCursor(cursor, self.profiler, self.conn)
+        return cursor
+
+    def enable_wal(self):
+        """
+        Switches the database file to write-ahead logging. The setting is
+        stored in the file, so every later connection uses it too.
+        """
+        try:
+            mode = self.cursor.execute("PRAGMA journal_mode = WAL;").fetchone()[0]
+            logger.info("Journal mode: %s", mode)
+        except sqlite3.Error as e:
+            logger.error("Failed to enable WAL: %s", e)
+
+    def run_write(self, work, local=False):
+        """
+        Runs work(cursor) as one transaction and commits it. While another
+        connection holds the write lock the whole transaction is retried
+        (see retry_locked). With a single-writer queue, the work runs on
+        the writer's connection instead.
+
+        Args:
+            work (callable): Takes a cursor and performs the writes.
+            local (bool): Use this connection even with a writer (for work
+                          that needs this connection's attached archive).
+
+        Returns:
+            Whatever work returns.
+
+        Raises:
+            sqlite3.Error: If the transaction failed and was rolled back.
+        """
+        if self.writer is not None and not local:
+            return self.writer.submit(work)
+
+        def transaction():
+            with self.conn:
+                return work(self.cursor)
+        return retry_locked(transaction)
+
+    def execute_write(self, sql, params=()):
+        """
+        Runs one write statement through run_write.
+
+        Returns:
+            int: The cursor's lastrowid (the new row's id after an INSERT).
+        """
+        return self.run_write(lambda cursor: cursor.execute(sql, params).lastrowid)
+
+    def attach_archive(self):
+        """
+        Attaches the archive database (creating the file if needed) as 'archive'.
+        """
+        attached = [row[1] for row in self.cursor.execute("PRAGMA database_list").fetchall()]
+        if ARCHIVE_SCHEMA not in attached:
+            self.cursor.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (self.archive_name,))
+            logger.info("Attached attendance archive: %s", self.archive_name)
+
+    def archive_tables(self):
+        """
+        Returns the per-year archive tables, oldest first ([] if there is no archive).
+        """
+        attached = [row[1] for row in self.cursor.execute("PRAGMA database_list").fetchall()]
+        if ARCHIVE_SCHEMA not in attached:
+            return []
+        rows = self.cursor.execute(f'''
+            SELECT name FROM {ARCHIVE_SCHEMA}.sqlite_master
+            WHERE type = 'table' AND name GLOB 'Attendance_[0-9][0-9][0-9][0-9]'
+            ORDER BY name
+        ''').fetchall()
+        return [row[0] for row in rows]
+
+    def refresh_archive_view(self):
+        """
+        (Re)creates the TEMP view AttendanceAll over the hot Attendance
+        table and every archive table. TEMP objects belong to this
+        connection only, so every connection builds its own.
+        """
+        parts = ["SELECT id, member_id, date, check_in_time FROM main.Attendance"]
+        parts += [f"SELECT id, member_id, date, check_in_time FROM {ARCHIVE_SCHEMA}.{table}"
+                  for table in self.archive_tables()]
+        self.cursor.execute(f"DROP VIEW IF EXISTS temp.{ARCHIVE_VIEW}")
+        self.cursor.execute(f"CREATE TEMP VIEW {ARCHIVE_VIEW} AS " + " UNION ALL ".join(parts))
+
+    def archive_attendance(self, older_than_days=ARCHIVE_AGE_DAYS):
+        """
+        Moves check-ins older than 'older_than_days' into the per-year
+        tables of the archive database, one month per transaction so
+        check-ins from other windows or processes are never held up long.
+
+        The rollups are not touched (archived visits still count in
+        reports). Archive and main database commit separately in WAL mode,
+        so rows are copied with INSERT OR IGNORE before being deleted:
+        if a run is interrupted, running it again finishes the move.
+
+        Args:
+            older_than_days (int): Check-ins before today minus this many days are moved.
+
+        Returns:
+            dict: {year: rows moved}, or None if archiving failed.
+        """
+        if self.archive_name is None:
+            logger.warning("In-memory databases cannot be archived.")
+            return None
+        cutoff = (datetime.now() - timedelta(days=older_than_days)).strftime('%Y-%m-%d')
+        day_expr = iso_date_sql("date")
+        logger.info("Archiving check-ins before %s to %s...", cutoff, self.archive_name)
+        moved = {}
+        try:
+            self.attach_archive()
+            months = self.cursor.execute(f'''
+                SELECT DISTINCT substr(date, 7, 4), substr(date, 4, 2) FROM main.Attendance
+                WHERE {day_expr} < ? ORDER BY 1, 2
+            ''', (cutoff,)).fetchall()
+            for year, month in months:
+                if not (year.isdigit() and len(year) == 4):
+                    logger.warning("Skipping check-ins with malformed year %r", year)
+                    continue
+                table = f"{ARCHIVE_SCHEMA}.Attendance_{year}"
+
+                def move(cursor):
+                    set_change_origin(cursor, ARCHIVE_ORIGIN) # Local housekeeping, never synced
+                    cursor.execute(f'''
+                        CREATE TABLE IF NOT EXISTS {table} (
+                            id INTEGER PRIMARY KEY,
+                            member_id INTEGER NOT NULL,
+                            date DATE NOT NULL,
+                            check_in_time DATETIME NOT NULL
+                        )
+                    ''')
+                    cursor.execute(f"CREATE INDEX IF NOT EXISTS {ARCHIVE_SCHEMA}.idx_attendance_{year}_member "
+                                   f"ON Attendance_{year} (member_id)")
+                    condition = f"substr(date, 7, 4) = ? AND substr(date, 4, 2) = ? AND {day_expr} < ?"
+                    params = (year, month, cutoff)
+                    cursor.execute(f"INSERT OR IGNORE INTO {table} (id, member_id, date, check_in_time) "
+                                   f"SELECT id, member_id, date, check_in_time FROM main.Attendance WHERE {condition}", params)
+                    count = cursor.execute(f"DELETE FROM main.Attendance WHERE {condition}", params).rowcount
+                    set_change_origin(cursor, None)
+                    return count
+
+                moved[year] = moved.get(year, 0) + self.run_write(move, local=True)
+            self.refresh_archive_view()
+            logger.info("Archived %s check-ins: %s", sum(moved.values()), moved)
+            return moved
+        except sqlite3.Error as e:
+            logger.error("Archiving failed (finished months were kept): %s", e)
+            return None
+
     def enable_foreign_keys(self):
         """
         Enables foreign key constraint enforcement in SQLite.
@@ -54,9 +446,9 @@ class DatabaseManager:
         try:
             self.cursor.execute("PRAGMA foreign_keys = ON;")
             self.conn.commit()
-            print("[INFO] Foreign key enforcement enabled.")
+            logger.info("Foreign key enforcement enabled.")
         except sqlite3.Error as e:
-            print(f"[ERROR] Failed to enable foreign keys: {e}")
+            logger.error("Failed to enable foreign keys: %s", e)
 
     def create_tables(self):
         """
@@ -105,16 +497,265 @@ class DatabaseManager:
             )
         ''')
 
+        # --- Reporting rollups ---
+        # Pre-aggregated visit counts, kept up to date by a trigger on
+        # Attendance so reports read a few rows instead of the full history.
+        # 'day' is stored as ISO 'YYYY-MM-DD' so ranges can be compared in SQL.
+        attendance_daily_table = ('''
+            CREATE TABLE IF NOT EXISTS AttendanceDaily (
+                member_id INTEGER NOT NULL,
+                day DATE NOT NULL,
+                visits INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (member_id, day),
+                FOREIGN KEY (member_id) REFERENCES Members(id) ON DELETE CASCADE
+            )
+        ''')
+
+        attendance_hourly_table = ('''
+            CREATE TABLE IF NOT EXISTS AttendanceHourly (
+                day DATE NOT NULL,
+                hour INTEGER NOT NULL,
+                visits INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, hour)
+            )
+        ''')
+
+        attendance_daily_index = ('''
+            CREATE INDEX IF NOT EXISTS idx_attendance_daily_day ON AttendanceDaily (day)
+        ''')
+
+        # Edits and deletes move or remove the visit, so the totals always
+        # match a rebuild. Moving check-ins to the archive is not a delete
+        # for reporting (the rebuild reads the archive too), so it is skipped.
+        def rollup_add(row, sign):
+            day = iso_date_sql(f"{row}.date")
+            hour = hour_sql(f"{row}.check_in_time")
+            if sign == '+':
+                return f'''
+                INSERT OR IGNORE INTO AttendanceDaily (member_id, day, visits)
+                VALUES ({row}.member_id, {day}, 0);
+                UPDATE AttendanceDaily SET visits = visits + 1
+                WHERE member_id = {row}.member_id AND day = {day};
+                INSERT OR IGNORE INTO AttendanceHourly (day, hour, visits)
+                VALUES ({day}, {hour}, 0);
+                UPDATE AttendanceHourly SET visits = visits + 1
+                WHERE day = {day} AND hour = {hour};
+                '''
+            return f'''
+                UPDATE AttendanceDaily SET visits = visits - 1
+                WHERE member_id = {row}.member_id AND day = {day};
+                DELETE FROM AttendanceDaily WHERE member_id = {row}.member_id AND day = {day} AND visits <= 0;
+                UPDATE AttendanceHourly SET visits = visits - 1
+                WHERE day = {day} AND hour = {hour};
+                DELETE FROM AttendanceHourly WHERE day = {day} AND hour = {hour} AND visits <= 0;
+            '''
+        not_archiving = f"WHEN (SELECT origin FROM ChangeCapture) IS NOT '{ARCHIVE_ORIGIN}'"
+        attendance_rollup_triggers = [
+            f"CREATE TRIGGER IF NOT EXISTS trg_attendance_rollup AFTER INSERT ON Attendance "
+            f"BEGIN {rollup_add('NEW', '+')} END",
+            f"CREATE TRIGGER IF NOT EXISTS trg_attendance_rollup_update "
+            f"AFTER UPDATE OF member_id, date, check_in_time ON Attendance "
+            f"BEGIN {rollup_add('OLD', '-')} {rollup_add('NEW', '+')} END",
+            f"CREATE TRIGGER IF NOT EXISTS trg_attendance_rollup_delete AFTER DELETE ON Attendance {not_archiving} "
+            f"BEGIN {rollup_add('OLD', '-')} END",
+        ]
+
+        # --- Payment ledger ---
+        # Running revenue totals per month and method and per member, kept
+        # in step with Payment by triggers (inserts, edits and deletes), so
+        # revenue figures are a few indexed rows whatever the history size.
+        payment_monthly_table = ('''
+            CREATE TABLE IF NOT EXISTS PaymentMonthly (
+                month TEXT NOT NULL,
+                payment_method TEXT NOT NULL,
+                payments INTEGER NOT NULL DEFAULT 0,
+                total REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (month, payment_method)
+            )
+        ''')
+
+        payment_member_table = ('''
+            CREATE TABLE IF NOT EXISTS PaymentMemberTotals (
+                member_id INTEGER PRIMARY KEY,
+                payments INTEGER NOT NULL DEFAULT 0,
+                total REAL NOT NULL DEFAULT 0,
+                FOREIGN KEY (member_id) REFERENCES Members(id) ON DELETE CASCADE
+            )
+        ''')
+
+        payment_member_index = ('''
+            CREATE INDEX IF NOT EXISTS idx_payment_member ON Payment (member_id)
+        ''')
+
+        def ledger_add(row, sign):
+            # Rows are only created when adding: a payment removed while its
+            # member is being deleted must not re-create the member's total
+            month = month_sql(f"{row}.payment_date")
+            create = f'''
+                INSERT OR IGNORE INTO PaymentMonthly (month, payment_method, payments, total)
+                VALUES ({month}, {row}.payment_method, 0, 0);
+                INSERT OR IGNORE INTO PaymentMemberTotals (member_id, payments, total)
+                VALUES ({row}.member_id, 0, 0);
+            ''' if sign == '+' else ""
+            return create + f'''
+                UPDATE PaymentMonthly SET payments = payments {sign} 1, total = total {sign} {row}.amount
+                WHERE month = {month} AND payment_method = {row}.payment_method;
+                UPDATE PaymentMemberTotals SET payments = payments {sign} 1, total = total {sign} {row}.amount
+                WHERE member_id = {row}.member_id;
+            '''
+        ledger_cleanup = '''
+                DELETE FROM PaymentMonthly WHERE payments = 0;
+                DELETE FROM PaymentMemberTotals WHERE payments = 0;
+        '''
+        payment_ledger_triggers = [
+            f"CREATE TRIGGER IF NOT EXISTS trg_payment_ledger_insert AFTER INSERT ON Payment "
+            f"BEGIN {ledger_add('NEW', '+')} END",
+            f"CREATE TRIGGER IF NOT EXISTS trg_payment_ledger_update AFTER UPDATE ON Payment "
+            f"BEGIN {ledger_add('OLD', '-')} {ledger_add('NEW', '+')} {ledger_cleanup} END",
+            f"CREATE TRIGGER IF NOT EXISTS trg_payment_ledger_delete AFTER DELETE ON Payment "
+            f"BEGIN {ledger_add('OLD', '-')} {ledger_cleanup} END",
+        ]
+
+        # --- Membership plans ---
+        # Duration, price and grace period of each membership type, so
+        # renewals, expiry and expected revenue are read from one place.
+        # Members.membership_type holds the plan name.
+        membership_plans_table = ('''
+            CREATE TABLE IF NOT EXISTS MembershipPlans (
+                name TEXT PRIMARY KEY,
+                duration_days INTEGER NOT NULL,
+                price REAL NOT NULL,
+                grace_days INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+
+        # --- Change counters ---
+        # One row per table, bumped on every write, so readers (the API's
+        # ETags) can tell whether a table changed without scanning it.
+        table_versions_table = ('''
+            CREATE TABLE IF NOT EXISTS TableVersions (
+                table_name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        version_triggers = [
+            f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table.lower()}_version_{action.lower()}
+            AFTER {action} ON {table}
+            BEGIN
+                UPDATE TableVersions SET version = version + 1 WHERE table_name = '{table}';
+            END
+            '''
+            for table in sorted(ALLOWED_TABLES) for action in ("INSERT", "UPDATE", "DELETE")
+        ]
+
+        # --- Change log ---
+        # Row-level history of writes for event subscribers (Event_Bus)
+        # and branch sync (Branch_Sync).
+        # AUTOINCREMENT keeps 'seq' from reusing ids after pruning.
+        change_log_table = ('''
+            CREATE TABLE IF NOT EXISTS ChangeLog (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                table_name TEXT NOT NULL,
+                action TEXT NOT NULL,
+                row_id INTEGER NOT NULL,
+                member_id INTEGER,
+                payload TEXT,
+                origin TEXT
+            )
+        ''')
+        # Holds at most one row, and only inside a transaction (see set_change_origin)
+        change_capture_table = ('''
+            CREATE TABLE IF NOT EXISTS ChangeCapture (
+                origin TEXT
+            )
+        ''')
+        # Branch identity and sync checkpoints (key/value)
+        sync_state_table = ('''
+            CREATE TABLE IF NOT EXISTS SyncState (
+                name TEXT PRIMARY KEY,
+                value TEXT
+            )
+        ''')
+        change_log_triggers = []
+        for table in sorted(ALLOWED_TABLES):
+            member_column = "id" if table == "Members" else "member_id"
+            for action in CHANGE_ACTIONS:
+                row = "OLD" if action == "DELETE" else "NEW"
+                payload = ("NULL" if action == "DELETE" else
+                           "json_object(" + ", ".join(f"'{column}', NEW.{column}" for column in TABLE_COLUMNS[table]) + ")")
+                change_log_triggers.append(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table.lower()}_changelog_{action.lower()}
+                AFTER {action} ON {table}
+                BEGIN
+                    INSERT INTO ChangeLog (table_name, action, row_id, member_id, payload, origin)
+                    VALUES ('{table}', '{action}', {row}.id, {row}.{member_column}, {payload},
+                            (SELECT origin FROM ChangeCapture));
+                END
+                ''')
+
         try:
             self.cursor.execute(members_table)
-            print("[INFO] 'Members' table checked/created successfully.")
+            logger.info("'Members' table checked/created successfully.")
             self.cursor.execute(attendance_table)
-            print("[INFO] 'Attendance' table checked/created successfully.")
+            logger.info("'Attendance' table checked/created successfully.")
             self.cursor.execute(payment_table)
-            print("[INFO] 'Payment' table checked/created successfully.")
+            logger.info("'Payment' table checked/created successfully.")
+            self.cursor.execute(attendance_daily_table)
+            self.cursor.execute(attendance_hourly_table)
+            self.cursor.execute(attendance_daily_index)
+            for trigger in attendance_rollup_triggers:
+                self.cursor.execute(trigger)
+            logger.info("Attendance rollup tables checked/created successfully.")
+            new_ledger = not self.cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'PaymentMonthly'").fetchone()
+            self.cursor.execute(payment_monthly_table)
+            self.cursor.execute(payment_member_table)
+            self.cursor.execute(payment_member_index)
+            for trigger in payment_ledger_triggers:
+                self.cursor.execute(trigger)
+            if new_ledger:
+                self.fill_payment_ledger(self.cursor) # Existing payments, once
+            logger.info("Payment ledger tables checked/created successfully.")
+            new_plans = not self.cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'MembershipPlans'").fetchone()
+            self.cursor.execute(membership_plans_table)
+            if new_plans: # Seed once, so removed plans stay removed
+                self.cursor.executemany("INSERT INTO MembershipPlans (name, duration_days, price, grace_days) "
+                                        "VALUES (?, ?, ?, ?)", DEFAULT_PLANS)
+            logger.info("Membership plans table checked/created successfully.")
+            self.cursor.execute(table_versions_table)
+            self.cursor.executemany("INSERT OR IGNORE INTO TableVersions (table_name, version) VALUES (?, 0)",
+                                    [(table,) for table in sorted(ALLOWED_TABLES)])
+            for trigger in version_triggers:
+                self.cursor.execute(trigger)
+            self.cursor.execute(change_log_table)
+            self.cursor.execute(change_capture_table)
+            self.cursor.execute(sync_state_table)
+            self.cursor.execute("INSERT OR IGNORE INTO SyncState (name, value) "
+                                "VALUES ('branch_id', lower(hex(randomblob(8))))")
+            self.upgrade_change_log()
+            for trigger in change_log_triggers:
+                self.cursor.execute(trigger)
             self.conn.commit()
         except sqlite3.OperationalError as e:
-            print(f"[ERROR] Failed to create tables: {e}")
+            logger.error("Failed to create tables: %s", e)
+
+    def upgrade_change_log(self):
+        """
+        Adds the 'payload' and 'origin' columns to a ChangeLog created
+        without them and drops its old triggers, so create_tables()
+        recreates them with payloads.
+        """
+        columns = [row[1] for row in self.cursor.execute("PRAGMA table_info(ChangeLog)").fetchall()]
+        if 'payload' in columns:
+            return
+        logger.info("Upgrading the change log with row payloads...")
+        self.cursor.execute("ALTER TABLE ChangeLog ADD COLUMN payload TEXT")
+        self.cursor.execute("ALTER TABLE ChangeLog ADD COLUMN origin TEXT")
+        for table in sorted(ALLOWED_TABLES):
+            for action in CHANGE_ACTIONS:
+                self.cursor.execute(f"DROP TRIGGER IF EXISTS trg_{table.lower()}_changelog_{action.lower()}")
 
     # --- Insert Operations ---
 
@@ -130,27 +771,84 @@ class DatabaseManager:
         Returns:
             int: The ID of the newly inserted member, or None if failed.
         """
-        print(f"[INFO] Attempting to insert new member: {full_name}")
+        logger.info("Attempting to insert new member: %s", full_name)
         try:
-            self.cursor.execute('''
-                INSERT INTO Members (full_name, date_of_birth, phone_number, gender, address, 
+            new_id = self.execute_write(f'''
+                INSERT INTO Members (id, full_name, date_of_birth, phone_number, gender, address, 
                                  member_status, join_date, membership_type, membership_start_date, 
                                  membership_end_date, emergency_name, emergency_number) 
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                VALUES ({next_id_sql('Members')}, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (full_name, date_of_birth, phone_number, gender, address, member_status,
                   join_date, membership_type, membership_start_date, membership_end_date,
                   emergency_name, emergency_number))
-            self.conn.commit()
-            new_id = self.cursor.lastrowid
-            print(f"[SUCCESS] Member inserted successfully. ID: {new_id}")
+            logger.info("Member inserted successfully. ID: %s", new_id)
             return new_id
         except sqlite3.IntegrityError as e:
-            print(f"[ERROR] Failed to insert member (IntegrityError): {e}. (e.g., Phone number may be duplicated)")
+            logger.error("Failed to insert member (IntegrityError): %s. (e.g., Phone number may be duplicated)", e)
             return None
         except sqlite3.Error as e:
-            print(f"[ERROR] Failed to insert member: {e}")
+            logger.error("Failed to insert member: %s", e)
             return None
 
+    def insert_members_bulk(self, records):
+        """
+        Inserts many members with a single executemany inside one transaction.
+
+        Phone numbers that already exist in the database, or appear more
+        than once in 'records', are reported instead of inserted, so the
+        UNIQUE constraint never aborts the batch.
+
+        Args:
+            records (list): Member dicts keyed by MEMBER_COLUMNS.
+
+        Returns:
+            tuple: (inserted, duplicates) where 'inserted' maps each new
+                   member's phone number to its ID and 'duplicates' lists
+                   the phone numbers that were skipped.
+
+        Raises:
+            sqlite3.Error: If the insert failed (nothing was inserted).
+        """
+        logger.info("Bulk inserting %s members...", len(records))
+        phones = [record['phone_number'] for record in records]
+        try:
+            existing = set()
+            for start in range(0, len(phones), 500): # Stay under SQLite's variable limit
+                chunk = phones[start:start + 500]
+                placeholders = ", ".join("?" * len(chunk))
+                self.cursor.execute(f"SELECT phone_number FROM Members WHERE phone_number IN ({placeholders})", chunk)
+                existing.update(row[0] for row in self.cursor.fetchall())
+
+            seen = set()
+            duplicates = []
+            to_insert = []
+            for record in records:
+                phone = record['phone_number']
+                if phone in existing or phone in seen:
+                    duplicates.append(phone)
+                    continue
+                seen.add(phone)
+                to_insert.append(tuple(record.get(column) for column in MEMBER_COLUMNS))
+
+            columns = ", ".join(MEMBER_COLUMNS)
+            placeholders = ", ".join("?" * len(MEMBER_COLUMNS))
+            self.run_write(lambda cursor: cursor.executemany(
+                f"INSERT INTO Members (id, {columns}) VALUES ({next_id_sql('Members')}, {placeholders})", to_insert))
+
+            inserted = {}
+            new_phones = [row[2] for row in to_insert]
+            for start in range(0, len(new_phones), 500):
+                chunk = new_phones[start:start + 500]
+                placeholders = ", ".join("?" * len(chunk))
+                self.cursor.execute(f"SELECT phone_number, id FROM Members WHERE phone_number IN ({placeholders})", chunk)
+                inserted.update(self.cursor.fetchall())
+
+            logger.info("Bulk inserted %s members, skipped %s duplicates.", len(inserted), len(duplicates))
+            return inserted, duplicates
+        except sqlite3.Error as e:
+            logger.error("Bulk member insert failed, nothing was inserted: %s", e)
+            raise
+
     def insert_attendance(self, member_id, date, check_in_time):
         """
         Inserts a new attendance record.
@@ -160,18 +858,23 @@ class DatabaseManager:
             member_id (int): The ID of the member.
             date (str): The date of check-in (e.g., "DD-MM-YYYY").
             check_in_time (str): The time of check-in (e.g., "HH:MM:SS").
+
+        Returns:
+            int: The new attendance record's ID, or None if it was not saved.
         """
-        print(f"[INFO] Inserting attendance for member ID: {member_id}")
+        logger.info("Inserting attendance for member ID: %s", member_id)
         try:
-            self.cursor.execute('''
-                INSERT INTO Attendance (member_id, date, check_in_time) VALUES (?, ?, ?)
+            new_id = self.execute_write(f'''
+                INSERT INTO Attendance (id, member_id, date, check_in_time)
+                VALUES ({next_id_sql('Attendance')}, ?, ?, ?)
             ''', (member_id, date, check_in_time))
-            self.conn.commit()
-            print("[SUCCESS] Attendance inserted successfully.")
+            logger.info("Attendance inserted successfully.")
+            return new_id
         except sqlite3.IntegrityError as e:
-            print(f"[ERROR] Failed to insert attendance (IntegrityError): {e}. (Likely invalid member_id)")
+            logger.error("Failed to insert attendance (IntegrityError): %s. (Likely invalid member_id)", e)
         except sqlite3.Error as e:
-            print(f"[ERROR] Failed to insert attendance: {e}")
+            logger.error("Failed to insert attendance: %s", e)
+        return None
 
     def insert_payment(self, member_id, payment_date, amount, payment_method):
         """
@@ -184,18 +887,17 @@ class DatabaseManager:
             amount (float): The amount paid.
             payment_method (str): The method of payment (e.g., "Cash", "Online").
         """
-        print(f"[INFO] Inserting payment for member ID: {member_id}")
+        logger.info("Inserting payment for member ID: %s", member_id)
         try:
-            self.cursor.execute('''
-                INSERT INTO Payment (member_id, payment_date, amount, payment_method) 
-                VALUES (?, ?, ?, ?)
+            self.execute_write(f'''
+                INSERT INTO Payment (id, member_id, payment_date, amount, payment_method) 
+                VALUES ({next_id_sql('Payment')}, ?, ?, ?, ?)
             ''', (member_id, payment_date, amount, payment_method))
-            self.conn.commit()
-            print("[SUCCESS] Payment inserted successfully.")
+            logger.info("Payment inserted successfully.")
         except sqlite3.IntegrityError as e:
-            print(f"[ERROR] Failed to insert payment (IntegrityError): {e}. (Likely invalid member_id)")
+            logger.error("Failed to insert payment (IntegrityError): %s. (Likely invalid member_id)", e)
         except sqlite3.Error as e:
-            print(f"[ERROR] Failed to insert payment: {e}")
+            logger.error("Failed to insert payment: %s", e)
 
     # --- Read/Query Operations ---
 
@@ -210,15 +912,15 @@ class DatabaseManager:
             list: A list of tuples, or an empty list if failed/table not allowed.
         """
         if table_name not in ALLOWED_TABLES:
-            print(f"[SECURITY] Denied query to non-whitelisted table: {table_name}")
+            logger.warning("Denied query to non-whitelisted table: %s", table_name)
             return []
         
-        print(f"[INFO] Fetching all records from '{table_name}'...")
+        logger.info("Fetching all records from '%s'...", table_name)
         try:
             self.cursor.execute(f"SELECT * FROM {table_name}")
             return self.cursor.fetchall()
         except sqlite3.Error as e:
-            print(f"[ERROR] Failed to fetch all from {table_name}: {e}")
+            logger.error("Failed to fetch all from %s: %s", table_name, e)
             return []
 
     def get_member_by_details(self, full_name, date_of_birth, phone_number):
@@ -233,14 +935,14 @@ class DatabaseManager:
         Returns:
             tuple: The member's data tuple, or None if not found.
         """
-        print(f"[INFO] Searching for member: {full_name}, {phone_number}")
+        logger.info("Searching for member: %s, %s", full_name, phone_number)
         try:
             self.cursor.execute('''
                 SELECT * FROM Members WHERE full_name=? AND date_of_birth=? AND phone_number=?
             ''', (full_name, date_of_birth, phone_number))
             return self.cursor.fetchone()
         except sqlite3.Error as e:
-            print(f"[ERROR] Failed to get member by details: {e}")
+            logger.error("Failed to get member by details: %s", e)
             return None
 
     def get_data_by_member_id(self, table_name, member_id):
@@ -256,10 +958,10 @@ class DatabaseManager:
             list: A list of tuples, or an empty list if failed.
         """
         if table_name not in ALLOWED_TABLES:
-            print(f"[SECURITY] Denied query to non-whitelisted table: {table_name}")
+            logger.warning("Denied query to non-whitelisted table: %s", table_name)
             return []
 
-        print(f"[INFO] Fetching data for member ID {member_id} from {table_name}")
+        logger.info("Fetching data for member ID %s from %s", member_id, table_name)
         try:
             if table_name == "Members":
                 self.cursor.execute("SELECT * FROM Members WHERE id=?", (member_id,))
@@ -267,9 +969,37 @@ class DatabaseManager:
                 self.cursor.execute(f"SELECT * FROM {table_name} WHERE member_id=?", (member_id,))
             return self.cursor.fetchall()
         except sqlite3.Error as e:
-            print(f"[ERROR] Failed to get data by member ID: {e}")
+            logger.error("Failed to get data by member ID: %s", e)
             return []
 
+    def get_rows_by_ids(self, table_name, row_ids):
+        """
+        Fetches rows of a whitelisted table by primary key.
+
+        Args:
+            table_name (str): The table (must be in ALLOWED_TABLES).
+            row_ids (iterable): The 'id' values to fetch.
+
+        Returns:
+            dict: {id: row tuple} for the ids that exist.
+        """
+        if table_name not in ALLOWED_TABLES:
+            logger.warning("Denied query to non-whitelisted table: %s", table_name)
+            return {}
+        row_ids = list(row_ids)
+        rows = {}
+        try:
+            cursor = self.new_cursor()
+            for start in range(0, len(row_ids), CHANGE_BATCH): # Stay under SQLite's variable limit
+                chunk = row_ids[start:start + CHANGE_BATCH]
+                placeholders = ", ".join("?" for _ in chunk)
+                cursor.execute(f"SELECT * FROM {table_name} WHERE id IN ({placeholders})", chunk)
+                rows.update((row[0], row) for row in cursor.fetchall())
+            return rows
+        except sqlite3.Error as e:
+            logger.error("Failed to fetch %s rows by id: %s", table_name, e)
+            return {}
+
     def get_attendance_with_names(self):
         """
         Example of a relational query: Fetches all attendance records
@@ -278,7 +1008,7 @@ class DatabaseManager:
         Returns:
             list: A list of tuples (Attendance.id, member_id, Member.full_name, date, check_in_time)
         """
-        print("[INFO] Fetching all attendance records with member names...")
+        logger.info("Fetching all attendance records with member names...")
         try:
             self.cursor.execute('''
                 SELECT A.id, A.member_id, M.full_name, A.date, A.check_in_time 
@@ -287,7 +1017,633 @@ class DatabaseManager:
             ''')
             return self.cursor.fetchall()
         except sqlite3.Error as e:
-            print(f"[ERROR] Failed to get attendance with names: {e}")
+            logger.error("Failed to get attendance with names: %s", e)
+            return []
+
+    def get_table_columns(self, table_name):
+        """
+        Returns the column names and declared types of a whitelisted table.
+
+        Args:
+            table_name (str): The table (must be in ALLOWED_TABLES).
+
+        Returns:
+            list: A list of (column_name, declared_type) tuples, or [] if not allowed.
+        """
+        if table_name not in ALLOWED_TABLES:
+            logger.warning("Denied query to non-whitelisted table: %s", table_name)
+            return []
+        try:
+            cursor = self.new_cursor().execute(f"PRAGMA table_info({table_name})")
+            return [(row[1], row[2]) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            logger.error("Failed to read columns of %s: %s", table_name, e)
+            return []
+
+    def _filtered_query(self, select, table_name, start_day, end_day, member_id, after_id=None,
+                        include_archive=False):
+        """
+        Builds the WHERE clause shared by count_rows, stream_rows and get_page.
+        With include_archive, Attendance is read through the AttendanceAll view.
+
+        Returns:
+            tuple: (sql, params)
+        """
+        conditions = []
+        params = []
+        if after_id is not None:
+            conditions.append("id > ?")
+            params.append(after_id)
+        if start_day or end_day:
+            day_expr = iso_date_sql(DATE_COLUMNS[table_name])
+            if start_day:
+                conditions.append(f"{day_expr} >= ?")
+                params.append(start_day)
+            if end_day:
+                conditions.append(f"{day_expr} <= ?")
+                params.append(end_day)
+        if member_id is not None:
+            conditions.append("id = ?" if table_name == "Members" else "member_id = ?")
+            params.append(member_id)
+        source = ARCHIVE_VIEW if include_archive and table_name == "Attendance" else table_name
+        sql = f"SELECT {select} FROM {source}"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        return sql, params
+
+    def count_rows(self, table_name, start_day=None, end_day=None, member_id=None, include_archive=False):
+        """
+        Counts the rows stream_rows would return (used for progress bars).
+
+        Returns:
+            int: The row count (0 if failed/table not allowed).
+        """
+        if table_name not in ALLOWED_TABLES:
+            logger.warning("Denied query to non-whitelisted table: %s", table_name)
+            return 0
+        sql, params = self._filtered_query("COUNT(*)", table_name, start_day, end_day, member_id,
+                                           include_archive=include_archive)
+        try:
+            return self.new_cursor().execute(sql, params).fetchone()[0]
+        except sqlite3.Error as e:
+            logger.error("Failed to count rows of %s: %s", table_name, e)
+            return 0
+
+    def stream_rows(self, table_name, start_day=None, end_day=None, member_id=None, batch_size=1000,
+                    include_archive=False):
+        """
+        Yields the rows of a table in batches straight from a dedicated
+        cursor, so large tables can be processed in constant memory
+        (unlike get_all_from_table, which builds one big list).
+
+        Args:
+            table_name (str): The table (must be in ALLOWED_TABLES).
+            start_day (str, optional): First ISO day to include (by DATE_COLUMNS).
+            end_day (str, optional): Last ISO day to include.
+            member_id (int, optional): Only rows for this member.
+            batch_size (int): Rows fetched per fetchmany call.
+            include_archive (bool): Also read archived check-ins (Attendance only).
+
+        Yields:
+            list: Up to batch_size row tuples at a time.
+        """
+        if table_name not in ALLOWED_TABLES:
+            logger.warning("Denied query to non-whitelisted table: %s", table_name)
+            return
+        sql, params = self._filtered_query("*", table_name, start_day, end_day, member_id,
+                                           include_archive=include_archive)
+        logger.info("Streaming rows from '%s' (%s to %s, member %s)", table_name, start_day, end_day, member_id)
+        # A separate cursor keeps self.cursor free for other queries meanwhile
+        cursor = self.new_cursor()
+        try:
+            cursor.execute(sql + " ORDER BY id", params)
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                if not batch:
+                    break
+                yield batch
+        except sqlite3.Error as e:
+            logger.error("Failed to stream rows from %s: %s", table_name, e)
+            raise
+        finally:
+            cursor.close()
+
+    def get_page(self, table_name, after_id=0, limit=100, start_day=None, end_day=None, member_id=None):
+        """
+        Returns one page of a table in id order (keyset pagination: the
+        next page starts after the last id seen, so deep pages cost the
+        same as the first one).
+
+        Args:
+            table_name (str): The table (must be in ALLOWED_TABLES).
+            after_id (int): Only rows with a larger id.
+            limit (int): Maximum rows to return.
+            start_day (str, optional): First ISO day to include (by DATE_COLUMNS).
+            end_day (str, optional): Last ISO day to include.
+            member_id (int, optional): Only rows for this member.
+
+        Returns:
+            list: Up to 'limit' row tuples ([] if failed/table not allowed).
+        """
+        if table_name not in ALLOWED_TABLES:
+            logger.warning("Denied query to non-whitelisted table: %s", table_name)
+            return []
+        sql, params = self._filtered_query("*", table_name, start_day, end_day, member_id, after_id)
+        try:
+            return self.cursor.execute(sql + " ORDER BY id LIMIT ?", params + [limit]).fetchall()
+        except sqlite3.Error as e:
+            logger.error("Failed to read a page of %s: %s", table_name, e)
+            return []
+
+    def get_table_versions(self, tables):
+        """
+        Returns the change counters of the given tables.
+
+        Args:
+            tables (iterable): Table names (from ALLOWED_TABLES).
+
+        Returns:
+            dict: {table_name: version}
+        """
+        tables = [table for table in tables if table in ALLOWED_TABLES]
+        placeholders = ", ".join("?" for _ in tables)
+        try:
+            self.cursor.execute(f"SELECT table_name, version FROM TableVersions WHERE table_name IN ({placeholders})", tables)
+            return dict(self.cursor.fetchall())
+        except sqlite3.Error as e:
+            logger.error("Failed to read table versions: %s", e)
+            return {}
+
+    # --- Change Log ---
+
+    def get_last_change_seq(self):
+        """
+        Returns the newest ChangeLog sequence number (0 if there is none).
+        """
+        try:
+            self.cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM ChangeLog")
+            return self.cursor.fetchone()[0]
+        except sqlite3.Error as e:
+            logger.error("Failed to read the change log position: %s", e)
+            return 0
+
+    def get_changes(self, after_seq, limit=CHANGE_BATCH):
+        """
+        Reads the change log in order, starting after a sequence number.
+
+        Args:
+            after_seq (int): The last sequence number already seen.
+            limit (int): Maximum number of changes returned.
+
+        Returns:
+            list: (seq, table_name, action, row_id, member_id) tuples.
+        """
+        try:
+            cursor = self.new_cursor()
+            cursor.execute("SELECT seq, table_name, action, row_id, member_id FROM ChangeLog "
+                           "WHERE seq > ? ORDER BY seq LIMIT ?", (after_seq, limit))
+            return cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error("Failed to read the change log: %s", e)
+            return []
+
+    def prune_change_log(self, keep=CHANGE_LOG_KEEP):
+        """
+        Deletes all but the newest 'keep' change log entries. Entries not
+        yet exported to a sync peer (Branch_Sync) are kept as well.
+
+        Returns:
+            int: The number of entries deleted (0 on failure).
+        """
+        try:
+            deleted = self.run_write(lambda cursor: cursor.execute('''
+                DELETE FROM ChangeLog
+                WHERE seq <= (SELECT MAX(seq) FROM ChangeLog) - ?
+                  AND seq <= COALESCE((SELECT MIN(CAST(value AS INTEGER)) FROM SyncState
+                                       WHERE name LIKE 'exported:%'), seq)
+            ''', (keep,)).rowcount)
+            if deleted:
+                logger.info("Pruned %s old change log entries.", deleted)
+            return deleted
+        except sqlite3.Error as e:
+            logger.error("Failed to prune the change log: %s", e)
+            return 0
+
+    # --- Payment Ledger ---
+
+    def fill_payment_ledger(self, cursor):
+        """
+        Recomputes the payment ledger tables from the Payment table
+        (inside the caller's transaction).
+        """
+        cursor.execute("DELETE FROM PaymentMonthly")
+        cursor.execute("DELETE FROM PaymentMemberTotals")
+        cursor.execute(f'''
+            INSERT INTO PaymentMonthly (month, payment_method, payments, total)
+            SELECT {month_sql("payment_date")}, payment_method, COUNT(*), SUM(amount)
+            FROM Payment GROUP BY 1, 2
+        ''')
+        cursor.execute('''
+            INSERT INTO PaymentMemberTotals (member_id, payments, total)
+            SELECT member_id, COUNT(*), SUM(amount) FROM Payment GROUP BY member_id
+        ''')
+
+    def reconcile_payment_ledger(self, repair=True):
+        """
+        Compares the payment ledger with totals recomputed from every
+        payment, and rebuilds the ledger if they differ.
+
+        Args:
+            repair (bool): Rebuild the ledger when a difference is found.
+
+        Returns:
+            list: ('month'|'member', key, ledger (payments, total),
+                  actual (payments, total)) for every difference, or None
+                  if the check failed.
+        """
+        logger.info("Reconciling the payment ledger...")
+        month = month_sql("payment_date")
+        queries = (
+            ('month', f"SELECT {month} || ' ' || payment_method, COUNT(*), SUM(amount) FROM Payment GROUP BY 1",
+             "SELECT month || ' ' || payment_method, payments, total FROM PaymentMonthly"),
+            ('member', "SELECT member_id, COUNT(*), SUM(amount) FROM Payment GROUP BY member_id",
+             "SELECT member_id, payments, total FROM PaymentMemberTotals"),
+        )
+        try:
+            differences = []
+            cursor = self.new_cursor()
+            for kind, actual_sql, ledger_sql in queries:
+                actual = {row[0]: (row[1], row[2]) for row in cursor.execute(actual_sql).fetchall()}
+                ledger = {row[0]: (row[1], row[2]) for row in cursor.execute(ledger_sql).fetchall()}
+                for key in sorted(set(actual) | set(ledger), key=str):
+                    expected, recorded = actual.get(key, (0, 0.0)), ledger.get(key, (0, 0.0))
+                    if expected[0] != recorded[0] or abs(expected[1] - recorded[1]) > 0.005:
+                        differences.append((kind, key, recorded, expected))
+            if differences and repair:
+                self.run_write(self.fill_payment_ledger)
+                logger.warning("Payment ledger had %s differences; rebuilt from payments.", len(differences))
+            else:
+                logger.info("Payment ledger checked: %s differences.", len(differences))
+            return differences
+        except sqlite3.Error as e:
+            logger.error("Failed to reconcile the payment ledger: %s", e)
+            return None
+
+    def get_revenue_summary(self, today=None):
+        """
+        Revenue figures from the payment ledger.
+
+        Args:
+            today (datetime, optional): Reference date. Defaults to now.
+
+        Returns:
+            dict: (total, payments) tuples for 'this_month', 'last_month',
+                  'this_year' and 'all_time'.
+        """
+        today = today or datetime.now()
+        this_month = today.strftime('%Y-%m')
+        last_month = (today.replace(day=1) - timedelta(days=1)).strftime('%Y-%m')
+        try:
+            self.cursor.execute('''
+                SELECT COALESCE(SUM(CASE WHEN month = ? THEN total END), 0),
+                       COALESCE(SUM(CASE WHEN month = ? THEN payments END), 0),
+                       COALESCE(SUM(CASE WHEN month = ? THEN total END), 0),
+                       COALESCE(SUM(CASE WHEN month = ? THEN payments END), 0),
+                       COALESCE(SUM(CASE WHEN month >= ? THEN total END), 0),
+                       COALESCE(SUM(CASE WHEN month >= ? THEN payments END), 0),
+                       COALESCE(SUM(total), 0), COALESCE(SUM(payments), 0)
+                FROM PaymentMonthly
+            ''', (this_month, this_month, last_month, last_month, today.strftime('%Y-01'), today.strftime('%Y-01')))
+            row = self.cursor.fetchone()
+            return {'this_month': row[0:2], 'last_month': row[2:4], 'this_year': row[4:6], 'all_time': row[6:8]}
+        except sqlite3.Error as e:
+            logger.error("Failed to get the revenue summary: %s", e)
+            return {}
+
+    def get_member_payment_total(self, member_id):
+        """
+        A member's running payment total from the ledger.
+
+        Returns:
+            tuple: (total, payments), (0.0, 0) if they never paid.
+        """
+        try:
+            self.cursor.execute("SELECT total, payments FROM PaymentMemberTotals WHERE member_id = ?", (member_id,))
+            return self.cursor.fetchone() or (0.0, 0)
+        except sqlite3.Error as e:
+            logger.error("Failed to get payment total for member %s: %s", member_id, e)
+            return (0.0, 0)
+
+    # --- Membership Plans ---
+
+    def get_membership_plans(self):
+        """
+        Returns every membership plan, shortest first.
+
+        Returns:
+            list: A list of (name, duration_days, price, grace_days) tuples.
+        """
+        try:
+            self.cursor.execute('''
+                SELECT name, duration_days, price, grace_days
+                FROM MembershipPlans
+                ORDER BY duration_days, name
+            ''')
+            return self.cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error("Failed to get membership plans: %s", e)
+            return []
+
+    def save_membership_plan(self, name, duration_days, price, grace_days=0):
+        """
+        Adds a membership plan, or changes the plan with that name.
+        Members keep their current dates until they renew.
+
+        Returns:
+            bool: True on success, False otherwise.
+        """
+        logger.info("Saving membership plan %s: %s days, %s, %s grace days", name, duration_days, price, grace_days)
+        try:
+            self.execute_write('''
+                INSERT INTO MembershipPlans (name, duration_days, price, grace_days) VALUES (?, ?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET duration_days = excluded.duration_days,
+                    price = excluded.price, grace_days = excluded.grace_days
+            ''', (name, duration_days, price, grace_days))
+            return True
+        except sqlite3.Error as e:
+            logger.error("Failed to save membership plan %s: %s", name, e)
+            return False
+
+    def expire_memberships(self, today=None):
+        """
+        Marks 'PAID' members whose membership ended more than their plan's
+        grace period ago as 'UNPAID', in one UPDATE. Members on a type
+        that is not in MembershipPlans get no grace period.
+
+        Args:
+            today (datetime, optional): Reference date. Defaults to now.
+
+        Returns:
+            int: The number of members marked 'UNPAID' (0 on failure).
+        """
+        today = (today or datetime.now()).strftime('%Y-%m-%d')
+        end_day = iso_date_sql("membership_end_date")
+        try:
+            expired = self.run_write(lambda cursor: cursor.execute(f'''
+                UPDATE Members SET member_status = 'UNPAID'
+                WHERE member_status = 'PAID' AND length(membership_end_date) = 10
+                  AND date({end_day}, '+' || IFNULL((SELECT P.grace_days FROM MembershipPlans AS P
+                                                     WHERE P.name = Members.membership_type), 0) || ' days') < ?
+            ''', (today,)).rowcount)
+            logger.info("Membership expiry sweep: %s members marked UNPAID.", expired)
+            return expired
+        except sqlite3.Error as e:
+            logger.error("Failed to expire memberships: %s", e)
+            return 0
+
+    def get_expected_renewals(self, start_day, end_day):
+        """
+        Memberships ending in a date range and what their renewals should
+        bring in at current plan prices. 'Closed' members are left out.
+
+        Args:
+            start_day (str): First ISO day of the range.
+            end_day (str): Last ISO day of the range.
+
+        Returns:
+            list: A list of (plan name, price, members, expected amount)
+                  tuples, one per plan, shortest plan first.
+        """
+        member_end_day = iso_date_sql("M.membership_end_date")
+        try:
+            self.cursor.execute(f'''
+                SELECT P.name, P.price, COUNT(M.id), COUNT(M.id) * P.price
+                FROM MembershipPlans AS P
+                LEFT JOIN Members AS M
+                  ON M.membership_type = P.name
+                 AND IFNULL(M.member_status, '') != 'Closed'
+                 AND length(M.membership_end_date) = 10
+                 AND {member_end_day} BETWEEN ? AND ?
+                GROUP BY P.name
+                ORDER BY P.duration_days, P.name
+            ''', (start_day, end_day))
+            return self.cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error("Failed to get expected renewals: %s", e)
+            return []
+
+    # --- Reporting (Rollup) Queries ---
+
+    def rebuild_attendance_rollups(self):
+        """
+        Recomputes AttendanceDaily and AttendanceHourly from the full
+        attendance history (the hot table and the archive). Needed once for
+        databases created before the rollups existed, or if the rollups are
+        ever suspected to be off.
+
+        Returns:
+            bool: True on success, False otherwise.
+        """
+        logger.info("Rebuilding attendance rollups from full history...")
+        try:
+            def rebuild(cursor):
+                cursor.execute("DELETE FROM AttendanceDaily")
+                cursor.execute("DELETE FROM AttendanceHourly")
+                cursor.execute(f'''
+                    INSERT INTO AttendanceDaily (member_id, day, visits)
+                    SELECT member_id, {iso_date_sql("date")}, COUNT(*)
+                    FROM {ARCHIVE_VIEW}
+                    WHERE member_id IN (SELECT id FROM Members)
+                    GROUP BY 1, 2
+                ''')
+                cursor.execute(f'''
+                    INSERT INTO AttendanceHourly (day, hour, visits)
+                    SELECT {iso_date_sql("date")}, {hour_sql("check_in_time")}, COUNT(*)
+                    FROM {ARCHIVE_VIEW}
+                    GROUP BY 1, 2
+                ''')
+            self.run_write(rebuild, local=True) # The view lives on this connection
+            logger.info("Attendance rollups rebuilt.")
+            return True
+        except sqlite3.Error as e:
+            logger.error("Failed to rebuild attendance rollups: %s", e)
+            return False
+
+    def get_peak_hours(self, start_day=None, end_day=None):
+        """
+        Total visits per hour of day, read from the hourly rollup.
+
+        Args:
+            start_day (str, optional): First ISO day ('YYYY-MM-DD') to include.
+            end_day (str, optional): Last ISO day to include.
+
+        Returns:
+            list: A list of (hour, visits) tuples ordered by hour.
+        """
+        logger.info("Fetching peak hours (%s to %s)", start_day, end_day)
+        try:
+            self.cursor.execute('''
+                SELECT hour, SUM(visits) FROM AttendanceHourly
+                WHERE day >= IFNULL(?, day) AND day <= IFNULL(?, day)
+                GROUP BY hour ORDER BY hour
+            ''', (start_day, end_day))
+            return self.cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error("Failed to get peak hours: %s", e)
+            return []
+
+    def get_member_visit_counts(self, start_day, end_day):
+        """
+        Visits per member in a date range (e.g. "visits this month").
+
+        Args:
+            start_day (str): First ISO day ('YYYY-MM-DD') to include.
+            end_day (str): Last ISO day to include.
+
+        Returns:
+            list: A list of (member_id, full_name, visits) tuples, busiest first.
+        """
+        logger.info("Fetching visit counts per member (%s to %s)", start_day, end_day)
+        try:
+            self.cursor.execute('''
+                SELECT D.member_id, M.full_name, SUM(D.visits) AS total
+                FROM AttendanceDaily AS D
+                JOIN Members AS M ON D.member_id = M.id
+                WHERE D.day BETWEEN ? AND ?
+                GROUP BY D.member_id
+                ORDER BY total DESC
+            ''', (start_day, end_day))
+            return self.cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error("Failed to get member visit counts: %s", e)
+            return []
+
+    def get_inactive_members(self, days=30):
+        """
+        Members (not 'Closed') with no visit in the last `days` days,
+        including members who have never checked in.
+
+        Args:
+            days (int): Inactivity window in days.
+
+        Returns:
+            list: A list of (member_id, full_name, last_visit_day) tuples.
+                  last_visit_day is None for members who never checked in.
+        """
+        cutoff = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+        logger.info("Fetching members inactive since %s", cutoff)
+        try:
+            self.cursor.execute('''
+                SELECT M.id, M.full_name, MAX(D.day) AS last_visit
+                FROM Members AS M
+                LEFT JOIN AttendanceDaily AS D ON D.member_id = M.id
+                WHERE IFNULL(M.member_status, '') != 'Closed'
+                GROUP BY M.id
+                HAVING last_visit IS NULL OR last_visit < ?
+                ORDER BY last_visit
+            ''', (cutoff,))
+            return self.cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error("Failed to get inactive members: %s", e)
+            return []
+
+    def get_daily_visit_totals(self, start_day, end_day):
+        """
+        Total visits per day in a date range, read from the hourly rollup.
+
+        Args:
+            start_day (str): First ISO day ('YYYY-MM-DD') to include.
+            end_day (str): Last ISO day to include.
+
+        Returns:
+            list: A list of (day, visits) tuples ordered by day.
+        """
+        logger.info("Fetching daily visit totals (%s to %s)", start_day, end_day)
+        try:
+            self.cursor.execute('''
+                SELECT day, SUM(visits) FROM AttendanceHourly
+                WHERE day BETWEEN ? AND ?
+                GROUP BY day ORDER BY day
+            ''', (start_day, end_day))
+            return self.cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error("Failed to get daily visit totals: %s", e)
+            return []
+
+    def get_hourly_visits(self, start_day, end_day):
+        """
+        Raw hourly rollup rows in a date range (for weekday/hour heatmaps).
+
+        Args:
+            start_day (str): First ISO day ('YYYY-MM-DD') to include.
+            end_day (str): Last ISO day to include.
+
+        Returns:
+            list: A list of (day, hour, visits) tuples.
+        """
+        logger.info("Fetching hourly visits (%s to %s)", start_day, end_day)
+        try:
+            self.cursor.execute('''
+                SELECT day, hour, visits FROM AttendanceHourly
+                WHERE day BETWEEN ? AND ?
+            ''', (start_day, end_day))
+            return self.cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error("Failed to get hourly visits: %s", e)
+            return []
+
+    def get_revenue_by_month(self):
+        """
+        Payment totals grouped by month ('YYYY-MM') and payment method.
+
+        Returns:
+            list: A list of (month, payment_method, total_amount, payment_count) tuples.
+        """
+        logger.info("Fetching revenue by month and payment method...")
+        try:
+            # Read from the ledger (one row per month and method)
+            self.cursor.execute('''
+                SELECT month, payment_method, total, payments
+                FROM PaymentMonthly
+                ORDER BY month
+            ''')
+            return self.cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error("Failed to get revenue by month: %s", e)
+            return []
+
+    def get_member_activity(self, recent_start_day, prior_start_day):
+        """
+        Per-member activity summary used for churn-risk scoring.
+        Only members that are not 'Closed' are included.
+
+        Args:
+            recent_start_day (str): ISO day where the "recent" window starts.
+            prior_start_day (str): ISO day where the "prior" window starts
+                                   (it ends where the recent window starts).
+
+        Returns:
+            list: A list of (member_id, full_name, membership_end_day,
+                  last_visit_day, recent_visits, prior_visits) tuples.
+                  Both days are ISO strings (or None).
+        """
+        logger.info("Fetching member activity (recent from %s, prior from %s)", recent_start_day, prior_start_day)
+        try:
+            end_day = iso_date_sql("M.membership_end_date")
+            self.cursor.execute(f'''
+                SELECT M.id, M.full_name,
+                       CASE WHEN length(M.membership_end_date) = 10 THEN {end_day} END,
+                       MAX(D.day),
+                       IFNULL(SUM(CASE WHEN D.day >= ? THEN D.visits END), 0),
+                       IFNULL(SUM(CASE WHEN D.day >= ? AND D.day < ? THEN D.visits END), 0)
+                FROM Members AS M
+                LEFT JOIN AttendanceDaily AS D ON D.member_id = M.id
+                WHERE IFNULL(M.member_status, '') != 'Closed'
+                GROUP BY M.id
+            ''', (recent_start_day, prior_start_day, recent_start_day))
+            return self.cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error("Failed to get member activity: %s", e)
             return []
 
     # --- Update Operations ---
@@ -303,21 +1659,81 @@ class DatabaseManager:
             new_data (any): The new value to set.
         """
         if table_name not in ALLOWED_TABLES:
-            print(f"[SECURITY] Denied update to non-whitelisted table: {table_name}")
+            logger.warning("Denied update to non-whitelisted table: %s", table_name)
             return
         if field_name not in ALLOWED_FIELDS[table_name]:
-            print(f"[SECURITY] Denied update to non-whitelisted field: {field_name}")
+            logger.warning("Denied update to non-whitelisted field: %s", field_name)
             return
 
-        print(f"[INFO] Updating {table_name}.{field_name} for row ID {row_id}")
+        logger.info("Updating %s.%s for row ID %s", table_name, field_name, row_id)
         try:
-            self.cursor.execute(f'''
+            self.execute_write(f'''
                 UPDATE {table_name} SET {field_name}=? WHERE id=?
             ''', (new_data, row_id))
-            self.conn.commit()
-            print("[SUCCESS] Record updated successfully.")
+            logger.info("Record updated successfully.")
         except sqlite3.Error as e:
-            print(f"[ERROR] Failed to update record: {e}")
+            logger.error("Failed to update record: %s", e)
+
+    def update_fields_by_id(self, table_name, row_id, changes):
+        """
+        Securely updates several fields of one row with a single UPDATE
+        and a single commit.
+
+        Args:
+            table_name (str): The table to update (must be in ALLOWED_TABLES).
+            row_id (int): The primary key (the 'id' column) of the row to update.
+            changes (dict): {field_name: new_value}; every field must be in ALLOWED_FIELDS.
+
+        Returns:
+            bool: True on success, False otherwise.
+        """
+        return self.apply_changes(updates=[(table_name, row_id, changes)])
+
+    def apply_changes(self, updates=(), inserts=()):
+        """
+        Applies several whitelisted row updates and inserts atomically:
+        one transaction and one commit. If any statement fails, nothing
+        is written.
+
+        Args:
+            updates (iterable): (table_name, row_id, {field: value}) tuples.
+            inserts (iterable): (table_name, {field: value}) tuples.
+
+        Returns:
+            bool: True if everything was committed, False otherwise.
+        """
+        updates = list(updates)
+        inserts = list(inserts)
+
+        # Validate everything before touching the database
+        for table_name, fields in [(u[0], u[2]) for u in updates] + inserts:
+            if table_name not in ALLOWED_TABLES:
+                logger.warning("Denied change to non-whitelisted table: %s", table_name)
+                return False
+            denied = set(fields) - ALLOWED_FIELDS[table_name]
+            if denied or not fields:
+                logger.warning("Denied change to non-whitelisted field(s): %s", sorted(denied))
+                return False
+
+        logger.info("Applying %s update(s) and %s insert(s) in one transaction", len(updates), len(inserts))
+        try:
+            def apply(cursor):
+                for table_name, fields in inserts:
+                    columns = ", ".join(fields)
+                    placeholders = ", ".join("?" * len(fields))
+                    cursor.execute(f"INSERT INTO {table_name} (id, {columns}) "
+                                   f"VALUES ({next_id_sql(table_name)}, {placeholders})",
+                                   tuple(fields.values()))
+                for table_name, row_id, fields in updates:
+                    assignments = ", ".join(f"{field}=?" for field in fields)
+                    cursor.execute(f"UPDATE {table_name} SET {assignments} WHERE id=?",
+                                   tuple(fields.values()) + (row_id,))
+            self.run_write(apply)
+            logger.info("Changes committed.")
+            return True
+        except sqlite3.Error as e:
+            logger.error("Failed to apply changes, transaction rolled back: %s", e)
+            return False
 
     # --- Delete Operations ---
 
@@ -326,17 +1742,23 @@ class DatabaseManager:
         Deletes a member from the Members table.
         Due to 'ON DELETE CASCADE', all associated records in
         Attendance and Payment will be deleted automatically by the database.
+        Archived check-ins (which have no foreign key) are deleted explicitly.
 
         Args:
             member_id (int): The ID of the member to delete.
         """
-        print(f"[WARN] Attempting to fully delete member ID: {member_id} and all related data.")
+        logger.warning("Attempting to fully delete member ID: %s and all related data.", member_id)
         try:
-            self.cursor.execute("DELETE FROM Members WHERE id=?", (member_id,))
-            self.conn.commit()
-            print(f"[SUCCESS] User {member_id} deleted successfully from Members (and all related tables).")
+            archived = self.archive_tables()
+
+            def delete(cursor):
+                cursor.execute("DELETE FROM Members WHERE id=?", (member_id,))
+                for table in archived:
+                    cursor.execute(f"DELETE FROM {ARCHIVE_SCHEMA}.{table} WHERE member_id=?", (member_id,))
+            self.run_write(delete, local=bool(archived))
+            logger.info("User %s deleted successfully from Members (and all related tables).", member_id)
         except sqlite3.Error as e:
-            print(f"[ERROR] Failed to fully delete member: {e}")
+            logger.error("Failed to fully delete member: %s", e)
 
     def minimal_delete_member(self, member_id):
         """
@@ -346,23 +1768,25 @@ class DatabaseManager:
         Args:
             member_id (int): The ID of the member to "close".
         """
-        print(f"[INFO] Setting member status to 'Closed' for ID: {member_id}")
+        logger.info("Setting member status to 'Closed' for ID: %s", member_id)
         # --- BUG FIX ---
         # Was: WHERE member_id=? (which doesn't exist on Members)
         # Now: WHERE id=?
         try:
-            self.cursor.execute("UPDATE Members SET member_status=? WHERE id=?", ("Closed", member_id))
-            self.conn.commit()
-            print("[SUCCESS] User status set to 'Closed'.")
+            self.execute_write("UPDATE Members SET member_status=? WHERE id=?", ("Closed", member_id))
+            logger.info("User status set to 'Closed'.")
         except sqlite3.Error as e:
-            print(f"[ERROR] Failed to minimally delete member: {e}")
+            logger.error("Failed to minimally delete member: %s", e)
 
     def close_connection(self):
         """
         Closes the database connection if it is open.
         """
         if self.conn:
-            print("[INFO] Closing database connection.")
+            if self.profiler is not None and self.profiler.records:
+                logger.info("%s", self.profiler.report())
+                self.profiler.dump()
+            logger.info("Closing database connection.")
             self.conn.close()
             self.conn = None # Set to None to prevent reuse
 
@@ -437,4 +1861,6 @@ def main():
     print("\n--- Test Finished ---")
 
 if __name__ == "__main__":
+    import App_Logging
+    App_Logging.setup_logging()
     main()
@@ -1,20 +1,30 @@
-from PIL import Image, ImageTk
 import customtkinter as ctk
 from tkinter import ttk
 import Manage_Data
-import face_recognition
 import cv2
-import os
 import numpy as np
 import datetime
 import CTkMessagebox
+import platform
+import Recognition_Stats
+import Detection_Region
+import Frame_Renderer
+import Camera_Service
+import Recognition_Engine
+import Member_Directory
+import Event_Bus
+import logging
 import sys # Added for safe exit on critical error
 
+logger = logging.getLogger(__name__)
+
 # --- Constants ---
 BUTTON_FONT = ("Poppins", 20)
 LABEL_FONT = ("Poppins", 16)
 MESSAGE_BOX = CTkMessagebox.CTkMessagebox
 PHOTO_DIR = "Members Photo"
+PREVIEW_SIZE = 300 # Camera preview is PREVIEW_SIZE x PREVIEW_SIZE pixels
+ROI_COLOR = (0, 255, 0)
 
 class MarkAttendance(ctk.CTkToplevel):
     """
@@ -28,34 +38,42 @@ class MarkAttendance(ctk.CTkToplevel):
         and camera state.
         """
         super().__init__(parent)
-        print("[INFO] Initializing 'Mark Attendance' window...")
+        logger.info("Initializing 'Mark Attendance' window...")
         self.title("Mark Attendance")
         self.geometry("1400x750")
         ctk.set_appearance_mode('dark')
 
         try:
             self.db = Manage_Data.DatabaseManager("GYM.db")
-            # Load all members into a dictionary for quick name lookup
-            # This is the "member map"
-            all_members = self.db.get_all_from_table('Members')
-            # Creates a map like {1: 'Tony Stark', 2: 'Steve Rogers'}
-            self.member_map = {member[0]: member[1] for member in all_members}
-            print(f"[INFO] Created member map with {len(self.member_map)} members.")
+            # Shared member lookup (names by id, members by phone)
+            self.members = Member_Directory.get_directory(self.db)
+            self.bus = Event_Bus.get_bus(self.db) # Row-level change notifications
             
         except Exception as e:
-            print(f"[CRITICAL] MarkAttendance: Failed to load database: {e}")
+            logger.critical("MarkAttendance: Failed to load database: %s", e)
             MESSAGE_BOX(title="Critical Error", message=f"Could not load database: {e}", icon="cancel")
             self.destroy()
             return
 
         self.is_recognizing = False  # Flag to control the camera loop
-        self.recognition_data = {"encodings": [], "ids": []} # Holds known faces
-        self.recognized_ids = set()  # Prevents duplicate entries in one session
-        self.cap = None # Will hold the cv2.VideoCapture object
-        self.frame_count = 0  # For frame skipping (performance)
+        self.camera = Camera_Service.get_camera() # Shared with the New Member window
+        self.camera_subscribed = False
+        self.last_sequence = 0 # Camera frame number last shown
+        self.region = Detection_Region.DetectionRegion() # Where members stand (detection crop)
+        self.auto_roi = ctk.BooleanVar(value=self.region.settings['auto_learn'])
+        self.drag_start = None # Preview position where an ROI drag began
+        self.drag_rect = None  # ROI being dragged, in frame fractions
+        self.stats = Recognition_Stats.RecognitionStats() # Per-stage pipeline timings
+        self.show_stats = ctk.BooleanVar(value=False) # Draw the timing overlay on the feed
+        # Known faces, detection, matching and check-ins (shared with the headless kiosk)
+        self.engine = Recognition_Engine.RecognitionEngine(self.db, PHOTO_DIR, directory=self.members,
+                                                          region=self.region, stats=self.stats)
 
         self.layout()
+        self.renderer = Frame_Renderer.FrameRenderer(self.camera_label, PREVIEW_SIZE, PREVIEW_SIZE)
         self.update_table() # Populate the table on startup
+        # Patch the table when check-ins (or member names) change
+        self.bus.subscribe(self.on_change, tables=("Attendance", "Members"))
 
         # Set a custom close action
         self.protocol("WM_DELETE_WINDOW", self.on_close)
@@ -85,7 +103,7 @@ class MarkAttendance(ctk.CTkToplevel):
         """
         Creates and places all widgets for the MarkAttendance window.
         """
-        print("[INFO] Building 'Mark Attendance' layout...")
+        logger.info("Building 'Mark Attendance' layout...")
         # --- Left Panel (Info and Buttons) ---
         infoFrame = ctk.CTkScrollableFrame(self, fg_color='transparent')
 
@@ -94,6 +112,27 @@ class MarkAttendance(ctk.CTkToplevel):
         self.camera_label = ctk.CTkLabel(infoFrame, text='Camera Feed', font=BUTTON_FONT, width=300, height=300, fg_color="gray20", corner_radius=10)
         self.camera_label.pack(padx=20, pady=20, anchor='n')
 
+        # --- Performance Overlay ---
+        stats_frame = ctk.CTkFrame(infoFrame, fg_color='transparent')
+        ctk.CTkCheckBox(stats_frame, text='Show Stats', font=LABEL_FONT,
+                        variable=self.show_stats).pack(side='left', padx=5)
+        ctk.CTkButton(stats_frame, text='Save Metrics', font=LABEL_FONT, width=120,
+                      fg_color="#fff", corner_radius=7, text_color='#000000',
+                      hover_color="#CAF4FF", command=self.save_metrics).pack(side='left', padx=5)
+        stats_frame.pack(padx=20, anchor='w')
+
+        # --- Detection Region (drag on the preview to set it) ---
+        roi_frame = ctk.CTkFrame(infoFrame, fg_color='transparent')
+        ctk.CTkCheckBox(roi_frame, text='Auto ROI', font=LABEL_FONT, variable=self.auto_roi,
+                        command=self.toggle_auto_roi).pack(side='left', padx=5)
+        ctk.CTkButton(roi_frame, text='Clear ROI', font=LABEL_FONT, width=120,
+                      fg_color="#fff", corner_radius=7, text_color='#000000',
+                      hover_color="#CAF4FF", command=self.clear_roi).pack(side='left', padx=5)
+        roi_frame.pack(padx=20, pady=(5, 0), anchor='w')
+        self.camera_label.bind("<ButtonPress-1>", self.start_roi_drag)
+        self.camera_label.bind("<B1-Motion>", self.update_roi_drag)
+        self.camera_label.bind("<ButtonRelease-1>", self.finish_roi_drag)
+
         # --- Manual Entry Fields ---
         entryFrame = ctk.CTkFrame(infoFrame, fg_color='transparent')
         self.full_name_entry = self.labelEntry_Component(entryFrame, 'Full Name', 'Tony Stark')
@@ -160,9 +199,9 @@ class MarkAttendance(ctk.CTkToplevel):
     def update_table(self):
         """
         Clears and repopulates the attendance table.
-        Uses the 'self.member_map' to show the correct name for each 'member_id'.
+        Uses the member directory to show the correct name for each 'member_id'.
         """
-        print("[INFO] Refreshing attendance table...")
+        logger.info("Refreshing attendance table...")
         # Clear existing items
         for item in self.table.get_children():
             self.table.delete(item)
@@ -171,23 +210,32 @@ class MarkAttendance(ctk.CTkToplevel):
             # 1. Get all attendance records (they don't have names)
             all_attendance = self.db.get_all_from_table('Attendance')
             
-            # 2. Populate table
-            for row in all_attendance:
-                # row = (id, member_id, date, check_in_time)
-                member_id = row[1]
-                # Look up the name from the map we created in __init__
-                member_name = self.member_map.get(member_id, f"ID {member_id} Not Found")
+            # 2. Populate table (names from the shared member directory)
+            for values in self.members.named_rows(all_attendance):
+                self.table.insert(parent='', index='end', iid=str(values[0]), values=values)
                 
-                # Build the row to match table columns
-                display_row = (row[0], member_id, member_name, row[2], row[3])
-                self.table.insert(parent='', index='end', values=display_row)
-                
-            print(f"[INFO] Table refreshed with {len(all_attendance)} attendance records.")
+            logger.info("Table refreshed with %s attendance records.", len(all_attendance))
         
         except Exception as e:
-            print(f"[ERROR] Failed to refresh attendance table: {e}")
+            logger.error("Failed to refresh attendance table: %s", e)
             MESSAGE_BOX(title="Error", message=f"Failed to load attendance data:\n{e}", icon="cancel")
 
+    def on_change(self, change):
+        """
+        Event bus subscriber: updates, adds or removes the changed check-in
+        and keeps member names current.
+
+        Args:
+            change (Event_Bus.Change): A change to Attendance or Members.
+        """
+        if change.table_name == "Members":
+            Event_Bus.patch_member_name(self.table, change)
+            return
+        values = None
+        if change.row is not None:
+            values = self.members.named_row(change.row)
+        Event_Bus.patch_row(self.table, change, values)
+
     def entry_attendance(self, member_id=0):
         """
         Adds an attendance record to the database.
@@ -204,7 +252,7 @@ class MarkAttendance(ctk.CTkToplevel):
         try:
             if member_id == 0:
                 # --- Manual Entry ---
-                print("[INFO] Attempting manual attendance entry...")
+                logger.info("Attempting manual attendance entry...")
                 name = self.full_name_entry.get().strip().title()
                 dob = self.dob_entry.get().strip()
                 phone = self.phone_entry.get().strip()
@@ -216,133 +264,94 @@ class MarkAttendance(ctk.CTkToplevel):
                     MESSAGE_BOX(title="Error", message="Phone Number must be 10 digits", icon="cancel")
                     return
 
-                # Use the new secure function
-                data = self.db.get_member_by_details(name, dob, phone)
+                member = self.members.find(name, dob, phone)
                 
-                if data:
-                    member_id_found = data[0] # Get the ID
-                    member_name = data[1] # Get the Name
+                if member:
+                    member_id_found = member.id
+                    member_name = member.full_name
                     
                     # Use new relational function (no name)
                     self.db.insert_attendance(member_id_found, date_str, time_str)
                     
+                    self.bus.poll(self.db) # Adds the new check-in to the table
                     MESSAGE_BOX(title="Success", message=f"Attendance marked for {member_name} at {time_str}", icon="check")
-                    self.update_table() # Refresh table with new data
                 else:
                     MESSAGE_BOX(title="Error", message="Member not found", icon="cancel")
             
             else:
                 # --- Auto Entry from Recognition ---
-                print(f"[INFO] Attempting auto attendance for member ID: {member_id}")
+                logger.info("Attempting auto attendance for member ID: %s", member_id)
                 
                 # We already have the member_id, just need to log it
-                # We can get the name from our map for the print log
-                member_name = self.member_map.get(int(member_id), f"ID {member_id}")
+                # We can get the name from the directory for the print log
+                member_name = self.members.name(member_id, f"ID {member_id}")
 
-                # Use new relational function (no name)
-                self.db.insert_attendance(int(member_id), date_str, time_str)
-                
-                print(f"[SUCCESS] Attendance marked for ID {member_id} ({member_name}) at {time_str}")
+                if not self.engine.check_in(member_id):
+                    raise Exception("The attendance record could not be saved.")
                 
+                self.bus.poll(self.db) # Adds the new check-in to the table
                 # Show a non-blocking success message
                 MESSAGE_BOX(title="Success", message=f"Welcome, {member_name}!", icon="check", sound=True)
-                
-                self.update_table()
 
         except Exception as e:
-            print(f"[ERROR] Failed to insert attendance for ID {member_id}: {e}")
+            logger.error("Failed to insert attendance for ID %s: %s", member_id, e)
             MESSAGE_BOX(title="Error", message=f"Failed to save attendance:\n{e}", icon="cancel")
 
     # ------------------ Recognition ------------------
 
-    def load_known_faces(self):
-        """
-        Loads all member photos from the 'Members Photo' directory,
-        encodes them, and stores them in self.recognition_data.
-        """
-        folder = PHOTO_DIR
-        encodings = []
-        ids = []
-        self.recognized_ids.clear() # Clear previously recognized IDs for this session
-        
-        if not os.path.exists(folder):
-            print(f"[ERROR] '{folder}' directory not found. Cannot load faces.")
-            MESSAGE_BOX(title="Error", message=f"Directory not found: {folder}", icon="cancel")
-            return
-
-        print("[INFO] Loading known faces...")
-        for file in os.listdir(folder):
-            if file.lower().endswith(('.jpg', '.jpeg', '.png')):
-                path = os.path.join(folder, file)
-                try:
-                    image = cv2.imread(path)
-                    if image is None:
-                        print(f"[WARN] Could not read {path}, skipping.")
-                        continue
-                        
-                    rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-                    
-                    # Use face_locations to be more robust
-                    boxes = face_recognition.face_locations(rgb, model='hog') # 'cnn' is more accurate but slower
-                    
-                    if len(boxes) > 0:
-                        # Use the first face found
-                        faces = face_recognition.face_encodings(rgb, known_face_locations=boxes)
-                        if faces:
-                            encodings.append(faces[0])
-                            ids.append(os.path.splitext(file)[0])  # Get ID from filename
-                    else:
-                        print(f"[INFO] No face found in {file}, skipped.")
-                        
-                except Exception as e:
-                    print(f"[ERROR] Failed to process {path}: {e}")
-
-        self.recognition_data["encodings"] = encodings
-        self.recognition_data["ids"] = ids
-        print(f"[INFO] Loaded {len(encodings)} known faces.")
-
     def start_recognition(self):
         """
         Called by the 'Start Recognition' button.
         Loads faces and starts the camera feed loop.
         """
-        print("[INFO] 'Start Recognition' clicked.")
-        # 1. Load faces
-        self.load_known_faces()
-        
+        logger.info("'Start Recognition' clicked.")
+        # 1. Load faces and the face detector (calibrated once per machine)
+        try:
+            count = self.engine.start()
+        except FileNotFoundError as e:
+            logger.error("Cannot load faces: %s", e)
+            MESSAGE_BOX(title="Error", message=str(e), icon="cancel")
+            return
+
         # 2. Check if we have faces to recognize
-        if not self.recognition_data["encodings"]:
+        if not count:
             MESSAGE_BOX(title="Error", message="No known faces found. Please add member photos.", icon="cancel")
             return
-            
+
         # 3. Start camera and loop
-        try:
-            self.cap = cv2.VideoCapture(0, cv2.CAP_DSHOW) # CAP_DSHOW is more stable on Windows
-            if not self.cap.isOpened():
-                print("[ERROR] Cannot open webcam.")
-                MESSAGE_BOX(title="Error", message="Cannot open webcam.", icon="cancel")
-                return
-        except Exception as e:
-            print(f"[ERROR] Failed to open webcam: {e}")
-            MESSAGE_BOX(title="Error", message=f"Failed to open webcam:\n{e}", icon="cancel")
+        self.camera.subscribe()
+        self.camera_subscribed = True
+        if not self.camera.wait_ready():
+            error = self.camera.error or "No frames received."
+            logger.error("Cannot open webcam: %s", error)
+            self.release_camera()
+            MESSAGE_BOX(title="Error", message=f"Cannot open webcam.\n{error}", icon="cancel")
             return
             
-        print("[INFO] Camera started.")
+        logger.info("Camera started.")
         self.camera_label.configure(text="")
         self.start_recognition_button.configure(state="disabled")
         self.stop_recognition_button.configure(state="normal")
         
-        self.frame_count = 0
+        self.last_sequence = 0
         self.is_recognizing = True
         self.process_frame() # Start the loop
 
 
+    def release_camera(self):
+        """
+        Stops using the shared camera (it closes once no window needs it).
+        """
+        if self.camera_subscribed:
+            self.camera.unsubscribe()
+            self.camera_subscribed = False
+
     def stop_recognition(self):
         """
         Called by the 'Stop Recognition' button.
         Sets the flag to stop the camera loop.
         """
-        print("[INFO] 'Stop Recognition' clicked.")
+        logger.info("'Stop Recognition' clicked.")
         self.is_recognizing = False
         # The loop in process_frame will see this and stop itself.
         
@@ -354,70 +363,120 @@ class MarkAttendance(ctk.CTkToplevel):
         """
         # 1. Check if we should stop
         if not self.is_recognizing:
-            print("[INFO] Stopping recognition loop.")
-            if self.cap:
-                self.cap.release()
-                self.cap = None
-            self.camera_label.configure(text="Camera Feed", image=None)
+            logger.info("Stopping recognition loop.")
+            self.release_camera()
+            self.engine.stop() # Keeps a learned detection region for next time
+            self.renderer.clear("Camera Feed")
             self.start_recognition_button.configure(state="normal")
             self.stop_recognition_button.configure(state="disabled")
             return # Exit the loop
 
-        # 2. Read frame
-        ret, frame = self.cap.read()
-        if not ret:
-            print("[WARN] Cannot read frame, stopping.")
+        # 2. Take the newest frame from the shared camera
+        sequence, frame = self.camera.latest()
+        if frame is None:
+            logger.warning("Cannot read frame, stopping.")
             self.is_recognizing = False # Trigger stop
-        else:
+        elif sequence != self.last_sequence: # Skip if the camera has no new frame yet
+            self.last_sequence = sequence
+            # The device read happens on the camera thread; report its time here
+            read_seconds = self.camera.read_time(sequence)
+            if read_seconds is not None:
+                self.stats.record("capture", read_seconds)
             try:
-                self.frame_count += 1
-                
-                # 3. --- Perform expensive recognition only every 5 frames ---
-                if self.frame_count % 5 == 0:
-                    # Resize for *processing* (faster)
-                    small_frame = cv2.resize(frame, (0, 0), fx=0.25, fy=0.25)
-                    rgb_small = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
-                    
-                    # Find all faces in the *current* frame
-                    face_encodings = face_recognition.face_encodings(rgb_small)
-
-                    for face_encoding in face_encodings:
-                        # Compare against known faces
-                        matches = face_recognition.compare_faces(self.recognition_data["encodings"], face_encoding)
-                        
-                        if True in matches:
-                            idx = matches.index(True)
-                            member_id = self.recognition_data["ids"][idx]
-                            
-                            # Check if we've *already* marked this person in this session
-                            if member_id not in self.recognized_ids:
-                                self.recognized_ids.add(member_id)
-                                print(f"[INFO] Recognized member {member_id}")
-                                # Run DB insert *without* blocking the GUI loop
-                                self.after(0, self.entry_attendance, member_id)
+                # 3. --- Recognize (the engine only does the expensive work every 5th frame) ---
+                for event in self.engine.process(frame, check_in=False):
+                    # Run DB insert *without* blocking the GUI loop
+                    self.after(0, self.entry_attendance, event['member_id'])
 
                 # 4. --- Display frame (every time for smooth video) ---
-                display_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                # Resize for *display* (to fit the 300x300 label)
-                display_frame = cv2.resize(display_frame, (300, 300))
-                
-                img = Image.fromarray(display_frame)
-                img_tk = ImageTk.PhotoImage(img)
-                self.camera_label.configure(image=img_tk)
-                self.camera_label.image = img_tk
+                with self.stats.measure("render"):
+                    # Resized for *display* into reused buffers (to fit the 300x300 label)
+                    self.renderer.render(frame, self.draw_preview_overlays)
+                self.stats.tick_frame()
             
             except Exception as e:
-                print(f"[ERROR] Error in frame processing: {e}")
+                logger.error("Error in frame processing: %s", e)
 
         # 5. Schedule the next frame
         self.after(20, self.process_frame) # ~50fps target (GUI only, processing is 1/5 of this)
         
+    # ------------------ Detection Region ------------------
+
+    def preview_fraction(self, event):
+        """
+        Converts a mouse position on the preview into frame fractions.
+        """
+        return event.x / float(PREVIEW_SIZE), event.y / float(PREVIEW_SIZE)
+
+    def start_roi_drag(self, event):
+        """Starts dragging a new detection region on the preview."""
+        self.drag_start = self.preview_fraction(event)
+        self.drag_rect = None
+
+    def update_roi_drag(self, event):
+        """Shows the region being dragged."""
+        if self.drag_start:
+            self.drag_rect = Detection_Region.normalize_rect(*self.drag_start, *self.preview_fraction(event))
+
+    def finish_roi_drag(self, event):
+        """
+        Applies and saves the dragged region (a plain click is ignored).
+        """
+        if not self.drag_start:
+            return
+        x0, y0 = self.drag_start
+        x1, y1 = self.preview_fraction(event)
+        self.drag_start = None
+        self.drag_rect = None
+        if self.region.set_rect(x0, y0, x1, y1):
+            self.region.save()
+
+    def clear_roi(self):
+        """Goes back to searching the whole frame."""
+        self.region.clear()
+        self.region.save()
+
+    def toggle_auto_roi(self):
+        """Turns learning the region from detected faces on or off."""
+        self.region.settings['auto_learn'] = self.auto_roi.get()
+        self.region.save()
+
+    def draw_preview_overlays(self, display_frame):
+        """
+        Draws the detection region and, if enabled, the timing stats on the preview.
+        """
+        self.draw_roi(display_frame)
+        if self.show_stats.get():
+            self.stats.draw_overlay(display_frame)
+
+    def draw_roi(self, display_frame):
+        """
+        Outlines the active (or currently dragged) region on the preview frame.
+        """
+        rect = self.drag_rect or self.region.rect
+        if rect:
+            left, top, right, bottom = (int(v * PREVIEW_SIZE) for v in rect)
+            cv2.rectangle(display_frame, (left, top), (right, bottom), ROI_COLOR, 1)
+
+    def save_metrics(self):
+        """
+        Appends the current pipeline timings to the metrics file,
+        labelled with this machine's name and processor.
+        """
+        label = f"{platform.node()} {platform.processor() or platform.machine()}"
+        try:
+            self.stats.dump(Recognition_Stats.METRICS_FILE, label=label)
+            MESSAGE_BOX(title="Success", message=f"Metrics saved to {Recognition_Stats.METRICS_FILE}", icon="check")
+        except OSError as e:
+            logger.error("Failed to save metrics: %s", e)
+            MESSAGE_BOX(title="Error", message=f"Failed to save metrics:\n{e}", icon="cancel")
+        
     def on_close(self):
         """
         Handles the window 'X' button click.
         Safely stops the camera loop before destroying the window.
         """
-        print("[INFO] 'Mark Attendance' window closing...")
+        logger.info("'Mark Attendance' window closing...")
         self.is_recognizing = False # Signal the loop to stop
         
         # Wait a moment for the loop to finish
@@ -427,10 +486,9 @@ class MarkAttendance(ctk.CTkToplevel):
         """
         Performs the actual cleanup and destruction of the window.
         """
-        print("[INFO] Releasing camera and closing window.")
-        if self.cap:
-            self.cap.release()
-            self.cap = None
+        logger.info("Releasing camera and closing window.")
+        self.bus.unsubscribe(self.on_change)
+        self.release_camera()
         
         # self.db.close_connection() # <-- FIX: Do not close the connection here.
         self.destroy() # Close the Toplevel window
@@ -0,0 +1,275 @@
+import logging
+import sys
+import threading
+from datetime import datetime, timedelta
+
+import Event_Bus
+from Manage_Data import MEMBER_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+MEMBER_FIELDS = ('id',) + MEMBER_COLUMNS
+# Columns with a handful of distinct values; interning them stores each
+# value once instead of once per member.
+INTERNED_FIELDS = ('gender', 'member_status', 'membership_type')
+REMINDER_STATUSES = ('UNPAID', 'ROOKIE') # Members with a payment pending
+REMINDER_INTERVAL_DAYS = 3               # Least time between two reminders to a member
+
+class MemberRecord:
+    """
+    One member, with named fields instead of tuple indexes (record.phone_number
+    rather than member[3]). __slots__ keeps each record as small as a tuple.
+    """
+
+    __slots__ = MEMBER_FIELDS
+
+    def __init__(self, *values):
+        for field, value in zip(MEMBER_FIELDS, values):
+            setattr(self, field, value)
+
+    @classmethod
+    def from_row(cls, row):
+        """
+        Builds a record from a 'SELECT * FROM Members' row.
+        """
+        record = cls(*row)
+        for field in INTERNED_FIELDS:
+            value = getattr(record, field)
+            if isinstance(value, str):
+                setattr(record, field, sys.intern(value))
+        return record
+
+    def to_row(self):
+        """
+        Returns the record as a tuple in table column order (e.g. for a Treeview).
+        """
+        return tuple(getattr(self, field) for field in MEMBER_FIELDS)
+
+    def __repr__(self):
+        return f"MemberRecord(id={self.id!r}, full_name={self.full_name!r})"
+
+class MemberDirectory:
+    """
+    The members of one database, loaded once and shared by every window:
+    lookups by id and by phone number are dictionary reads instead of
+    queries or scans of a copied member list.
+
+    The directory follows the database through the event bus: every
+    insert, update or delete on Members (from any window or process) is
+    applied when the bus is polled, and subscribers are told about it.
+    Callbacks run on the thread that made or polled the change; GUI
+    subscribers outside the Tk thread should hand the work to after().
+    """
+
+    def __init__(self):
+        self._by_id = {}
+        self._by_phone = {}
+        self._subscribers = []
+        self._lock = threading.RLock()
+        self.loaded = False
+
+    def load(self, db):
+        """
+        (Re)reads every member from the database.
+
+        Args:
+            db (DatabaseManager): An open database manager.
+
+        Returns:
+            int: The number of members loaded.
+        """
+        records = [MemberRecord.from_row(row) for row in db.get_all_from_table('Members')]
+        with self._lock:
+            self._by_id = {record.id: record for record in records}
+            self._by_phone = {record.phone_number: record for record in records if record.phone_number}
+            self.loaded = True
+        logger.info("Member directory loaded with %s members.", len(records))
+        self._notify('reloaded', None)
+        return len(records)
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __iter__(self):
+        """Iterates over the records in id order."""
+        with self._lock:
+            records = sorted(self._by_id.values(), key=lambda record: record.id)
+        return iter(records)
+
+    def get(self, member_id):
+        """
+        Returns the record for a member id (int or digit string), or None.
+        """
+        try:
+            return self._by_id.get(int(member_id))
+        except (TypeError, ValueError):
+            return None
+
+    def by_phone(self, phone_number):
+        """
+        Returns the record with this phone number, or None.
+        """
+        return self._by_phone.get(phone_number)
+
+    def name(self, member_id, default=None):
+        """
+        Returns a member's full name, or 'default' ('ID <id> Not Found' if None).
+        """
+        record = self.get(member_id)
+        if record is not None:
+            return record.full_name
+        return default if default is not None else f"ID {member_id} Not Found"
+
+    def named_row(self, row):
+        """
+        Adds the member's name after 'member_id' to an Attendance or
+        Payment row, as the windows' tables show it.
+
+        Args:
+            row (tuple): (id, member_id, ...) as stored.
+
+        Returns:
+            tuple: (id, member_id, full_name, ...)
+        """
+        return (row[0], row[1], self.name(row[1])) + tuple(row[2:])
+
+    def named_rows(self, rows):
+        """
+        Applies named_row to every row (e.g. a whole table for a Treeview).
+        """
+        return [self.named_row(row) for row in rows]
+
+    def due_for_reminder(self, reminder_data, now=None):
+        """
+        Selects the members to send a payment reminder to: status UNPAID
+        or ROOKIE, and no reminder in the last REMINDER_INTERVAL_DAYS days.
+
+        Args:
+            reminder_data (dict): {member id (str): {'last_reminder_date': 'YYYY-MM-DD', ...}}
+            now (datetime, optional): The current time (defaults to now).
+
+        Returns:
+            list: The MemberRecords, in id order.
+        """
+        cutoff = (now or datetime.now()) - timedelta(days=REMINDER_INTERVAL_DAYS)
+        due = []
+        for member in self:
+            if member.member_status not in REMINDER_STATUSES:
+                continue
+            last = reminder_data.get(str(member.id), {}).get('last_reminder_date')
+            try:
+                if last and datetime.strptime(last, '%Y-%m-%d') >= cutoff:
+                    continue # Reminded recently
+            except ValueError:
+                logger.error("Invalid reminder date '%s' for member %s; sending a reminder.", last, member.id)
+            due.append(member)
+        return due
+
+    def find(self, full_name, date_of_birth, phone_number):
+        """
+        Finds a member by name, date of birth and phone number (all must match).
+
+        Returns:
+            MemberRecord: The member, or None if not found.
+        """
+        record = self.by_phone(phone_number)
+        if record is not None and record.full_name == full_name and record.date_of_birth == date_of_birth:
+            return record
+        return None
+
+    def refresh(self, db, member_id):
+        """
+        Re-reads one member after it was added or edited and notifies
+        subscribers with 'added' or 'updated'. A member that no longer
+        exists is removed.
+
+        Returns:
+            MemberRecord: The fresh record, or None if the member is gone.
+        """
+        rows = db.get_data_by_member_id('Members', member_id)
+        if not rows:
+            self.remove(member_id)
+            return None
+        return self._store(MemberRecord.from_row(rows[0]))
+
+    def apply_change(self, change):
+        """
+        Event bus subscriber: applies a change to the Members table.
+        """
+        if change.row is None:
+            self.remove(change.row_id)
+        else:
+            self._store(MemberRecord.from_row(change.row))
+
+    def _store(self, record):
+        """Adds or replaces a record and notifies subscribers."""
+        with self._lock:
+            old = self._by_id.get(record.id)
+            if old is not None and self._by_phone.get(old.phone_number) is old:
+                del self._by_phone[old.phone_number]
+            self._by_id[record.id] = record
+            if record.phone_number:
+                self._by_phone[record.phone_number] = record
+        self._notify('added' if old is None else 'updated', record)
+        return record
+
+    def remove(self, member_id):
+        """
+        Drops a deleted member and notifies subscribers with 'removed'.
+        """
+        with self._lock:
+            record = self._by_id.pop(int(member_id), None)
+            if record is not None and self._by_phone.get(record.phone_number) is record:
+                del self._by_phone[record.phone_number]
+        if record is not None:
+            self._notify('removed', record)
+
+    def subscribe(self, callback):
+        """
+        Registers callback(event, record) for 'added', 'updated', 'removed'
+        and 'reloaded' (record None) changes.
+        """
+        with self._lock:
+            if callback not in self._subscribers:
+                self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        """
+        Removes a callback registered with subscribe().
+        """
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def _notify(self, event, record):
+        """Calls every subscriber, logging (not raising) their errors."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(event, record)
+            except Exception as e:
+                logger.error("Member directory subscriber failed on '%s': %s", event, e)
+
+# --- Shared directories ---
+_directories = {}
+_directories_lock = threading.Lock()
+
+def get_directory(db):
+    """
+    Returns the shared directory for db's database file, loading it on
+    first use and keeping it current through the database's event bus.
+
+    Args:
+        db (DatabaseManager): Used to load the directory if it is not loaded yet.
+
+    Returns:
+        MemberDirectory: The process-wide directory of that database.
+    """
+    with _directories_lock:
+        directory = _directories.setdefault(db.db_name, MemberDirectory())
+    if not directory.loaded:
+        Event_Bus.get_bus(db).subscribe(directory.apply_change, tables=('Members',))
+        directory.load(db)
+    return directory
@@ -0,0 +1,94 @@
+import logging
+import threading
+from collections import namedtuple
+from datetime import timedelta
+
+logger = logging.getLogger(__name__)
+
+# One row of the MembershipPlans table
+Plan = namedtuple('Plan', 'name duration_days price grace_days')
+
+class PlanCatalogue:
+    """
+    The membership plans of one database, read once and shared by every
+    window: combobox values, prices and renewal dates come from here
+    instead of being written into each window.
+
+    Plans change rarely (Gym_Tools.py set-plan); call load() again, or
+    restart the app, to pick up edits made by another process.
+    """
+
+    def __init__(self):
+        self._plans = {}
+        self._lock = threading.Lock()
+        self.loaded = False
+
+    def load(self, db):
+        """
+        (Re)reads every plan from the database.
+
+        Args:
+            db (DatabaseManager): An open database manager.
+
+        Returns:
+            int: The number of plans loaded.
+        """
+        plans = [Plan(*row) for row in db.get_membership_plans()]
+        with self._lock:
+            self._plans = {plan.name: plan for plan in plans}
+            self.loaded = True
+        logger.info("Loaded %s membership plans.", len(plans))
+        return len(plans)
+
+    def __iter__(self):
+        """Iterates over the plans, shortest first."""
+        return iter(sorted(self._plans.values(), key=lambda plan: (plan.duration_days, plan.name)))
+
+    def get(self, name):
+        """
+        Returns the plan with this name, or None for an unknown membership type.
+        """
+        return self._plans.get(name)
+
+    def names(self):
+        """
+        Returns the plan names, shortest plan first (e.g. for a combobox).
+        """
+        return [plan.name for plan in self]
+
+    def end_date(self, name, start_date):
+        """
+        Works out when a membership of plan 'name' starting on start_date ends.
+
+        Args:
+            name (str): The plan (the member's membership_type).
+            start_date (datetime): The first day of the membership.
+
+        Returns:
+            datetime: The end date, or None if there is no such plan.
+        """
+        plan = self.get(name)
+        if plan is None:
+            return None
+        return start_date + timedelta(days=plan.duration_days)
+
+# --- Shared catalogues ---
+_catalogues = {}
+_catalogues_lock = threading.Lock()
+
+def get_catalogue(db):
+    """
+    Returns the shared plan catalogue for db's database file, loading it
+    on first use.
+
+    Args:
+        db (DatabaseManager): Used to load the catalogue if it is not loaded yet.
+
+    Returns:
+        PlanCatalogue: The process-wide catalogue of that database.
+    """
+    with _catalogues_lock:
+        catalogue = _catalogues.setdefault(db.db_name, PlanCatalogue())
+    if not catalogue.loaded:
+        catalogue.load(db)
+    return catalogue
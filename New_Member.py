@@ -1,12 +1,21 @@
-from PIL import Image, ImageTk
+from PIL import Image
 import customtkinter as ctk
-from tkinter import ttk
+from tkinter import ttk, filedialog
 import cv2
 import os
 import Manage_Data
+import Member_Directory
+import Membership_Plans
+import Event_Bus
+import Import_Members
+import Frame_Renderer
+import Camera_Service
 import CTkMessagebox
+import logging
 import sys
 
+logger = logging.getLogger(__name__)
+
 # --- Constants ---
 BUTTON_FONT = ("Poppins", 20)
 LABEL_FONT = ("Poppins", 16)
@@ -25,23 +34,24 @@ class NewMember(ctk.CTkToplevel):
         Initializes the NewMember window, database connection, and camera.
         """
         super().__init__(parent)
-        print("[INFO] Initializing 'New Member' window...")
+        logger.info("Initializing 'New Member' window...")
         self.title("Add New Member")
         self.geometry("1400x800")
         ctk.set_appearance_mode('dark')
 
         try:
             self.db = Manage_Data.DatabaseManager("GYM.db")
-            # Use the new secure function from Manage_Data.py
-            self.data = self.db.get_all_from_table('Members')
+            self.members = Member_Directory.get_directory(self.db) # Shared member lookup
+            self.plans = Membership_Plans.get_catalogue(self.db) # Membership types
+            self.bus = Event_Bus.get_bus(self.db) # Row-level change notifications
         except Exception as e:
-            print(f"[CRITICAL] NewMember: Failed to load database: {e}")
+            logger.critical("NewMember: Failed to load database: %s", e)
             MESSAGE_BOX(title="Critical Error", message=f"Could not load database: {e}", icon="cancel")
             self.destroy()
             return
             
         # --- Camera and Photo State ---
-        self.cap = None
+        self.camera = Camera_Service.get_camera() # Shared with the Mark Attendance window
         self.captured_image = None  # Will store the captured cv2 frame
         self.is_camera_running = False
 
@@ -50,6 +60,8 @@ class NewMember(ctk.CTkToplevel):
 
         # Build the UI
         self.layout()
+        self.renderer = Frame_Renderer.FrameRenderer(self.video_label, 320, 240)
+        self.bus.subscribe(self.on_change, tables=("Members",)) # Patch rows as members change
         
         # Start the camera feed
         self.start_camera_feed()
@@ -63,12 +75,12 @@ class NewMember(ctk.CTkToplevel):
         """
         try:
             if not os.path.exists(PHOTO_DIR):
-                print(f"[WARN] '{PHOTO_DIR}' not found. Creating directory.")
+                logger.warning("'%s' not found. Creating directory.", PHOTO_DIR)
                 os.makedirs(PHOTO_DIR)
             else:
-                print(f"[INFO] Photo directory '{PHOTO_DIR}' already exists.")
+                logger.info("Photo directory '%s' already exists.", PHOTO_DIR)
         except OSError as e:
-            print(f"[ERROR] Failed to create directory '{PHOTO_DIR}': {e}")
+            logger.error("Failed to create directory '%s': %s", PHOTO_DIR, e)
             MESSAGE_BOX(title="Error", message=f"Could not create photo directory: {e}", icon="cancel")
 
     def labelEntry_Component(self, parent, text, placeholder):
@@ -94,7 +106,7 @@ class NewMember(ctk.CTkToplevel):
         """
         Creates and places all widgets for the NewMember window.
         """
-        print("[INFO] Building 'New Member' layout...")
+        logger.info("Building 'New Member' layout...")
         # --- Left Panel (Info Frame) ---
         infoFrame = ctk.CTkScrollableFrame(self, fg_color='transparent')
         
@@ -129,9 +141,10 @@ class NewMember(ctk.CTkToplevel):
         self.join_date_entry = self.labelEntry_Component(entryFrame, 'Joining Date (DD-MM-YYYY)', '20-05-2023')
         
         ctk.CTkLabel(entryFrame, text="Membership Type", font=LABEL_FONT).pack(anchor='w')
-        self.membership_ComboBox = ctk.CTkComboBox(entryFrame, values=["Monthly", "Quarterly", "Half-yearly", "Yearly"], font=LABEL_FONT)
+        plan_names = self.plans.names()
+        self.membership_ComboBox = ctk.CTkComboBox(entryFrame, values=plan_names, font=LABEL_FONT)
         self.membership_ComboBox.pack(fill='x', pady=5)
-        self.membership_ComboBox.set("Monthly") # Default value
+        self.membership_ComboBox.set(plan_names[0] if plan_names else "") # Default: shortest plan
         
         self.membeship_start_date_entry = self.labelEntry_Component(entryFrame, 'Membership Start Date (DD-MM-YYYY)', '20-05-2023')
         self.membeship_end_date_entry = self.labelEntry_Component(entryFrame, 'Membership End Date (DD-MM-YYYY)', '20-06-2023')
@@ -146,6 +159,12 @@ class NewMember(ctk.CTkToplevel):
                                                hover_color="#CAF4FF",
                                                command=self.add_member)
         self.add_member_button.pack(fill='x', padx=20, expand=True, pady=10)
+
+        # Bulk Import Button
+        ctk.CTkButton(infoFrame, text='Import CSV', font=BUTTON_FONT,
+                      fg_color="#fff", corner_radius=7, text_color='#000000',
+                      hover_color="#CAF4FF",
+                      command=self.import_members).pack(fill='x', padx=20, expand=True, pady=(0, 10))
         
         infoFrame.place(relx=0, rely=0, relwidth=0.25, relheight=1)
         
@@ -190,23 +209,30 @@ class NewMember(ctk.CTkToplevel):
         """
         Clears and repopulates the Treeview with the latest data from the database.
         """
-        print("[INFO] Refreshing member table...")
+        logger.info("Refreshing member table...")
         # Clear existing items
         for item in self.table.get_children():
             self.table.delete(item)
             
         # Get new data
         try:
-            # Use the new secure function
-            self.data = self.db.get_all_from_table('Members')
-            # Insert new data
-            for i, row in enumerate(self.data):
-                self.table.insert(parent='', index=i, values=row)
-            print(f"[INFO] Table refreshed with {len(self.data)} members.")
+            # Insert the rows of the shared member directory
+            for i, record in enumerate(self.members):
+                self.table.insert(parent='', index=i, iid=str(record.id), values=record.to_row())
+            logger.info("Table refreshed with %s members.", len(self.members))
         except Exception as e:
-            print(f"[ERROR] Failed to refresh table: {e}")
+            logger.error("Failed to refresh table: %s", e)
             MESSAGE_BOX(title="Error", message=f"Failed to load member data for table:\n{e}", icon="cancel")
     
+    def on_change(self, change):
+        """
+        Event bus subscriber: updates, adds or removes the changed member's row.
+
+        Args:
+            change (Event_Bus.Change): A change to the Members table.
+        """
+        Event_Bus.patch_row(self.table, change, change.row)
+
     def start_camera_feed(self):
         """
         Initializes the camera and starts the update_camera loop.
@@ -214,91 +240,81 @@ class NewMember(ctk.CTkToplevel):
         if self.is_camera_running:
             return  # Camera is already running
 
-        print("[INFO] Starting camera feed...")
+        logger.info("Starting camera feed...")
         try:
-            self.cap = cv2.VideoCapture(0, cv2.CAP_DSHOW) # CAP_DSHOW for Windows
-            if not self.cap or not self.cap.isOpened():
-                raise Exception("Cannot open webcam.")
-            
+            self.camera.subscribe()
             self.is_camera_running = True
+            if not self.camera.wait_ready():
+                raise Exception(self.camera.error or "Cannot open webcam.")
+
             self.take_photo_button.configure(state="normal", text="Take Photo", command=self.capture_photo)
             self.captured_image = None
             self.update_camera()
         except Exception as e:
-            print(f"[ERROR] Failed to start camera: {e}")
-            self.video_label.configure(text=f"Camera Error:\n{e}", image=None)
+            logger.error("Failed to start camera: %s", e)
+            self.stop_camera()
+            self.renderer.clear(f"Camera Error:\n{e}")
             MESSAGE_BOX(title="Error", message=f"Could not start camera.\nIs it connected?\n\nError: {e}", icon="cancel")
 
     def update_camera(self):
         """
         Reads a frame from the camera, displays it, and schedules the next update.
         """
-        if not self.is_camera_running or not self.cap:
+        if not self.is_camera_running:
             return  # Stop the loop
 
         try:
-            ret, frame = self.cap.read()
-            if ret:
-                frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                # Resize for display
-                frame_resized = cv2.resize(frame_rgb, (320, 240))
-                
-                img = Image.fromarray(frame_resized)
-                imgtk = ImageTk.PhotoImage(image=img)
-                self.video_label.configure(image=imgtk, text="")
-                self.video_label.imgtk = imgtk  # Keep a reference
+            _, frame = self.camera.latest()
+            if frame is not None:
+                # Resize for display (into the renderer's reused buffers)
+                self.renderer.render(frame)
             else:
-                print("[WARN] Failed to read frame from camera.")
+                logger.warning("Failed to read frame from camera.")
             
             # Schedule next update
             self.after(20, self.update_camera)
         except Exception as e:
-            print(f"[ERROR] Camera feed stopped due to error: {e}")
+            logger.error("Camera feed stopped due to error: %s", e)
             self.stop_camera()
-            self.video_label.configure(text="Camera feed stopped.", image=None)
+            self.renderer.clear("Camera feed stopped.")
 
     def stop_camera(self):
         """
         Stops the camera update loop and releases the camera device.
         """
-        print("[INFO] Stopping camera feed...")
+        if not self.is_camera_running:
+            return
+        logger.info("Stopping camera feed...")
         self.is_camera_running = False
-        if self.cap:
-            self.cap.release()
-            self.cap = None
+        self.camera.unsubscribe()
         
     def capture_photo(self):
         """
         Captures the current camera frame to memory, stops the feed,
         and displays the captured image.
         """
-        if not self.is_camera_running or not self.cap:
-            print("[ERROR] Cannot capture photo, camera is not running.")
+        if not self.is_camera_running:
+            logger.error("Cannot capture photo, camera is not running.")
             return
 
-        print("[INFO] Capturing photo...")
-        ret, frame = self.cap.read()
+        logger.info("Capturing photo...")
+        _, frame = self.camera.latest()
         
-        if ret:
+        if frame is not None:
             # Store the full-resolution frame
             self.captured_image = frame
-            print("[INFO] Photo captured to memory.")
+            logger.info("Photo captured to memory.")
             
             # Stop the camera feed
             self.stop_camera()
             
             # Display the captured photo
-            frame_rgb = cv2.cvtColor(self.captured_image, cv2.COLOR_BGR2RGB)
-            frame_resized = cv2.resize(frame_rgb, (320, 240))
-            img = Image.fromarray(frame_resized)
-            imgtk = ImageTk.PhotoImage(image=img)
-            self.video_label.configure(image=imgtk, text="")
-            self.video_label.imgtk = imgtk
+            self.renderer.render(self.captured_image)
             
             # Update button to allow retaking
             self.take_photo_button.configure(text="Retake Photo", command=self.start_camera_feed)
         else:
-            print("[ERROR] Failed to capture photo from stream.")
+            logger.error("Failed to capture photo from stream.")
             MESSAGE_BOX(title="Error", message="Could not capture photo. Please try again.", icon="cancel")
     
     def add_member(self):
@@ -306,7 +322,7 @@ class NewMember(ctk.CTkToplevel):
         Validates all entry fields, adds the member to the database,
         and saves the captured photo using the new member's ID.
         """
-        print("[INFO] 'Add Member' button clicked. Validating inputs...")
+        logger.info("'Add Member' button clicked. Validating inputs...")
         # --- 1. Get and Validate Data ---
         fullName = self.full_name_entry.get().strip().title()
         dob = self.dob_entry.get().strip()
@@ -320,20 +336,16 @@ class NewMember(ctk.CTkToplevel):
         emergencyName = self.emergency_name_entry.get().strip().title()
         emergencycontact = self.emergency_contact_entry.get().strip()
         
-        # Check for empty fields
-        if not all([fullName, dob, phone, gender, address, join_date, membership_type,
-                    membership_start_date, membership_end_date, emergencyName, emergencycontact]):
-            MESSAGE_BOX(title="Error", message="Please fill all fields", icon="cancel")
-            return
-        
-        # Check phone number length
-        if len(phone) != 10 or not phone.isdigit():
-            MESSAGE_BOX(title="Error", message="Phone Number must be 10 digits.", icon="cancel")
-            return
-        
-        # Check emergency contact length
-        if len(emergencycontact) != 10 or not emergencycontact.isdigit():
-            MESSAGE_BOX(title="Error", message="Emergency Contact must be 10 digits.", icon="cancel")
+        # Same rules as the bulk importer (see Manage_Data.validate_member_fields)
+        error = Manage_Data.validate_member_fields({
+            'full_name': fullName, 'date_of_birth': dob, 'phone_number': phone,
+            'gender': gender, 'address': address, 'join_date': join_date,
+            'membership_type': membership_type, 'membership_start_date': membership_start_date,
+            'membership_end_date': membership_end_date, 'emergency_name': emergencyName,
+            'emergency_number': emergencycontact
+        })
+        if error:
+            MESSAGE_BOX(title="Error", message=error, icon="cancel")
             return
             
         # --- 2. Check for Photo ---
@@ -342,7 +354,7 @@ class NewMember(ctk.CTkToplevel):
             return
             
         # --- 3. Insert into Database ---
-        print(f"[INFO] Attempting to insert {fullName} into database...")
+        logger.info("Attempting to insert %s into database...", fullName)
         new_id = self.db.insert_member(
             fullName, dob, phone, gender, address, "ROOKIE", join_date,
             membership_type, membership_start_date, membership_end_date,
@@ -351,7 +363,8 @@ class NewMember(ctk.CTkToplevel):
         
         # --- 4. Process Result ---
         if new_id:
-            print(f"[SUCCESS] Member {fullName} added with ID: {new_id}.")
+            logger.info("Member %s added with ID: %s.", fullName, new_id)
+            self.bus.poll(self.db) # Adds the member here, to the directory and to other windows
             
             # --- 5. Save Photo using New ID ---
             save_path = os.path.join(PHOTO_DIR, f"{new_id}.jpg")
@@ -360,32 +373,57 @@ class NewMember(ctk.CTkToplevel):
                 frame_rgb = cv2.cvtColor(self.captured_image, cv2.COLOR_BGR2RGB)
                 pil_img = Image.fromarray(frame_rgb)
                 pil_img.save(save_path, quality=90)
-                print(f"[SUCCESS] Saved photo to {save_path}")
+                logger.info("Saved photo to %s", save_path)
                 MESSAGE_BOX(title="Success",
                               message=f"{fullName} was successfully added.\nPhoto saved as {new_id}.jpg",
                               icon="check")
             except Exception as e:
-                print(f"[ERROR] Failed to save photo for member ID {new_id}: {e}")
+                logger.error("Failed to save photo for member ID %s: %s", new_id, e)
                 MESSAGE_BOX(title="Warning",
                               message=f"Member {fullName} was added, but failed to save their photo.\n\nError: {e}",
                               icon="warning")
             
             # --- 6. Reset Form ---
             self.reset_form()
-            self.refresh_table()
             
         else:
             # new_id was None, insertion failed
-            print("[ERROR] Failed to insert member (database error).")
+            logger.error("Failed to insert member (database error).")
             MESSAGE_BOX(title="Error",
                           message="Failed to add member.\nThe phone number may already be in use.",
                           icon="cancel")
     
+    def import_members(self):
+        """
+        Bulk-imports members from a CSV file, with an optional folder of photos
+        (named in a 'photo' column or '<phone_number>.jpg').
+        """
+        logger.info("'Import CSV' button clicked.")
+        csv_path = filedialog.askopenfilename(parent=self, title="Select members CSV",
+                                              filetypes=[("CSV", "*.csv")])
+        if not csv_path:
+            return
+        photo_dir = filedialog.askdirectory(parent=self, title="Select photo folder (Cancel to skip photos)")
+
+        try:
+            report = Import_Members.import_members_csv(self.db, csv_path, photo_dir or None, PHOTO_DIR)
+        except Exception as e:
+            logger.error("Failed to import members: %s", e)
+            MESSAGE_BOX(title="Error", message=f"Failed to import members:\n{e}", icon="cancel")
+            return
+
+        if report['error']:
+            MESSAGE_BOX(title="Import Failed", message=Import_Members.format_report(report), icon="cancel")
+            return
+        MESSAGE_BOX(title="Import Finished", message=Import_Members.format_report(report),
+                    icon="check" if not report['invalid'] and not report['duplicates'] else "warning")
+        self.bus.poll(self.db) # Adds the imported members here and everywhere else
+
     def reset_form(self):
         """
         Clears all entry fields, resets combo boxes, and restarts the camera.
         """
-        print("[INFO] Resetting form...")
+        logger.info("Resetting form...")
         # Reset text fields
         self.full_name_entry.delete(0, 'end')
         self.dob_entry.delete(0, 'end')
@@ -399,7 +437,8 @@ class NewMember(ctk.CTkToplevel):
         
         # Reset combo boxes
         self.gender_ComboBox.set('Male')
-        self.membership_ComboBox.set('Monthly')
+        plan_names = self.plans.names()
+        self.membership_ComboBox.set(plan_names[0] if plan_names else "")
         
         # Restart camera feed
         self.start_camera_feed()
@@ -410,6 +449,7 @@ ObS
         Safely stops the camera and closes the window.
         This is bound to the window's 'X' button.
         """
-        print("[INFO] 'New Member' window closing...")
+        logger.info("'New Member' window closing...")
+        self.bus.unsubscribe(self.on_change)
         self.stop_camera()
         self.destroy()
@@ -2,14 +2,21 @@ from PIL import Image, ImageTk
 import customtkinter as ctk
 from tkinter import ttk
 import Manage_Data
+import Member_Directory
+import Membership_Plans
+import Event_Bus
 import CTkMessagebox
 from datetime import datetime, timedelta
 import os # Added for file path checking
+import logging
 import sys # Added for safe exit on critical error
 
+logger = logging.getLogger(__name__)
+
 # --- Constants ---
 BUTTON_FONT = ("Poppins", 20)
 LABEL_FONT = ("Poppins", 16)
+DUE_DAYS = 30 # Expected renewals shown for this many days ahead
 PHOTO_DIR = "Members Photo"
 DEFAULT_PHOTO = "images/person.jpg"
 MESSAGE_BOX = CTkMessagebox.CTkMessagebox
@@ -26,15 +33,18 @@ class Payment(ctk.CTkToplevel):
         Initializes the Payment window and database connection.
         """
         super().__init__(parent)
-        print("[INFO] Initializing 'Payment' window...")
+        logger.info("Initializing 'Payment' window...")
         self.title("Member Payment")
         self.geometry("1400x800")
         ctk.set_appearance_mode('dark')
         
         try:
             self.db = Manage_Data.DatabaseManager("GYM.db")
+            self.members = Member_Directory.get_directory(self.db) # Shared member lookup
+            self.plans = Membership_Plans.get_catalogue(self.db) # Plan prices and durations
+            self.bus = Event_Bus.get_bus(self.db) # Row-level change notifications
         except Exception as e:
-            print(f"[CRITICAL] Payment: Failed to load database: {e}")
+            logger.critical("Payment: Failed to load database: %s", e)
             MESSAGE_BOX(title="Critical Error", message=f"Could not load database: {e}", icon="cancel")
             self.destroy()
             return
@@ -44,6 +54,11 @@ class Payment(ctk.CTkToplevel):
         
         self.layout()
         self.refresh_payment_table() # Load all payment data on startup
+        self.update_revenue()
+
+        # Patch the table when payments (or member names) change
+        self.bus.subscribe(self.on_change, tables=("Payment", "Members"))
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
         
     def labelEntry_Component(self, parent, text, placeholder):
         """
@@ -69,7 +84,7 @@ class Payment(ctk.CTkToplevel):
         """
         Creates and places all widgets for the Payment window.
         """
-        print("[INFO] Building 'Payment' layout...")
+        logger.info("Building 'Payment' layout...")
         # --- Left Panel (Info Frame) ---
         infoFrame = ctk.CTkScrollableFrame(self, fg_color='transparent')
         
@@ -88,12 +103,15 @@ class Payment(ctk.CTkToplevel):
         paymentFrame = ctk.CTkFrame(entryFrame, fg_color='transparent')
         self.payment_date_entry = self.labelEntry_Component(paymentFrame, 'Payment Date (DD-MM-YYYY)', f"{datetime.now().strftime('%d-%m-%Y')}")
         
-        ctk.CTkLabel(paymentFrame, text="Amount", font=LABEL_FONT).pack(anchor='w')
-        self.amount_ComboBox = ctk.CTkComboBox(paymentFrame,
-                                               values=["Monthly : 700", "Quarterly : 1800", "Half-yearly : 3000", "Yearly : 4800"],
-                                               font=LABEL_FONT)
-        self.amount_ComboBox.pack(fill='x', pady=5)
-        self.amount_ComboBox.set("Monthly : 700") # Default value
+        ctk.CTkLabel(paymentFrame, text="Plan", font=LABEL_FONT).pack(anchor='w')
+        plan_names = self.plans.names()
+        self.plan_ComboBox = ctk.CTkComboBox(paymentFrame, values=plan_names, font=LABEL_FONT,
+                                             command=self.show_plan_price)
+        self.plan_ComboBox.pack(fill='x', pady=5)
+        self.plan_ComboBox.set(plan_names[0] if plan_names else "") # Default: shortest plan
+        self.price_label = ctk.CTkLabel(paymentFrame, text="", font=LABEL_FONT)
+        self.price_label.pack(anchor='w')
+        self.show_plan_price(self.plan_ComboBox.get())
         
         ctk.CTkLabel(paymentFrame, text="Payment Method", font=LABEL_FONT).pack(anchor='w')
         self.payment_method_ComboBox = ctk.CTkComboBox(paymentFrame, values=["Online", "Cash"], font=LABEL_FONT)
@@ -113,6 +131,15 @@ class Payment(ctk.CTkToplevel):
                                            fg_color="#fff", corner_radius=7, text_color='#000000',
                                            hover_color="#CAF4FF", command=self.add_payment)
         payment_button.pack(fill='x', padx=20, expand=True, pady=10)
+
+        # --- Revenue (from the payment ledger) ---
+        revenueFrame = ctk.CTkFrame(infoFrame, fg_color='transparent')
+        ctk.CTkLabel(revenueFrame, text='Revenue', font=("Poppins", 20, "bold")).pack(anchor='w')
+        self.revenue_labels = {}
+        for key in ('this_month', 'last_month', 'this_year', 'all_time', 'due', 'member'):
+            self.revenue_labels[key] = ctk.CTkLabel(revenueFrame, text="", font=LABEL_FONT, justify='left')
+            self.revenue_labels[key].pack(anchor='w')
+        revenueFrame.pack(fill='x', padx=20, pady=10)
         
         infoFrame.place(relx=0, rely=0, relwidth=0.25, relheight=1)
         
@@ -152,7 +179,7 @@ class Payment(ctk.CTkToplevel):
         Clears and repopulates the payment table with ALL payments from all members.
         This is the correct relational method, mapping member IDs to names.
         """
-        print("[INFO] Refreshing full payment table...")
+        logger.info("Refreshing full payment table...")
         # Clear existing items
         for item in self.table.get_children():
             self.table.delete(item)
@@ -162,27 +189,84 @@ class Payment(ctk.CTkToplevel):
             # Use the new secure function from Manage_Data.py
             all_payments = self.db.get_all_from_table('Payment')
             
-            # 2. Get all members to create a name map
-            members_list = self.db.get_all_from_table('Members')
-            # Create a dictionary: {1: 'Tony Stark', 2: 'Steve Rogers'}
-            member_map = {member[0]: member[1] for member in members_list} # m[0] is id, m[1] is full_name
-            
-            # 3. Populate table
-            for p in all_payments:
-                # p = (id, member_id, payment_date, amount, payment_method)
-                member_id = p[1]
-                member_name = member_map.get(member_id, f"ID {member_id} Not Found")
-                
-                # Build the row to match table columns
-                table_row = (p[0], member_id, member_name, p[2], p[3], p[4])
-                self.table.insert(parent='', index='end', values=table_row)
+            # 2. Populate table (names from the shared member directory)
+            for values in self.members.named_rows(all_payments):
+                self.table.insert(parent='', index='end', iid=str(values[0]), values=values)
                 
-            print(f"[INFO] Table refreshed with {len(all_payments)} payment records.")
+            logger.info("Table refreshed with %s payment records.", len(all_payments))
         
         except Exception as e:
-            print(f"[ERROR] Failed to refresh payment table: {e}")
+            logger.error("Failed to refresh payment table: %s", e)
             MESSAGE_BOX(title="Error", message=f"Failed to load payment data:\n{e}", icon="cancel")
 
+    def update_revenue(self):
+        """
+        Shows revenue totals (and the searched member's total) from the
+        payment ledger. These are a few indexed rows, so it stays instant
+        however many payments there are. Renewals due soon are priced
+        from the membership plans.
+        """
+        summary = self.db.get_revenue_summary()
+        titles = {'this_month': "This month", 'last_month': "Last month",
+                  'this_year': "This year", 'all_time': "All time"}
+        for key, title in titles.items():
+            total, payments = summary.get(key, (0.0, 0))
+            self.revenue_labels[key].configure(text=f"{title}: {total:.2f} ({payments} payments)")
+        today = datetime.now()
+        renewals = self.db.get_expected_renewals(today.strftime('%Y-%m-%d'),
+                                                 (today + timedelta(days=DUE_DAYS)).strftime('%Y-%m-%d'))
+        self.revenue_labels['due'].configure(text=f"Due in {DUE_DAYS} days: {sum(row[3] for row in renewals):.2f} "
+                                                  f"({sum(row[2] for row in renewals)} renewals)")
+        if self.person_id:
+            total, payments = self.db.get_member_payment_total(self.person_id)
+            self.revenue_labels['member'].configure(text=f"{self.members.name(self.person_id)}: "
+                                                         f"{total:.2f} ({payments} payments)")
+        else:
+            self.revenue_labels['member'].configure(text="")
+
+    def display_row(self, payment):
+        """
+        Builds the table values of a Payment row, adding the member's name.
+
+        Args:
+            payment (tuple): (id, member_id, payment_date, amount, payment_method)
+
+        Returns:
+            tuple: The values for the table columns.
+        """
+        return self.members.named_row(payment)
+
+    def on_change(self, change):
+        """
+        Event bus subscriber: updates, adds or removes the changed payment
+        (only the searched member's, while a search is active) and keeps
+        member names current.
+
+        Args:
+            change (Event_Bus.Change): A change to Payment or Members.
+        """
+        if change.table_name == "Members":
+            Event_Bus.patch_member_name(self.table, change)
+            return
+        self.update_revenue()
+        if self.person_id and str(change.member_id) != str(self.person_id):
+            return
+        values = self.display_row(change.row) if change.row is not None else None
+        Event_Bus.patch_row(self.table, change, values)
+
+    def on_close(self):
+        """
+        Handles the window 'X' button click.
+        Stops listening for changes and closes the database connection.
+        """
+        logger.info("'Payment' window closing...")
+        self.bus.unsubscribe(self.on_change)
+        try:
+            self.db.close_connection()
+        except Exception as e:
+            logger.error("Error closing DB connection: %s", e)
+        self.destroy()
+
     def person_photo(self, parent):
         """
         Creates the frame and label for displaying the member's photo.
@@ -194,7 +278,7 @@ class Payment(ctk.CTkToplevel):
         try:
             default_image = Image.open(DEFAULT_PHOTO)
         except FileNotFoundError:
-            print(f"[ERROR] Default photo '{DEFAULT_PHOTO}' not found. Creating placeholder.")
+            logger.error("Default photo '%s' not found. Creating placeholder.", DEFAULT_PHOTO)
             # Create a black placeholder if default is missing
             default_image = Image.new("RGB", image_size, (10, 10, 10))
             
@@ -210,7 +294,7 @@ class Payment(ctk.CTkToplevel):
         Searches for a member using the form fields and updates the table
         to show only their payment history.
         """
-        print("[INFO] Searching for user...")
+        logger.info("Searching for user...")
         name = self.full_name_entry.get().strip().title()
         dob = self.dob_entry.get().strip()
         phone = self.phone_entry.get().strip()
@@ -224,12 +308,11 @@ class Payment(ctk.CTkToplevel):
             return
         
         try:
-            # Use the new secure function from Manage_Data.py
-            member_data = self.db.get_member_by_details(name, dob, phone)
+            member = self.members.find(name, dob, phone)
             
-            if member_data:
-                self.person_id = member_data[0] # member_data[0] is the 'id'
-                print(f"[INFO] Member found with ID: {self.person_id}")
+            if member:
+                self.person_id = member.id
+                logger.info("Member found with ID: %s", self.person_id)
                 
                 # Get payments for *only* this member
                 # Use the new secure function
@@ -240,10 +323,7 @@ class Payment(ctk.CTkToplevel):
                     self.table.delete(item)
                 
                 for p in payment_data:
-                    # p = (id, member_id, payment_date, amount, payment_method)
-                    # We already have the name, so we can build the row
-                    table_row = (p[0], p[1], name, p[2], p[3], p[4])
-                    self.table.insert(parent='', index='end', values=table_row)
+                    self.table.insert(parent='', index='end', iid=str(p[0]), values=self.display_row(p))
                 
                 # --- Load Member Photo (Safely) ---
                 image_path = os.path.join(PHOTO_DIR, f"{self.person_id}.jpg")
@@ -251,33 +331,41 @@ class Payment(ctk.CTkToplevel):
                     new_image = Image.open(image_path)
                     new_image = new_image.resize((300, 300), Image.LANCZOS)
                     self.image_person.configure(dark_image=new_image, size=(300, 300))
-                    print(f"[INFO] Loaded photo: {image_path}")
+                    logger.info("Loaded photo: %s", image_path)
                 except FileNotFoundError:
-                    print(f"[WARN] Photo not found for member ID {self.person_id} at {image_path}")
+                    logger.warning("Photo not found for member ID %s at %s", self.person_id, image_path)
                     MESSAGE_BOX(title="Info", message="Member found, but no photo exists.", icon="info")
                     # Load default photo if member-specific one isn't found
                     default_img = Image.open(DEFAULT_PHOTO).resize((300, 300), Image.LANCZOS)
                     self.image_person.configure(dark_image=default_img, size=(300, 300))
                 
             else:
-                print("[WARN] No matching member found.")
+                logger.warning("No matching member found.")
                 self.person_id = None
                 MESSAGE_BOX(title="Error", message="No matching member found", icon="cancel")
                 # No user found, refresh table to show all payments
                 self.refresh_payment_table()
+            self.update_revenue()
 
         except Exception as e:
-            print(f"[ERROR] Error during user search: {e}")
+            logger.error("Error during user search: %s", e)
             MESSAGE_BOX(title="Error", message=f"An error occurred: {e}", icon="cancel")
 
+    def show_plan_price(self, plan_name):
+        """
+        Shows the price of the selected plan under the plan dropdown.
+        """
+        plan = self.plans.get(plan_name)
+        self.price_label.configure(text=f"Amount: {plan.price:g}" if plan else "")
+
     def add_payment(self):
         """
         Adds a new payment record for the currently searched member.
         """
-        print("[INFO] 'Add Payment' button clicked...")
+        logger.info("'Add Payment' button clicked...")
         date = self.payment_date_entry.get().strip()
         method = self.payment_method_ComboBox.get()
-        amount_str = self.amount_ComboBox.get()
+        plan = self.plans.get(self.plan_ComboBox.get())
         
         # --- 1. Validate fields ---
         if not date or not method:
@@ -289,88 +377,81 @@ class Payment(ctk.CTkToplevel):
             MESSAGE_BOX(title="Error", message="Please search for and select a member first", icon="cancel")
             return
             
-        # --- 2. Safely parse amount ---
-        try:
-            amount = float(amount_str.split(" : ")[1])
-        except (IndexError, ValueError, TypeError):
-            print(f"[ERROR] Invalid amount string: {amount_str}")
-            MESSAGE_BOX(title="Error", message="Invalid amount selected. Please check the amount dropdown.", icon="cancel")
+        # --- 2. Take the amount from the selected plan ---
+        if plan is None:
+            logger.error("Unknown plan selected: %s", self.plan_ComboBox.get())
+            MESSAGE_BOX(title="Error", message="Please select a membership plan.", icon="cancel")
             return
+        amount = plan.price
         
-        # --- 3. Add payment to database ---
+        # --- 3. Work out the member's new status and membership dates ---
+        member_changes = self.membership_renewal_changes(self.person_id)
+
+        # --- 4. Add payment and update the member in one transaction ---
         try:
-            print(f"[INFO] Adding payment for member ID {self.person_id}: {amount}, {method}")
-            # Use the new relational-safe function (no name passed)
-            self.db.insert_payment(self.person_id, date, amount, method)
-            
-            # --- 4. Update member's status and membership dates ---
-            self.update_member_payment_status(self.person_id)
+            logger.info("Adding payment for member ID %s: %s, %s", self.person_id, amount, method)
+            payment = {'member_id': self.person_id, 'payment_date': date,
+                       'amount': amount, 'payment_method': method}
+            updates = [("Members", self.person_id, member_changes)] if member_changes else []
+            if not self.db.apply_changes(inserts=[("Payment", payment)], updates=updates):
+                MESSAGE_BOX(title="Error", message="Failed to add payment. Nothing was saved.", icon="cancel")
+                return
             
-            # --- 5. Refresh table to show new payment ---
-            # We call search_user() again to reload this user's data
-            self.search_user() 
+            # --- 5. Show the new payment ---
+            # Adds the row here and updates the member in every open window
+            self.bus.poll(self.db)
             
             MESSAGE_BOX(title="Success", message="Payment added successfully", icon="check")
             
         except Exception as e:
-            print(f"[ERROR] Failed to add payment or update status: {e}")
+            logger.error("Failed to add payment or update status: %s", e)
             MESSAGE_BOX(title="Error", message=f"Failed to add payment: {e}", icon="cancel")
             
-    def update_member_payment_status(self, member_id):
+    def membership_renewal_changes(self, member_id):
         """
-        Updates the member's status to 'PAID' and calculates their new
-        membership start and end dates based on their subscription.
+        Works out the member fields to change when they pay: status 'PAID'
+        and new membership start and end dates based on their subscription.
+        Nothing is written here; add_payment applies the changes together
+        with the payment in one transaction.
 
         Args:
-            member_id (int): The ID of the member to update.
+            member_id (int): The ID of the member who paid.
+
+        Returns:
+            dict: {field: value} for the Members row, or None if the dates
+                  could not be calculated (the payment is still recorded).
         """
-        print(f"[INFO] Updating payment status for member ID: {member_id}")
+        logger.info("Calculating payment status for member ID: %s", member_id)
         try:
             # 1. Get member's subscription type
-            # Use new secure function
-            member_data = self.db.get_data_by_member_id("Members", member_id)
-            if not member_data:
-                print(f"[ERROR] Cannot update status: Member ID {member_id} not found.")
-                return
+            member = self.members.get(member_id)
+            if member is None:
+                logger.error("Cannot update status: Member ID %s not found.", member_id)
+                return None
                 
-            # member_data[0][8] is 'membership_type'
-            subscription = member_data[0][8] 
-            print(f"[INFO] Member subscription type: {subscription}")
+            subscription = member.membership_type
+            logger.info("Member subscription type: %s", subscription)
             
-            # 2. Calculate dates
+            # 2. Calculate dates from the member's plan
             start_date = datetime.now()
-            if subscription == 'Monthly':
-                end_date = start_date + timedelta(days=30)
-            elif subscription == 'Quarterly':
-                end_date = start_date + timedelta(days=90)
-            elif subscription == 'Half-yearly':
-                end_date = start_date + timedelta(days=182) # Approx 6 months
-            elif subscription == 'Yearly':
-                end_date = start_date + timedelta(days=365)
-            else:
-                print(f"[WARN] Invalid membership type '{subscription}'. Cannot update dates.")
-                raise ValueError(f"Invalid membership type: {subscription}")
+            end_date = self.plans.end_date(subscription, start_date)
+            if end_date is None:
+                logger.warning("Unknown membership type '%s'. Cannot update dates.", subscription)
+                MESSAGE_BOX(title="Warning", message=f"Payment will be added, but '{subscription}' is not a "
+                            "membership plan, so the member's dates were not updated.", icon="warning")
+                return None
             
             start_date_str = start_date.strftime('%d-%m-%Y')
             end_date_str = end_date.strftime('%d-%m-%Y')
 
-            # 3. Update database using new secure function
-            # Note: The 'row_id' for 'Members' table is the 'member_id'
-            print(f"[INFO] Setting status=PAID, start={start_date_str}, end={end_date_str}")
-            self.db.update_field_by_id("Members", member_id, "member_status", "PAID")
-            self.db.update_field_by_id("Members", member_id, "membership_start_date", start_date_str)
-            self.db.update_field_by_id("Members", member_id, "membership_end_date", end_date_str)
-            print("[SUCCESS] Member payment status updated.")
+            logger.info("Will set status=PAID, start=%s, end=%s", start_date_str, end_date_str)
+            return {
+                "member_status": "PAID",
+                "membership_start_date": start_date_str,
+                "membership_end_date": end_date_str,
+            }
             
-        except (ValueError, TypeError) as e:
-            # Handle the 'Invalid membership type'
-            print(f"[ERROR] Failed to update member dates: {e}")
-            MESSAGE_BOX(title="Error", message=f"Payment added, but could not update member dates.\n\nError: {e}", icon="warning")
-        except (IndexError) as e:
-            # Handle member_data[0][8] failing
-            print(f"[ERROR] Failed to read member data to update status: {e}")
-            MESSAGE_BOX(title="Error", message=f"Payment added, but could not update member status.\n\nError: {e}", icon="warning")
         except Exception as e:
             # Catch-all for other DB errors
-            print(f"[ERROR] A critical error occurred in update_member_payment_status: {e}")
-            
+            logger.error("A critical error occurred in membership_renewal_changes: %s", e)
+        return None
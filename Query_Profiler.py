@@ -0,0 +1,239 @@
+import json
+import logging
+import os
+import re
+import sys
+import time
+from collections import deque
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+PROFILE_ENV = "GYM_DB_PROFILE"           # Set to 1 to profile every DatabaseManager
+PROFILE_FILE = os.path.join("logs", "db_profile.jsonl")
+MAX_RECORDS = 10000                      # Newest statements kept for the summary
+ITER_BATCH = 500                         # Rows fetched per batch when a cursor is iterated
+FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)\b(?! USING (?:COVERING )?INDEX)")
+SKIP_FILES = ("Manage_Data.py", "Query_Profiler.py", "contextlib.py")
+
+def profiling_enabled():
+    """
+    True if profiling was switched on with the GYM_DB_PROFILE environment variable.
+    """
+    return os.environ.get(PROFILE_ENV, "").lower() in ("1", "true", "yes", "on")
+
+def sql_template(sql):
+    """
+    Collapses whitespace so the same statement always groups together.
+    """
+    return " ".join(sql.split())
+
+def calling_site():
+    """
+    Names the code that issued the query: the first frame outside the
+    database layer, as 'ClassName.method' for window methods or
+    'module:function' otherwise.
+    """
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = os.path.basename(frame.f_code.co_filename)
+        if filename not in SKIP_FILES:
+            owner = frame.f_locals.get('self')
+            if owner is not None:
+                return f"{type(owner).__name__}.{frame.f_code.co_name}"
+            return f"{os.path.splitext(filename)[0]}:{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "unknown"
+
+class QueryProfiler:
+    """
+    Records every statement run through a ProfilingCursor: SQL template,
+    number of parameters, duration (execute + fetch), rows returned and
+    the calling window. Each distinct SELECT is explained once (EXPLAIN
+    QUERY PLAN), however fast it ran, so full scans are flagged before
+    they become slow. Only the newest 'max_records' statements are kept,
+    so a long session does not grow without limit; 'statements' counts
+    them all.
+    """
+
+    def __init__(self, max_records=MAX_RECORDS):
+        """
+        Args:
+            max_records (int): Newest statements kept for summary().
+        """
+        self.records = deque(maxlen=max_records)
+        self.statements = 0
+        self.plans = {} # SQL template -> plan detail lines
+
+    def start(self, sql, params):
+        """
+        Opens a record for a statement that is about to run.
+
+        Returns:
+            dict: The record (completed by the cursor as rows are fetched).
+        """
+        record = {
+            'sql': sql_template(sql),
+            'param_count': len(params) if params else 0,
+            'duration_ms': 0.0,
+            'rows': 0,
+            'caller': calling_site(),
+        }
+        self.records.append(record)
+        self.statements += 1
+        return record
+
+    def capture_plan(self, conn, sql, params):
+        """
+        Stores EXPLAIN QUERY PLAN for a read statement the first time its
+        template is seen.
+        """
+        template = sql_template(sql)
+        if template in self.plans or not sql.lstrip().upper().startswith(("SELECT", "WITH")):
+            return
+        try:
+            rows = conn.execute("EXPLAIN QUERY PLAN " + sql, params or ()).fetchall()
+            self.plans[template] = [row[-1] for row in rows]
+        except Exception as e: # Never let profiling break a query
+            logger.debug("Could not explain query: %s", e)
+            self.plans[template] = []
+
+    def summary(self):
+        """
+        Aggregates the records per SQL template, slowest total first.
+
+        Returns:
+            list: Dicts with 'sql', 'calls', 'total_ms', 'mean_ms', 'max_ms',
+                  'rows', 'callers', 'plan' and 'full_scans' (tables scanned
+                  without an index).
+        """
+        groups = {}
+        for record in self.records:
+            group = groups.setdefault(record['sql'], {
+                'sql': record['sql'], 'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                'rows': 0, 'param_count': record['param_count'], 'callers': set(),
+                'plan': self.plans.get(record['sql']),
+            })
+            group['calls'] += 1
+            group['total_ms'] += record['duration_ms']
+            group['max_ms'] = max(group['max_ms'], record['duration_ms'])
+            group['rows'] += record['rows']
+            group['callers'].add(record['caller'])
+
+        result = []
+        for group in groups.values():
+            group['mean_ms'] = group['total_ms'] / group['calls']
+            group['callers'] = sorted(group['callers'])
+            scans = []
+            for detail in group['plan'] or []:
+                match = FULL_SCAN.match(detail)
+                if match:
+                    scans.append(match.group(1))
+            group['full_scans'] = scans
+            result.append(group)
+        result.sort(key=lambda g: g['total_ms'], reverse=True)
+        return result
+
+    def report(self, limit=20):
+        """
+        Human-readable report of the most expensive statements.
+
+        Returns:
+            str: The report text.
+        """
+        lines = [f"Query profile: {self.statements} statements (newest {len(self.records)} summarised)"]
+        for group in self.summary()[:limit]:
+            flag = f"  FULL SCAN: {', '.join(group['full_scans'])}" if group['full_scans'] else ""
+            lines.append(f"{group['total_ms']:9.1f} ms total | {group['calls']:5d} calls | "
+                         f"{group['mean_ms']:7.2f} ms mean | {group['rows']:8d} rows | "
+                         f"{', '.join(group['callers'])}{flag}")
+            lines.append(f"    {group['sql'][:160]}")
+        return "\n".join(lines)
+
+    def dump(self, path=PROFILE_FILE, label=None):
+        """
+        Appends the summary as one JSON line to a profile file.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, 'a') as file:
+            file.write(json.dumps({
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'label': label,
+                'statements': self.statements,
+                'queries': self.summary(),
+            }) + "\n")
+        logger.info("Query profile appended to %s", path)
+
+class ProfilingCursor:
+    """
+    Wraps a sqlite3 cursor and reports each statement to a QueryProfiler.
+    Fetch time is added to the statement's duration, so a full
+    'SELECT * ... fetchall()' is measured end to end. Explaining a new
+    SELECT is not counted.
+    """
+
+    def __init__(self, cursor, profiler, conn):
+        self._cursor = cursor
+        self._profiler = profiler
+        self._conn = conn
+        self._record = None
+
+    def _finish(self, started, rows=0):
+        """Adds elapsed time (and rows) to the current record."""
+        record = self._record
+        if record is None:
+            return
+        record['duration_ms'] += (time.perf_counter() - started) * 1000.0
+        record['rows'] += rows
+
+    def execute(self, sql, params=()):
+        self._record = self._profiler.start(sql, params)
+        started = time.perf_counter()
+        try:
+            self._cursor.execute(sql, params)
+        finally:
+            self._finish(started)
+        self._profiler.capture_plan(self._conn, sql, params)
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        seq_of_params = list(seq_of_params)
+        self._record = self._profiler.start(sql, seq_of_params[0] if seq_of_params else ())
+        self._record['batch'] = len(seq_of_params) # Not explained: a write
+        started = time.perf_counter()
+        try:
+            self._cursor.executemany(sql, seq_of_params)
+        finally:
+            self._finish(started)
+        return self
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._finish(started, 1 if row is not None else 0)
+        return row
+
+    def fetchmany(self, size=None):
+        started = time.perf_counter()
+        rows = self._cursor.fetchmany(size) if size is not None else self._cursor.fetchmany()
+        self._finish(started, len(rows))
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._finish(started, len(rows))
+        return rows
+
+    def __iter__(self):
+        # Fetch in batches so 'for row in cursor' keeps streaming
+        while True:
+            rows = self.fetchmany(ITER_BATCH)
+            if not rows:
+                return
+            yield from rows
+
+    def __getattr__(self, name):
+        # lastrowid, rowcount, description, close, ...
+        return getattr(self._cursor, name)
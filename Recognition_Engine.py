@@ -0,0 +1,313 @@
+import datetime
+import logging
+import os
+import threading
+
+import Detection_Region
+import Face_Detection
+import Face_Encoding
+import Member_Directory
+import Recognition_Stats
+
+try:
+    import cv2
+    import face_recognition
+    import numpy as np
+except ImportError:
+    cv2 = None
+    face_recognition = None
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+PHOTO_DIR = "Members Photo"
+PROCESS_EVERY = 5           # Run recognition on every Nth frame (the rest are only displayed)
+MATCH_TOLERANCE = 0.6       # face_recognition.compare_faces default
+ENCODING_CACHE = ".encodings.npz" # Enrollment encodings, kept in the photo directory
+ENCODING_SIZE = 128
+
+def _profile_key(profile):
+    """Identifies the encoding settings a cached encoding was made with."""
+    return f"{profile['num_jitters']}:{profile['model']}"
+
+def load_encoding_cache(path, profile):
+    """
+    Reads cached photo encodings made with 'profile'.
+
+    Returns:
+        dict: {file name: ((mtime_ns, size), encoding or None if no face)},
+              empty if the cache is missing, unreadable or from other settings.
+    """
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if str(data['profile']) != _profile_key(profile):
+                return {}
+            return {str(file): ((int(mtime), int(size)), encoding if found else None)
+                    for file, mtime, size, found, encoding in zip(data['files'], data['mtimes'], data['sizes'],
+                                                                  data['found'], data['encodings'])}
+    except FileNotFoundError:
+        return {}
+    except (OSError, KeyError, ValueError) as e:
+        logger.warning("Ignoring unreadable encoding cache %s: %s", path, e)
+        return {}
+
+def save_encoding_cache(path, profile, entries):
+    """
+    Writes photo encodings (same layout as load_encoding_cache returns).
+    """
+    files = sorted(entries)
+    encodings = np.zeros((len(files), ENCODING_SIZE))
+    for row, file in enumerate(files):
+        if entries[file][1] is not None:
+            encodings[row] = entries[file][1]
+    temp_path = path + ".tmp"
+    try:
+        with open(temp_path, 'wb') as file:
+            np.savez(file, profile=np.array(_profile_key(profile)), files=np.array(files, dtype=str),
+                     mtimes=np.array([entries[f][0][0] for f in files], dtype=np.int64),
+                     sizes=np.array([entries[f][0][1] for f in files], dtype=np.int64),
+                     found=np.array([entries[f][1] is not None for f in files], dtype=bool),
+                     encodings=encodings)
+        os.replace(temp_path, path)
+    except OSError as e:
+        logger.warning("Could not save the encoding cache %s: %s", path, e)
+
+class RecognitionEngine:
+    """
+    Recognition and attendance logic without any GUI: loads the enrolled
+    faces, finds and matches faces in frames, and records each member's
+    check-in once per session. Used by the Mark Attendance window and by
+    the headless kiosk.
+    """
+
+    def __init__(self, db, photo_dir=PHOTO_DIR, directory=None, process_every=PROCESS_EVERY,
+                 tolerance=MATCH_TOLERANCE, region=None, stats=None):
+        """
+        Args:
+            db (DatabaseManager): Where check-ins are written.
+            photo_dir (str): The enrolled photos, named '<member id>.jpg'.
+            directory (MemberDirectory, optional): Member names. Defaults to db's shared directory.
+            process_every (int): Recognize on every Nth frame.
+            tolerance (float): Maximum face distance for a match.
+            region (DetectionRegion, optional): Detection crop. Defaults to the saved ROI.
+            stats (RecognitionStats, optional): Collects per-stage timings.
+        """
+        self.db = db
+        self.photo_dir = photo_dir
+        self.members = directory or Member_Directory.get_directory(db)
+        self.process_every = process_every
+        self.tolerance = tolerance
+        self.region = region or Detection_Region.DetectionRegion()
+        self.stats = stats or Recognition_Stats.RecognitionStats()
+        self.known_encodings = []
+        self.known_ids = []
+        self.recognized_ids = set() # Prevents duplicate entries in one session
+        self.frame_count = 0
+        self.detector = None
+        self.live_profile = None
+        self.calibration = None # Background calibration thread, while one runs
+
+    def load_known_faces(self):
+        """
+        Encodes every enrolled photo with the enrollment profile. Photos
+        whose name is not a member id are skipped with a warning. Encodings
+        are cached in the photo directory and only recomputed for photos
+        that are new or changed (by modification time and size), or when
+        the enrollment profile changes.
+
+        Returns:
+            int: The number of faces loaded.
+
+        Raises:
+            FileNotFoundError: If the photo directory does not exist.
+        """
+        if not os.path.exists(self.photo_dir):
+            raise FileNotFoundError(f"Directory not found: {self.photo_dir}")
+
+        encodings = []
+        ids = []
+        profile = Face_Encoding.get_profile('enrollment')
+        cache_path = os.path.join(self.photo_dir, ENCODING_CACHE)
+        cache = load_encoding_cache(cache_path, profile)
+        entries = {}
+        encoded = 0
+        logger.info("Loading known faces (%s jitters, %s landmarks)...", profile['num_jitters'], profile['model'])
+        for file in os.listdir(self.photo_dir):
+            if file.lower().endswith(('.jpg', '.jpeg', '.png')):
+                path = os.path.join(self.photo_dir, file)
+                member_id = os.path.splitext(file)[0] # Get ID from filename
+                if not member_id.isdigit():
+                    logger.warning("Skipping %s: photos must be named '<member id>.jpg'.", path)
+                    continue
+                try:
+                    info = os.stat(path)
+                    stamp = (info.st_mtime_ns, info.st_size)
+                    if file in cache and cache[file][0] == stamp:
+                        entries[file] = cache[file]
+                    else:
+                        image = cv2.imread(path)
+                        if image is None:
+                            logger.warning("Could not read %s, skipping.", path)
+                            continue
+
+                        rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+                        # Use face_locations to be more robust
+                        boxes = face_recognition.face_locations(rgb, model='hog') # 'cnn' is more accurate but slower
+
+                        # Use the first face found
+                        faces = Face_Encoding.encode_faces(rgb, boxes[:1], profile)
+                        entries[file] = (stamp, faces[0] if faces else None)
+                        encoded += 1
+
+                    if entries[file][1] is not None:
+                        encodings.append(entries[file][1])
+                        ids.append(member_id)
+                    else:
+                        logger.info("No face found in %s, skipped.", file)
+
+                except Exception as e:
+                    logger.error("Failed to process %s: %s", path, e)
+
+        if encoded or entries.keys() != cache.keys():
+            save_encoding_cache(cache_path, profile, entries)
+        self.known_encodings = encodings
+        self.known_ids = ids
+        logger.info("Loaded %s known faces (%s encoded, %s from cache).", len(encodings), encoded, len(entries) - encoded)
+        return len(encodings)
+
+    def start(self, calibrate=True):
+        """
+        Starts a session: loads the enrolled faces and the detector.
+
+        Calibration runs in a background thread, so the caller (e.g. the
+        Tk event loop) is not blocked; the configured detector is used
+        until it finishes.
+
+        Args:
+            calibrate (bool): Run the one-time detector calibration if it never
+                              ran at the detection scale in use.
+
+        Returns:
+            int: The number of known faces (0 means nothing can be recognized).
+        """
+        self.recognized_ids.clear()
+        self.frame_count = 0
+        count = self.load_known_faces()
+        if not count:
+            return 0
+
+        self.detector = Face_Detection.load_detector()
+        self.live_profile = Face_Encoding.get_profile('live')
+        logger.info("Using '%s' face detector at scale %s", self.detector.name, self.detector.scale)
+
+        scale = self.region.detection_scale(self.detector.scale)
+        running = self.calibration is not None and self.calibration.is_alive()
+        if calibrate and not running and Face_Detection.needs_calibration(scale):
+            self.calibration = threading.Thread(target=self._calibrate, args=(scale,),
+                                                name="detector-calibration", daemon=True)
+            self.calibration.start()
+        return count
+
+    def _calibrate(self, scale):
+        """
+        Runs the detector calibration (in the calibration thread) and
+        switches to the chosen detector. A failure is recorded so the
+        next start does not try again.
+        """
+        logger.info("Calibrating face detectors in the background (scale %s)...", scale)
+        try:
+            Face_Detection.calibrate(self.photo_dir, scale=scale)
+        except Exception as e:
+            logger.warning("Detector calibration failed, keeping '%s': %s", self.detector.name, e)
+            Face_Detection.save_failed_calibration(scale, e)
+            return
+        self.detector = Face_Detection.load_detector()
+        logger.info("Calibration done; now using the '%s' face detector.", self.detector.name)
+
+    def stop(self):
+        """
+        Ends a session, keeping a learned detection region for next time.
+        """
+        if self.region.settings['auto_learn']:
+            self.region.save()
+
+    def process(self, frame, check_in=True):
+        """
+        Feeds one BGR frame through the pipeline. Recognition runs on every
+        'process_every'-th frame.
+
+        Args:
+            frame (numpy.ndarray): The full-resolution BGR frame.
+            check_in (bool): Record attendance for new members right away. A GUI
+                             passes False and calls check_in() from its event loop.
+
+        Returns:
+            list: One event per newly recognized member: a check-in event (see
+                  check_in), or {'event': 'recognized', 'member_id', 'frame'}
+                  when check_in is False.
+        """
+        self.frame_count += 1
+        if self.frame_count % self.process_every != 0:
+            return []
+
+        detector = self.detector # May be swapped by the calibration thread
+        # Resize for *processing* (only the detection region, at a finer scale, once one is set)
+        with self.stats.measure("resize"):
+            rgb_small, transform = self.region.prepare(frame, detector.scale)
+
+        # Locate and encode separately so each stage is timed
+        with self.stats.measure("detect"):
+            boxes = detector.locate(rgb_small)
+        self.region.observe(boxes, transform, frame.shape)
+        with self.stats.measure("encode"):
+            face_encodings = Face_Encoding.encode_faces(rgb_small, boxes, self.live_profile)
+
+        new_ids = []
+        with self.stats.measure("match"):
+            for face_encoding in face_encodings:
+                # Compare against known faces
+                matches = face_recognition.compare_faces(self.known_encodings, face_encoding, self.tolerance)
+                if True in matches:
+                    member_id = self.known_ids[matches.index(True)]
+                    # Check if we've *already* marked this person in this session
+                    if member_id not in self.recognized_ids:
+                        self.recognized_ids.add(member_id)
+                        logger.info("Recognized member %s", member_id)
+                        new_ids.append(member_id)
+
+        if not check_in:
+            return [{'event': 'recognized', 'member_id': int(member_id), 'frame': self.frame_count}
+                    for member_id in new_ids]
+        events = []
+        for member_id in new_ids:
+            event = self.check_in(member_id)
+            if event:
+                events.append(event)
+        return events
+
+    def check_in(self, member_id):
+        """
+        Records a recognized member's attendance.
+
+        Args:
+            member_id (str or int): The member's ID (photo file name).
+
+        Returns:
+            dict: {'event': 'check_in', 'member_id', 'name', 'date', 'time', 'frame'},
+                  or None if the insert failed.
+        """
+        now = datetime.datetime.now()
+        date_str = now.strftime('%d-%m-%Y')
+        time_str = now.strftime('%I:%M:%S %p')
+        member_id = int(member_id)
+        with self.stats.measure("db_insert"):
+            inserted = self.db.insert_attendance(member_id, date_str, time_str)
+        if not inserted:
+            logger.error("Failed to insert attendance for ID %s", member_id)
+            return None
+        name = self.members.name(member_id, f"ID {member_id}")
+        logger.info("Attendance marked for ID %s (%s) at %s", member_id, name, time_str)
+        return {'event': 'check_in', 'member_id': member_id, 'name': name,
+                'date': date_str, 'time': time_str, 'frame': self.frame_count}
@@ -0,0 +1,157 @@
+import json
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import cv2 # Only needed to draw the overlay
+except ImportError:
+    cv2 = None
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+STAGES = ("capture", "resize", "detect", "encode", "match", "db_insert", "render")
+HISTOGRAM_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000) # Upper bounds; the last bucket is "more"
+WINDOW_SIZE = 300 # Samples kept per stage (rolling)
+METRICS_FILE = "recognition_metrics.jsonl"
+
+def percentile(sorted_values, fraction):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    index = min(int(fraction * len(sorted_values)), len(sorted_values) - 1)
+    return sorted_values[index]
+
+class RecognitionStats:
+    """
+    Collects per-stage timings of the recognition pipeline in rolling
+    windows, summarizes them as percentiles and histograms, and can draw
+    them on a frame or append them to a metrics file.
+    """
+
+    def __init__(self, window_size=WINDOW_SIZE):
+        """
+        Args:
+            window_size (int): Number of recent samples kept per stage.
+        """
+        self.samples = {stage: deque(maxlen=window_size) for stage in STAGES}
+        self.frame_times = deque(maxlen=window_size)
+        self.frames = 0
+
+    def record(self, stage, seconds):
+        """
+        Adds one timing sample for a stage.
+
+        Args:
+            stage (str): One of STAGES.
+            seconds (float): The measured duration.
+        """
+        self.samples[stage].append(seconds * 1000.0)
+
+    @contextmanager
+    def measure(self, stage):
+        """
+        Context manager that times the enclosed block as 'stage'.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started)
+
+    def tick_frame(self):
+        """
+        Marks the end of one displayed frame (used for the FPS figure).
+        """
+        self.frames += 1
+        self.frame_times.append(time.perf_counter())
+
+    def fps(self):
+        """
+        Frames per second over the rolling window.
+        """
+        if len(self.frame_times) < 2:
+            return 0.0
+        elapsed = self.frame_times[-1] - self.frame_times[0]
+        return (len(self.frame_times) - 1) / elapsed if elapsed > 0 else 0.0
+
+    def summary(self):
+        """
+        Summarizes every stage that has samples.
+
+        Returns:
+            dict: stage -> {'count', 'mean_ms', 'p50_ms', 'p95_ms', 'max_ms', 'histogram'}
+                  where histogram maps bucket upper bounds ('<=5', ..., '>1000') to counts.
+        """
+        result = {}
+        for stage, values in self.samples.items():
+            if not values:
+                continue
+            ordered = sorted(values)
+            histogram = {f"<={bound}": 0 for bound in HISTOGRAM_BUCKETS_MS}
+            histogram[f">{HISTOGRAM_BUCKETS_MS[-1]}"] = 0
+            for value in ordered:
+                for bound in HISTOGRAM_BUCKETS_MS:
+                    if value <= bound:
+                        histogram[f"<={bound}"] += 1
+                        break
+                else:
+                    histogram[f">{HISTOGRAM_BUCKETS_MS[-1]}"] += 1
+            result[stage] = {
+                'count': len(ordered),
+                'mean_ms': sum(ordered) / len(ordered),
+                'p50_ms': percentile(ordered, 0.50),
+                'p95_ms': percentile(ordered, 0.95),
+                'max_ms': ordered[-1],
+                'histogram': histogram,
+            }
+        return result
+
+    def overlay_lines(self):
+        """
+        Short text lines for the on-screen overlay.
+        """
+        lines = [f"FPS {self.fps():.1f}"]
+        for stage, stats in self.summary().items():
+            lines.append(f"{stage:<9} p50 {stats['p50_ms']:6.1f} p95 {stats['p95_ms']:6.1f} ms")
+        return lines
+
+    def draw_overlay(self, frame, scale=0.35):
+        """
+        Draws the overlay text onto a frame in place.
+
+        Args:
+            frame (numpy.ndarray): The frame to draw on.
+            scale (float): Font scale (small for the 300x300 preview).
+        """
+        if cv2 is None:
+            return
+        line_height = int(30 * scale) + 4
+        for i, line in enumerate(self.overlay_lines()):
+            position = (5, line_height * (i + 1))
+            cv2.putText(frame, line, position, cv2.FONT_HERSHEY_SIMPLEX, scale, (0, 0, 0), 3, cv2.LINE_AA)
+            cv2.putText(frame, line, position, cv2.FONT_HERSHEY_SIMPLEX, scale, (255, 255, 0), 1, cv2.LINE_AA)
+
+    def dump(self, path=METRICS_FILE, label=None):
+        """
+        Appends the current summary as one JSON line to a metrics file.
+
+        Args:
+            path (str): The metrics file.
+            label (str, optional): Free text to identify the machine/run.
+        """
+        record = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'label': label,
+            'frames': self.frames,
+            'fps': self.fps(),
+            'stages': self.summary(),
+        }
+        with open(path, 'a') as file:
+            file.write(json.dumps(record) + "\n")
+        logger.info("Recognition metrics appended to %s", path)
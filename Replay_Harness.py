@@ -0,0 +1,239 @@
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import App_Logging
+import Detection_Region
+import Face_Detection
+import Headless_Kiosk
+import Manage_Data
+import Recognition_Engine
+import Recognition_Stats
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+LABELS_FILE = "labels.json"
+DEFAULT_FPS = 30.0           # Nominal camera rate used to turn frame counts into seconds
+MAX_LATENCY_FRAMES = 30      # Default allowed delay between a member appearing and their check-in
+
+# A scenario is a JSON file; paths are relative to it:
+# {
+#     "source": "entrance.mp4",              # video file, or a folder of frames (+ labels.json)
+#     "photos": "photos",                    # enrolled photos named <member id>.jpg
+#     "expected": [{"member_id": 3, "first_frame": 40}, {"member_id": 7}],
+#     "fps": 30, "process_every": 5, "detector": "hog", "max_latency_frames": 30
+# }
+# For a frame folder, labels.json maps frame file names to the member ids
+# visible in them; the expected check-ins are then derived from it.
+
+def load_scenario(path):
+    """
+    Reads a scenario file and resolves its paths and expectations.
+
+    Returns:
+        dict: The scenario with absolute 'source'/'photos' and an 'expected' list.
+
+    Raises:
+        ValueError: If the scenario has no source or expectations.
+    """
+    with open(path, 'r') as file:
+        scenario = json.load(file)
+    base = os.path.dirname(os.path.abspath(path))
+    if 'source' not in scenario:
+        raise ValueError(f"{path}: 'source' is required")
+    scenario['name'] = scenario.get('name') or os.path.splitext(os.path.basename(path))[0]
+    scenario['source'] = os.path.join(base, scenario['source'])
+    scenario['photos'] = os.path.join(base, scenario.get('photos', Recognition_Engine.PHOTO_DIR))
+
+    labels_path = os.path.join(scenario['source'], LABELS_FILE)
+    if 'expected' not in scenario and os.path.isdir(scenario['source']) and os.path.exists(labels_path):
+        scenario['expected'] = expected_from_labels(scenario['source'], labels_path)
+    if 'expected' not in scenario:
+        raise ValueError(f"{path}: 'expected' is required for video sources")
+    return scenario
+
+def frame_files(folder):
+    """Returns the image files of a frame folder in playback order."""
+    return sorted(f for f in os.listdir(folder) if f.lower().endswith(IMAGE_EXTENSIONS))
+
+def expected_from_labels(folder, labels_path):
+    """
+    Turns per-frame labels into expected check-ins: each labelled member
+    must be checked in, counted from the first frame they appear in.
+    """
+    with open(labels_path, 'r') as file:
+        labels = json.load(file)
+    first_seen = {}
+    for index, name in enumerate(frame_files(folder), start=1):
+        for member_id in labels.get(name, []):
+            first_seen.setdefault(int(member_id), index)
+    return [{'member_id': member_id, 'first_frame': frame} for member_id, frame in sorted(first_seen.items())]
+
+def replay_frames(source):
+    """
+    Yields the frames of a video file or a folder of images.
+    """
+    if os.path.isdir(source):
+        for name in frame_files(source):
+            frame = cv2.imread(os.path.join(source, name))
+            if frame is None:
+                logger.warning("Could not read frame %s, skipping.", name)
+                continue
+            yield frame
+    else:
+        yield from Headless_Kiosk.video_frames(source)
+
+def create_replay_db(path, photo_dir):
+    """
+    Creates a throwaway database with one member per enrolled photo, so
+    check-ins satisfy the foreign key without touching GYM.db.
+    """
+    db = Manage_Data.DatabaseManager(path)
+    member_ids = []
+    for file in os.listdir(photo_dir):
+        stem = os.path.splitext(file)[0]
+        if file.lower().endswith(IMAGE_EXTENSIONS) and stem.isdigit():
+            member_ids.append(int(stem))
+    with db.conn:
+        db.cursor.executemany("INSERT OR IGNORE INTO Members (id, full_name, join_date) VALUES (?, ?, '01-01-2024')",
+                              [(member_id, f"Member {member_id}") for member_id in member_ids])
+    return db
+
+def check_results(scenario, checkins, fps):
+    """
+    Compares the check-ins of a replay with the scenario's expectations.
+
+    Returns:
+        list: Human-readable failures (empty if the replay passed).
+    """
+    failures = []
+    max_latency = scenario.get('max_latency_frames', MAX_LATENCY_FRAMES)
+    seen = {}
+    for checkin in checkins:
+        if checkin['member_id'] in seen:
+            failures.append(f"member {checkin['member_id']} checked in twice")
+        seen.setdefault(checkin['member_id'], checkin)
+
+    expected_ids = set()
+    for expected in scenario['expected']:
+        member_id = int(expected['member_id'])
+        expected_ids.add(member_id)
+        checkin = seen.get(member_id)
+        if checkin is None:
+            failures.append(f"member {member_id} was not checked in")
+            continue
+        first_frame = expected.get('first_frame')
+        if first_frame is not None:
+            checkin['latency_frames'] = checkin['frame'] - first_frame
+            checkin['latency_s'] = checkin['latency_frames'] / fps + checkin['processing_s']
+            if checkin['frame'] < first_frame:
+                failures.append(f"member {member_id} checked in at frame {checkin['frame']}, before appearing (frame {first_frame})")
+            elif checkin['latency_frames'] > expected.get('max_latency_frames', max_latency):
+                failures.append(f"member {member_id} checked in {checkin['latency_frames']} frames after appearing")
+
+    for member_id in sorted(set(seen) - expected_ids):
+        failures.append(f"unexpected check-in of member {member_id} at frame {seen[member_id]['frame']}")
+    return failures
+
+def replay(scenario):
+    """
+    Plays a scenario through the recognition engine (the same detect,
+    encode, match and dedup path as Mark Attendance) and checks the result.
+
+    Returns:
+        dict: 'name', 'passed', 'failures', 'checkins', 'frames',
+              'processing_fps' and per-stage timing 'stages'.
+    """
+    workdir = tempfile.mkdtemp(prefix="gym_replay_")
+    db = create_replay_db(os.path.join(workdir, "replay.db"), scenario['photos'])
+    # A fresh region so a locally saved ROI does not change the result
+    region = Detection_Region.DetectionRegion(dict(Detection_Region.DEFAULT_SETTINGS))
+    stats = Recognition_Stats.RecognitionStats(window_size=100000)
+    engine = Recognition_Engine.RecognitionEngine(
+        db, scenario['photos'],
+        process_every=scenario.get('process_every', Recognition_Engine.PROCESS_EVERY),
+        region=region, stats=stats)
+    fps = float(scenario.get('fps', DEFAULT_FPS))
+    checkins = []
+    frames = 0
+    busy = 0.0
+    try:
+        if not engine.start(calibrate=False):
+            return {'name': scenario['name'], 'passed': False, 'failures': ["no known faces in the photos"],
+                    'checkins': [], 'frames': 0, 'processing_fps': 0.0, 'stages': {}}
+        if scenario.get('detector'):
+            engine.detector = Face_Detection.FaceDetector(scenario['detector'], Face_Detection.load_settings())
+
+        for frame in replay_frames(scenario['source']):
+            started = time.perf_counter()
+            events = engine.process(frame)
+            elapsed = time.perf_counter() - started
+            busy += elapsed
+            frames += 1
+            for event in events:
+                checkins.append({'member_id': event['member_id'], 'frame': event['frame'], 'processing_s': elapsed})
+    finally:
+        db.close_connection()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    failures = check_results(scenario, checkins, fps)
+    return {
+        'name': scenario['name'],
+        'passed': not failures,
+        'failures': failures,
+        'checkins': checkins,
+        'frames': frames,
+        'processing_fps': frames / busy if busy else 0.0,
+        'stages': stats.summary(),
+    }
+
+def main(argv=None):
+    """
+    Command line entry point: python Replay_Harness.py scenario.json [...]
+    Exits with 1 if any scenario fails, so it can gate a CI job.
+    """
+    parser = argparse.ArgumentParser(description="Replay recorded scenarios through the recognition pipeline.")
+    parser.add_argument("scenarios", nargs="+", help="Scenario JSON files")
+    parser.add_argument("--output", help="Write the full report as JSON to this file")
+    args = parser.parse_args(argv)
+    App_Logging.setup_logging()
+    if cv2 is None:
+        logger.critical("The replay harness needs OpenCV, numpy and face_recognition.")
+        return 1
+
+    reports = []
+    for path in args.scenarios:
+        try:
+            report = replay(load_scenario(path))
+        except (ValueError, RuntimeError, OSError) as e:
+            report = {'name': path, 'passed': False, 'failures': [str(e)], 'checkins': [], 'frames': 0}
+        reports.append(report)
+        status = "PASS" if report['passed'] else "FAIL"
+        print(f"{status} {report['name']}: {report['frames']} frames, "
+              f"{report.get('processing_fps', 0.0):.1f} fps, {len(report['checkins'])} check-ins")
+        for checkin in report['checkins']:
+            latency = f", {checkin['latency_s']:.2f} s after appearing" if 'latency_s' in checkin else ""
+            print(f"    member {checkin['member_id']} at frame {checkin['frame']}{latency}")
+        for failure in report['failures']:
+            print(f"    - {failure}")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(reports, file, indent=4)
+        logger.info("Replay report written to %s", args.output)
+    return 0 if all(report['passed'] for report in reports) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
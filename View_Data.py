@@ -1,11 +1,18 @@
 from PIL import Image, ImageTk
 import customtkinter as ctk
 from CTkMessagebox import CTkMessagebox
-from tkinter import ttk
+from tkinter import ttk, filedialog
 import Manage_Data
+import Member_Directory
+import Event_Bus
+import Export_Data
+import threading
 import os # Added for file path checking
+import logging
 import sys # Added for safe exit on critical error
 
+logger = logging.getLogger(__name__)
+
 # --- Constants ---
 BUTTON_FONT = ("Poppins", 20)
 LABEL_FONT = ("Poppins", 16)
@@ -24,15 +31,17 @@ class ViewData(ctk.CTkToplevel):
         Initializes the ViewData window, database connection, and default state.
         """
         super().__init__(parent)
-        print("[INFO] Initializing 'View Data' window...")
+        logger.info("Initializing 'View Data' window...")
         self.title("View Member Data")
         self.geometry("1400x750")
         ctk.set_appearance_mode('dark')
         
         try:
             self.db = Manage_Data.DatabaseManager("GYM.db")
+            self.members = Member_Directory.get_directory(self.db) # Shared member lookup
+            self.bus = Event_Bus.get_bus(self.db) # Row-level change notifications
         except Exception as e:
-            print(f"[CRITICAL] ViewData: Failed to load database: {e}")
+            logger.critical("ViewData: Failed to load database: %s", e)
             MESSAGE_BOX(title="Critical Error", message=f"Could not load database: {e}", icon="cancel")
             self.destroy()
             return
@@ -40,10 +49,16 @@ class ViewData(ctk.CTkToplevel):
         self.person_id = None # Tracks the ID of the searched member
         self.current_table = ctk.StringVar(value='Members') # Tracks current table
         self.table_frame = None # Will hold the current ttk.Treeview frame
+        self.table = None # The current ttk.Treeview (item ids are row ids)
         self.default_image = None # To store the loaded default image
+        self.export_state = None # Progress of a running export: {'done', 'total', 'error', 'finished'}
 
         self.layout()
         self.display_table() # Display the default table ("Members") on startup
+
+        # Patch the table when rows change, instead of reloading it
+        self.bus.subscribe(self.on_change)
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
         
     def labelEntry_Component(self, parent, text, placeholder):
         """
@@ -68,7 +83,7 @@ class ViewData(ctk.CTkToplevel):
         """
         Creates and places all widgets for the ViewData window.
         """
-        print("[INFO] Building 'View Data' layout...")
+        logger.info("Building 'View Data' layout...")
         # --- Left Panel (Info Frame) ---
         infoFrame = ctk.CTkScrollableFrame(self, fg_color='transparent')
         
@@ -97,6 +112,23 @@ class ViewData(ctk.CTkToplevel):
         ctk.CTkButton(infoFrame, text='Search User', font=("Poppins", 20), width=220,
             fg_color="#fff", corner_radius=7, text_color='#000000',
             hover_color="#CAF4FF", command=self.search_user).pack(fill='x', padx=20, pady=10)
+
+        # --- Export (current table, optional date range) ---
+        export_Frame = ctk.CTkFrame(infoFrame, fg_color='transparent')
+        self.export_from_entry = self.labelEntry_Component(export_Frame, 'Export From (DD-MM-YYYY, optional)', '01-10-2025')
+        self.export_to_entry = self.labelEntry_Component(export_Frame, 'Export To (DD-MM-YYYY, optional)', '31-10-2025')
+        export_Frame.pack(fill='x', padx=20, pady=(20, 0))
+
+        self.export_button = ctk.CTkButton(infoFrame, text='Export Table', font=("Poppins", 20), width=220,
+            fg_color="#fff", corner_radius=7, text_color='#000000',
+            hover_color="#CAF4FF", command=self.export_table)
+        self.export_button.pack(fill='x', padx=20, pady=10)
+
+        self.export_progress = ctk.CTkProgressBar(infoFrame)
+        self.export_progress.set(0)
+        self.export_progress.pack(fill='x', padx=20)
+        self.export_status = ctk.CTkLabel(infoFrame, text='', font=LABEL_FONT)
+        self.export_status.pack(padx=20, pady=(0, 10))
         
         infoFrame.place(relx=0, rely=0, relwidth=0.25, relheight=1)
         
@@ -113,7 +145,7 @@ class ViewData(ctk.CTkToplevel):
         Args:
             choice (str): The selected table name (e.g., "Members").
         """
-        print(f"[INFO] Table selected: {choice}")
+        logger.info("Table selected: %s", choice)
         self.person_id = None # Clear the active user search
         
         # Clear search fields
@@ -131,7 +163,7 @@ class ViewData(ctk.CTkToplevel):
         current state (self.current_table and self.person_id).
         """
         table_name = self.current_table.get()
-        print(f"[INFO] Displaying table '{table_name}'. User ID: {self.person_id}")
+        logger.info("Displaying table '%s'. User ID: %s", table_name, self.person_id)
 
         # 1. Destroy the old table frame if it exists
         if self.table_frame:
@@ -142,17 +174,7 @@ class ViewData(ctk.CTkToplevel):
         self.table_frame = ctk.CTkFrame(self.table_container, fg_color='transparent')
         self.table_frame.pack(fill='both', expand=True, padx=10, pady=10)
 
-        # 3. Get all member data for name mapping
-        try:
-            members_list = self.db.get_all_from_table('Members')
-            # Create a dictionary: {1: 'Tony Stark', 2: 'Steve Rogers'}
-            member_map = {member[0]: member[1] for member in members_list} # m[0] is id, m[1] is full_name
-        except Exception as e:
-            print(f"[ERROR] Failed to build member map: {e}")
-            MESSAGE_BOX(title="Error", message=f"Failed to load member list: {e}", icon="cancel")
-            return
-
-        # 4. Define columns and fetch data based on the selected table
+        # 3. Define columns and fetch data based on the selected table
         cols = ()
         data_to_display = []
 
@@ -162,10 +184,9 @@ class ViewData(ctk.CTkToplevel):
                         "member_status", "join_date", "membership_type", "membership_start_date", 
                         "membership_end_date", "emergency_name", "emergency_number")
                 
-                # If a user is searched, get their data; otherwise, get all members
-                data = (self.db.get_data_by_member_id("Members", self.person_id)
-                        if self.person_id else members_list)
-                data_to_display = data # Data is already in the correct format
+                # If a user is searched, show their row; otherwise, all members
+                records = [self.members.get(self.person_id)] if self.person_id else self.members
+                data_to_display = [record.to_row() for record in records if record is not None]
 
             elif table_name == "Attendance":
                 cols = ("id", "member_id", "full_name", "date", "check_in_time")
@@ -174,30 +195,22 @@ class ViewData(ctk.CTkToplevel):
                 # This data will NOT have names
                 raw_data = (self.db.get_data_by_member_id("Attendance", self.person_id)
                             if self.person_id else self.db.get_all_from_table("Attendance"))
-                
-                # Manually build the table rows with the correct name
-                for row in raw_data: # row = (id, member_id, date, check_in_time)
-                    name = member_map.get(row[1], f"ID {row[1]} Not Found")
-                    data_to_display.append((row[0], row[1], name, row[2], row[3]))
+                data_to_display = self.members.named_rows(raw_data)
 
             elif table_name == "Payment":
                 cols = ("id", "member_id", "full_name", "payment_date", "amount", "payment_method")
                 
                 raw_data = (self.db.get_data_by_member_id("Payment", self.person_id)
                             if self.person_id else self.db.get_all_from_table("Payment"))
-                
-                # Manually build the table rows with the correct name
-                for row in raw_data: # row = (id, member_id, date, amount, method)
-                    name = member_map.get(row[1], f"ID {row[1]} Not Found")
-                    data_to_display.append((row[0], row[1], name, row[2], row[3], row[4]))
+                data_to_display = self.members.named_rows(raw_data)
 
         except Exception as e:
-            print(f"[ERROR] Failed to fetch data for table '{table_name}': {e}")
+            logger.error("Failed to fetch data for table '%s': %s", table_name, e)
             MESSAGE_BOX(title="Error", message=f"Failed to load data for {table_name}:\n{e}", icon="cancel")
             return
 
-        # 5. Create and populate the Treeview
-        table = ttk.Treeview(self.table_frame, columns=cols, show='headings')
+        # 4. Create and populate the Treeview
+        self.table = table = ttk.Treeview(self.table_frame, columns=cols, show='headings')
         
         for col in cols:
             text = col.replace("_", " ").title()
@@ -215,9 +228,9 @@ class ViewData(ctk.CTkToplevel):
         table.pack(fill='both', expand=True)
 
         for row in data_to_display:
-            table.insert(parent='', index='end', values=row)
+            table.insert(parent='', index='end', iid=str(row[0]), values=row)
             
-        # 6. Add Scrollbars
+        # 5. Add Scrollbars
         table_scrollbar_y = ttk.Scrollbar(self.table_frame, orient='vertical', command=table.yview)
         table.configure(yscrollcommand=table_scrollbar_y.set)
         table_scrollbar_y.pack(side='right', fill='y')
@@ -226,6 +239,55 @@ class ViewData(ctk.CTkToplevel):
         table.configure(xscrollcommand=table_scrollbar_x.set)
         table_scrollbar_x.pack(side='bottom', fill='x')
 
+    def display_row(self, table_name, row):
+        """
+        Builds the displayed values of a table row. Attendance and Payment
+        rows get the member's name (from the member directory) after 'member_id'.
+
+        Args:
+            table_name (str): The table the row comes from.
+            row (tuple): The row as stored ('SELECT *').
+
+        Returns:
+            tuple: The values for the Treeview.
+        """
+        if table_name == "Members":
+            return row
+        return self.members.named_row(row)
+
+    def on_change(self, change):
+        """
+        Event bus subscriber: updates, adds or removes the one changed row
+        if it belongs in the table currently shown.
+
+        Args:
+            change (Event_Bus.Change): The row-level change.
+        """
+        table_name = self.current_table.get()
+        if self.table is None or not self.table.winfo_exists():
+            return
+        if change.table_name != table_name:
+            if change.table_name == "Members":
+                Event_Bus.patch_member_name(self.table, change)
+            return
+        if self.person_id and str(change.member_id) != str(self.person_id):
+            return # Not the searched member
+        values = self.display_row(table_name, change.row) if change.row is not None else None
+        Event_Bus.patch_row(self.table, change, values)
+
+    def on_close(self):
+        """
+        Handles the window 'X' button click.
+        Stops listening for changes and closes the database connection.
+        """
+        logger.info("'View Data' window closing...")
+        self.bus.unsubscribe(self.on_change)
+        try:
+            self.db.close_connection()
+        except Exception as e:
+            logger.error("Error closing DB connection: %s", e)
+        self.destroy()
+
     def person_photo(self, parent):
         """
         Creates the frame and label for displaying the member's photo.
@@ -239,7 +301,7 @@ class ViewData(ctk.CTkToplevel):
             self.default_image = Image.open(DEFAULT_PHOTO)
             self.default_image = self.default_image.resize(image_size, Image.LANCZOS)
         except FileNotFoundError:
-            print(f"[ERROR] Default photo '{DEFAULT_PHOTO}' not found. Creating placeholder.")
+            logger.error("Default photo '%s' not found. Creating placeholder.", DEFAULT_PHOTO)
             self.default_image = Image.new("RGB", image_size, (10, 10, 10))
             
         self.image_person = ctk.CTkImage(self.default_image, size=image_size)
@@ -250,7 +312,7 @@ class ViewData(ctk.CTkToplevel):
 
     def reset_photo(self):
         """Resets the image label to the default placeholder."""
-        print("[INFO] Resetting photo to default.")
+        logger.info("Resetting photo to default.")
         if self.default_image:
             self.image_person.configure(dark_image=self.default_image, size=(300, 300))
         
@@ -260,7 +322,7 @@ class ViewData(ctk.CTkToplevel):
         If found, sets self.person_id and refreshes the table to show their data.
         If not found, clears self.person_id and refreshes to show all data.
         """
-        print("[INFO] Searching for user...")
+        logger.info("Searching for user...")
         name = self.full_name_entry.get().strip().title()
         dob = self.dob_entry.get().strip()
         phone = self.phone_entry.get().strip()
@@ -274,12 +336,11 @@ class ViewData(ctk.CTkToplevel):
             return
             
         try:
-            # Use the new secure function from Manage_Data.py
-            member_data = self.db.get_member_by_details(name, dob, phone)
+            member = self.members.find(name, dob, phone)
             
-            if member_data:
-                self.person_id = member_data[0] # member_data[0] is the 'id'
-                print(f"[INFO] Member found with ID: {self.person_id}")
+            if member:
+                self.person_id = member.id
+                logger.info("Member found with ID: %s", self.person_id)
                 
                 # --- Load Member Photo (Safely) ---
                 image_path = os.path.join(PHOTO_DIR, f"{self.person_id}.jpg")
@@ -287,20 +348,20 @@ class ViewData(ctk.CTkToplevel):
                     new_image = Image.open(image_path)
                     new_image = new_image.resize((300, 300), Image.LANCZOS)
                     self.image_person.configure(dark_image=new_image, size=(300, 300))
-                    print(f"[INFO] Loaded photo: {image_path}")
+                    logger.info("Loaded photo: %s", image_path)
                 except FileNotFoundError:
-                    print(f"[WARN] Photo not found for member ID {self.person_id} at {image_path}")
+                    logger.warning("Photo not found for member ID %s at %s", self.person_id, image_path)
                     self.reset_photo()
                     MESSAGE_BOX(title="Info", message="Member found, but no photo exists.", icon="info")
                 
             else:
-                print("[WARN] No matching member found.")
+                logger.warning("No matching member found.")
                 self.person_id = None
                 self.reset_photo()
                 MESSAGE_BOX(title="Error", message="No matching member found", icon="cancel")
         
         except Exception as e:
-            print(f"[ERROR] Error during user search: {e}")
+            logger.error("Error during user search: %s", e)
             self.person_id = None
             self.reset_photo()
             MESSAGE_BOX(title="Error", message=f"An error occurred: {e}", icon="cancel")
@@ -308,3 +369,88 @@ class ViewData(ctk.CTkToplevel):
         # Finally, refresh the table.
         # It will either show the found user's data or all data (if person_id is None)
         self.display_table()
+
+    def export_table(self):
+        """
+        Exports the currently selected table (and searched member, if any)
+        to CSV, JSON Lines or Parquet. The export streams from its own
+        database connection in a background thread so the window stays
+        responsive; progress is polled with check_export_progress.
+        """
+        logger.info("'Export Table' clicked.")
+        if self.export_state and not self.export_state['finished']:
+            MESSAGE_BOX(title="Info", message="An export is already running.", icon="info")
+            return
+
+        table_name = self.current_table.get()
+        try:
+            start_text = self.export_from_entry.get().strip()
+            end_text = self.export_to_entry.get().strip()
+            start_day = Manage_Data.to_iso_day(start_text) if start_text else None
+            end_day = Manage_Data.to_iso_day(end_text) if end_text else None
+        except ValueError:
+            MESSAGE_BOX(title="Error", message="Dates must be in DD-MM-YYYY format.", icon="cancel")
+            return
+
+        path = filedialog.asksaveasfilename(
+            parent=self, title=f"Export {table_name}", initialfile=f"{table_name}.csv",
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl"), ("Parquet", "*.parquet")])
+        if not path:
+            logger.info("Export cancelled.")
+            return
+
+        self.export_state = {'done': 0, 'total': 0, 'error': None, 'finished': False}
+        self.export_button.configure(state="disabled")
+        self.export_progress.set(0)
+        self.export_status.configure(text="Exporting...")
+
+        worker = threading.Thread(target=self.run_export,
+                                  args=(table_name, path, start_day, end_day, self.person_id, self.export_state),
+                                  daemon=True)
+        worker.start()
+        self.after(100, self.check_export_progress)
+
+    def run_export(self, table_name, path, start_day, end_day, member_id, state):
+        """
+        Background thread body for export_table.
+        SQLite connections cannot be shared across threads, so this opens its own.
+        """
+        db = None
+        try:
+            db = Manage_Data.DatabaseManager("GYM.db")
+
+            def on_progress(done, total):
+                state['done'] = done
+                state['total'] = total
+
+            Export_Data.export_table(db, table_name, path, start_day=start_day, end_day=end_day,
+                                     member_id=member_id, progress=on_progress)
+        except Exception as e:
+            logger.error("Export failed: %s", e)
+            state['error'] = e
+        finally:
+            if db:
+                db.close_connection()
+            state['finished'] = True
+
+    def check_export_progress(self):
+        """
+        Polls the running export and updates the progress bar.
+        """
+        state = self.export_state
+        if state['total']:
+            self.export_progress.set(state['done'] / state['total'])
+        self.export_status.configure(text=f"Exported {state['done']} / {state['total']} rows")
+
+        if not state['finished']:
+            self.after(100, self.check_export_progress)
+            return
+
+        self.export_button.configure(state="normal")
+        if state['error']:
+            self.export_status.configure(text="Export failed")
+            MESSAGE_BOX(title="Error", message=f"Export failed:\n{state['error']}", icon="cancel")
+        else:
+            self.export_progress.set(1)
+            MESSAGE_BOX(title="Success", message=f"Exported {state['done']} rows.", icon="check")
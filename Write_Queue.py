@@ -0,0 +1,159 @@
+import concurrent.futures
+import logging
+import queue
+import sqlite3
+import threading
+
+import Manage_Data
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+BATCH_LIMIT = 64      # Most queued writes committed together
+SUBMIT_TIMEOUT = 30.0 # Seconds a caller waits for its write
+
+class WriteQueue:
+    """
+    A single writer thread that owns the only writing connection of this
+    process. DatabaseManagers created with writer=<queue> hand it their
+    writes instead of competing for SQLite's write lock. Writes that queue
+    up while a commit is in progress are committed together (one disk
+    sync), each inside its own savepoint so a failing write does not undo
+    the others.
+    """
+
+    def __init__(self, db_name, batch_limit=BATCH_LIMIT):
+        """
+        Args:
+            db_name (str): The SQLite database file.
+            batch_limit (int): Most writes committed in one transaction.
+        """
+        self.db_name = db_name
+        self.batch_limit = batch_limit
+        self._jobs = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        """
+        Starts the writer thread (submit() does this on first use).
+        """
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+            self._thread.start()
+
+    def submit(self, work, timeout=SUBMIT_TIMEOUT):
+        """
+        Runs work(cursor) on the writer thread and waits for it to commit.
+
+        If the write has not started when the timeout expires, it is
+        cancelled. If it has already started, it may still commit after
+        this raised, so a caller that retries could write it twice.
+
+        Args:
+            work (callable): Takes the writer's cursor and performs the writes.
+            timeout (float): Seconds to wait for the commit.
+
+        Returns:
+            Whatever work returns.
+
+        Raises:
+            sqlite3.Error: If the write failed (it was rolled back).
+            sqlite3.OperationalError: Also if the write was not committed in
+                                      time (see above for whether it still may be).
+        """
+        if self._thread is None:
+            self.start()
+        future = concurrent.futures.Future()
+        self._jobs.put((work, future))
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            if future.cancel():
+                raise sqlite3.OperationalError(f"Write not started after {timeout} s; it was cancelled.") from None
+            raise sqlite3.OperationalError(f"Write not committed after {timeout} s; "
+                                           "it may still be committed.") from None
+
+    def close(self):
+        """
+        Commits the writes already queued, then stops the writer thread.
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._jobs.put(None)
+            thread.join()
+
+    def _run(self):
+        """
+        Writer thread: takes the queued writes in batches and commits them.
+        """
+        db = Manage_Data.DatabaseManager(self.db_name) # Owned by this thread
+        logger.info("Single-writer queue started for %s", self.db_name)
+        try:
+            stopping = False
+            while not stopping:
+                job = self._jobs.get()
+                if job is None:
+                    break
+                batch = [job]
+                while len(batch) < self.batch_limit:
+                    try:
+                        job = self._jobs.get_nowait()
+                    except queue.Empty:
+                        break
+                    if job is None:
+                        stopping = True
+                        break
+                    batch.append(job)
+                self._commit(db, batch)
+        finally:
+            db.close_connection()
+
+    def _commit(self, db, batch):
+        """
+        Runs a batch of writes in one transaction, one savepoint per write.
+        Writes whose caller gave up (cancelled in submit) are dropped.
+        """
+        batch = [(work, future) for work, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        results = []
+
+        def transaction():
+            results.clear()
+            db.cursor.execute("BEGIN IMMEDIATE") # Take the write lock up front
+            try:
+                for work, _ in batch:
+                    db.cursor.execute("SAVEPOINT job")
+                    try:
+                        results.append((True, work(db.cursor)))
+                    except sqlite3.OperationalError as e:
+                        if Manage_Data.is_lock_error(e):
+                            raise # Retry the whole batch
+                        db.cursor.execute("ROLLBACK TO job")
+                        results.append((False, e))
+                    except Exception as e:
+                        db.cursor.execute("ROLLBACK TO job")
+                        results.append((False, e))
+                    db.cursor.execute("RELEASE job")
+                db.conn.commit()
+            except BaseException:
+                db.conn.rollback()
+                raise
+
+        try:
+            Manage_Data.retry_locked(transaction)
+        except sqlite3.Error as e:
+            logger.error("Write batch of %s failed, rolled back: %s", len(batch), e)
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        logger.debug("Committed %s queued write(s)", len(batch))
+        for (_, future), (ok, value) in zip(batch, results):
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
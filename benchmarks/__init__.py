@@ -0,0 +1,9 @@
+"""
+Benchmark suite for the Gym Management System.
+
+generate_data builds realistic synthetic databases and run_benchmarks
+times the hot database queries and GUI table-population paths against
+them, writing machine-readable results so releases can be compared.
+
+    python -m benchmarks.run_benchmarks --members 10000 --attendance 1000000 --payments 100000
+"""
@@ -0,0 +1,144 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import App_Logging
+import Face_Detection
+import Face_Encoding
+from benchmarks.run_benchmarks import RESULTS_DIR, git_revision
+
+try:
+    import cv2
+    import face_recognition
+    import numpy as np
+except ImportError:
+    cv2 = None
+    face_recognition = None
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+PROFILE_GRID = tuple((jitters, model) for jitters in (1, 2, 5, 10) for model in Face_Encoding.LANDMARK_MODELS)
+PHOTO_DIR = "Members Photo"
+
+def load_samples(photo_dir, scale):
+    """
+    Prepares one (photo, photo box, probe frame, probe box) sample per
+    enrolled photo. The probe is the photo as the camera would see it:
+    webcam-sized, downscaled like the live loop, mirrored and with
+    different exposure, so it is not a copy of the enrolled image.
+    """
+    samples = []
+    for file in sorted(os.listdir(photo_dir)):
+        if not file.lower().endswith(('.jpg', '.jpeg', '.png')):
+            continue
+        image = cv2.imread(os.path.join(photo_dir, file))
+        if image is None:
+            continue
+        rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        boxes = face_recognition.face_locations(rgb, model='hog')
+        if not boxes:
+            continue
+        probe = Face_Detection.calibration_frame(rgb, scale)
+        probe = cv2.convertScaleAbs(cv2.flip(probe, 1), alpha=0.8, beta=20)
+        probe_boxes = face_recognition.face_locations(probe, model='hog')
+        if probe_boxes:
+            samples.append((rgb, boxes[:1], probe, probe_boxes[:1]))
+    return samples
+
+def run(photo_dir, scale=Face_Detection.DEFAULT_SETTINGS['scale'], tolerance=Face_Detection.MATCH_TOLERANCE):
+    """
+    Encodes the enrolled photos (gallery, current 'enrollment' profile)
+    and their live-style probes with every profile in PROFILE_GRID.
+
+    Returns:
+        dict: 'jitters/model' -> {'enroll_ms', 'live_ms' (median per face),
+              'accuracy' (probe's nearest gallery face is the right member and
+              within tolerance), 'genuine_distance' (mean probe-to-own-photo distance)}
+    """
+    samples = load_samples(photo_dir, scale)
+    if len(samples) < 2:
+        raise RuntimeError(f"Need at least two photos with a detectable face in {photo_dir}")
+    enrollment = Face_Encoding.get_profile('enrollment')
+    gallery = np.array([Face_Encoding.encode_faces(rgb, boxes, enrollment)[0] for rgb, boxes, _, _ in samples])
+    logger.info("Benchmarking %s encoding profiles on %s photos...", len(PROFILE_GRID), len(samples))
+
+    results = {}
+    for jitters, model in PROFILE_GRID:
+        profile = {'num_jitters': jitters, 'model': model}
+        enroll_times, live_times, distances = [], [], []
+        correct = 0
+        for index, (rgb, boxes, probe, probe_boxes) in enumerate(samples):
+            started = time.perf_counter()
+            Face_Encoding.encode_faces(rgb, boxes, profile)
+            enroll_times.append((time.perf_counter() - started) * 1000.0)
+
+            started = time.perf_counter()
+            encoding = Face_Encoding.encode_faces(probe, probe_boxes, profile)[0]
+            live_times.append((time.perf_counter() - started) * 1000.0)
+
+            face_distances = face_recognition.face_distance(gallery, encoding)
+            nearest = int(np.argmin(face_distances))
+            distances.append(float(face_distances[index]))
+            if nearest == index and face_distances[nearest] <= tolerance:
+                correct += 1
+
+        key = f"{jitters}/{model}"
+        results[key] = {
+            'enroll_ms': statistics.median(enroll_times),
+            'live_ms': statistics.median(live_times),
+            'accuracy': correct / len(samples),
+            'genuine_distance': statistics.mean(distances),
+        }
+        logger.info("%-9s enroll %7.1f ms  live %6.1f ms  accuracy %5.1f%%  distance %.3f", key,
+                    results[key]['enroll_ms'], results[key]['live_ms'],
+                    results[key]['accuracy'] * 100, results[key]['genuine_distance'])
+    return results
+
+def main(argv=None):
+    """
+    Command line entry point: python -m benchmarks.bench_encoding
+    """
+    parser = argparse.ArgumentParser(description="Compare face encoding profiles (jitters x landmark model).")
+    parser.add_argument("--photos", default=PHOTO_DIR, help="Enrolled photos (default: 'Members Photo')")
+    parser.add_argument("--scale", type=float, default=Face_Detection.DEFAULT_SETTINGS['scale'],
+                        help="Live frame downscale (default: 0.25)")
+    parser.add_argument("--output", help="Results JSON file (default: benchmarks/results/encoding-<timestamp>.json)")
+    args = parser.parse_args(argv)
+    App_Logging.setup_logging()
+
+    if face_recognition is None:
+        logger.error("This benchmark needs OpenCV, numpy and face_recognition.")
+        return 1
+    try:
+        results = run(args.photos, args.scale)
+    except (RuntimeError, OSError) as e:
+        logger.error("Encoding benchmark failed: %s", e)
+        return 1
+
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'dataset': {'photos': args.photos, 'scale': args.scale,
+                    'enrollment_profile': Face_Encoding.get_profile('enrollment')},
+        'results': results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, "encoding-" + datetime.now().strftime('%Y%m%d-%H%M%S') + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as file:
+        json.dump(report, file, indent=4)
+    logger.info("Encoding benchmark results written to %s", output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+import argparse
+import logging
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Manage_Data import DatabaseManager, DEFAULT_PLANS, MEMBER_COLUMNS
+import App_Logging
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+FIRST_NAMES = ("Tony", "Steve", "Natasha", "Bruce", "Wanda", "Peter", "Carol", "Thor", "Clint", "Sam",
+               "Aarav", "Vivaan", "Diya", "Ananya", "Ishaan", "Kabir", "Meera", "Riya", "Rohan", "Saanvi")
+LAST_NAMES = ("Stark", "Rogers", "Romanoff", "Banner", "Maximoff", "Parker", "Danvers", "Odinson",
+              "Sharma", "Patel", "Singh", "Gupta", "Iyer", "Khan", "Das", "Reddy", "Nair", "Joshi")
+STATUSES = ("PAID",) * 6 + ("UNPAID",) * 2 + ("ROOKIE", "Closed")
+# Relative check-in weight per hour of day: busy mornings and evenings
+HOUR_WEIGHTS = (0, 0, 0, 0, 0, 1, 6, 9, 8, 4, 3, 2, 2, 2, 2, 3, 5, 9, 10, 8, 5, 2, 0, 0)
+HISTORY_DAYS = 365 * 5
+BATCH_SIZE = 50000
+
+def fake_member(rng, index, today):
+    """
+    Builds one synthetic member record keyed by MEMBER_COLUMNS.
+    """
+    plan, duration, _price, _grace = rng.choice(DEFAULT_PLANS)
+    join = today - timedelta(days=rng.randrange(HISTORY_DAYS))
+    start = join + timedelta(days=rng.randrange(max((today - join).days, 1)))
+    return {
+        'full_name': f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        'date_of_birth': (today - timedelta(days=rng.randrange(16 * 365, 60 * 365))).strftime('%d-%m-%Y'),
+        'phone_number': f"9{index:09d}", # Unique, 10 digits
+        'gender': rng.choice(("Male", "Female", "Other")),
+        'address': f"{rng.randrange(1, 999)} Main St",
+        'member_status': rng.choice(STATUSES),
+        'join_date': join.strftime('%d-%m-%Y'),
+        'membership_type': plan,
+        'membership_start_date': start.strftime('%d-%m-%Y'),
+        'membership_end_date': (start + timedelta(days=duration)).strftime('%d-%m-%Y'),
+        'emergency_name': f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        'emergency_number': f"8{index:09d}",
+    }
+
+def generate_database(path, members=10000, attendance=1000000, payments=100000, seed=42):
+    """
+    Creates a synthetic GYM database with the app's real schema.
+
+    Members join over the last five years; check-ins follow a morning and
+    evening peak and are written in the same 'DD-MM-YYYY' / 'HH:MM:SS AM'
+    formats as the app, so the rollup triggers see realistic data.
+
+    Args:
+        path (str): Database file to create (replaced if it exists).
+        members (int): Number of members.
+        attendance (int): Number of check-ins.
+        payments (int): Number of payments.
+        seed (int): Random seed, so runs are reproducible.
+
+    Returns:
+        str: The database path.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    rng = random.Random(seed)
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    logger.info("Generating %s: %s members, %s check-ins, %s payments", path, members, attendance, payments)
+
+    db = DatabaseManager(path)
+    try:
+        records = [fake_member(rng, i, today) for i in range(members)]
+        inserted, _ = db.insert_members_bulk(records)
+        member_ids = list(inserted.values())
+        hours = list(range(24))
+
+        with db.conn:
+            remaining = attendance
+            while remaining > 0:
+                batch = []
+                for _ in range(min(BATCH_SIZE, remaining)):
+                    day = today - timedelta(days=rng.randrange(HISTORY_DAYS))
+                    hour = rng.choices(hours, weights=HOUR_WEIGHTS)[0]
+                    moment = day.replace(hour=hour, minute=rng.randrange(60), second=rng.randrange(60))
+                    batch.append((rng.choice(member_ids), moment.strftime('%d-%m-%Y'), moment.strftime('%I:%M:%S %p')))
+                db.cursor.executemany("INSERT INTO Attendance (member_id, date, check_in_time) VALUES (?, ?, ?)", batch)
+                remaining -= len(batch)
+
+            remaining = payments
+            while remaining > 0:
+                batch = []
+                for _ in range(min(BATCH_SIZE, remaining)):
+                    _plan, _duration, price, _grace = rng.choice(DEFAULT_PLANS)
+                    day = today - timedelta(days=rng.randrange(HISTORY_DAYS))
+                    batch.append((rng.choice(member_ids), day.strftime('%d-%m-%Y'), price, rng.choice(("Online", "Cash"))))
+                db.cursor.executemany("INSERT INTO Payment (member_id, payment_date, amount, payment_method) VALUES (?, ?, ?, ?)", batch)
+                remaining -= len(batch)
+    finally:
+        db.close_connection()
+    logger.info("Synthetic database written to %s", path)
+    return path
+
+def generate_encodings(count, seed=42):
+    """
+    Builds fake 128-d face encodings shaped like face_recognition's output.
+
+    Returns:
+        numpy.ndarray: A (count, 128) float64 array, or None without numpy.
+    """
+    if np is None:
+        logger.warning("numpy is not installed; cannot generate fake encodings.")
+        return None
+    rng = np.random.default_rng(seed)
+    encodings = rng.normal(0, 0.09, size=(count, 128))
+    return encodings
+
+def main(argv=None):
+    """
+    Command line entry point: python -m benchmarks.generate_data out.db
+    """
+    parser = argparse.ArgumentParser(description="Generate a synthetic gym database.")
+    parser.add_argument("path", help="Database file to create")
+    parser.add_argument("--members", type=int, default=10000)
+    parser.add_argument("--attendance", type=int, default=1000000)
+    parser.add_argument("--payments", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+    App_Logging.setup_logging()
+    generate_database(args.path, args.members, args.attendance, args.payments, args.seed)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import Api_Server
+import App_Logging
+import Connection_Pool
+from Manage_Data import DatabaseManager
+from benchmarks.generate_data import generate_database
+from benchmarks.run_benchmarks import RESULTS_DIR, git_revision, percentile
+
+from werkzeug.serving import make_server
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+# Relative weight of each request kind in the mix: mostly front-desk
+# lookups and dashboards polling with If-None-Match, some check-ins.
+REQUEST_MIX = (("member", 4), ("members_page", 2), ("attendance_member", 3),
+               ("payments_member", 2), ("poll", 6), ("checkin", 1))
+
+def send(base_url, path, method="GET", body=None, etag=None):
+    """
+    Sends one request and returns (status, etag, seconds).
+    """
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(base_url + path, data=data, method=method)
+    if data is not None:
+        request.add_header("Content-Type", "application/json")
+    if etag:
+        request.add_header("If-None-Match", etag)
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            response.read()
+            status, tag = response.status, response.headers.get("ETag")
+    except urllib.error.HTTPError as e:
+        status, tag = e.code, e.headers.get("ETag")
+    return status, tag, time.perf_counter() - started
+
+def worker(base_url, member_ids, duration, seed, samples):
+    """
+    Issues requests from REQUEST_MIX until 'duration' seconds have passed,
+    appending (kind, status, seconds) to samples.
+    """
+    rng = random.Random(seed)
+    kinds = [kind for kind, _ in REQUEST_MIX]
+    weights = [weight for _, weight in REQUEST_MIX]
+    poll_tag = None
+    deadline = time.perf_counter() + duration
+    local = []
+    while time.perf_counter() < deadline:
+        kind = rng.choices(kinds, weights)[0]
+        member_id = rng.choice(member_ids)
+        if kind == "member":
+            result = send(base_url, f"/api/members/{member_id}")
+        elif kind == "members_page":
+            result = send(base_url, f"/api/members?after={rng.randrange(member_ids[-1])}&limit=100")
+        elif kind == "attendance_member":
+            result = send(base_url, f"/api/attendance?member_id={member_id}&limit=100")
+        elif kind == "payments_member":
+            result = send(base_url, f"/api/payments?member_id={member_id}")
+        elif kind == "poll":
+            # A dashboard re-fetching the first page of members
+            result = send(base_url, "/api/members?limit=50", etag=poll_tag)
+            poll_tag = result[1] or poll_tag
+        else:
+            result = send(base_url, "/api/checkins", method="POST", body={'member_id': member_id})
+        local.append((kind, result[0], result[2]))
+    samples.extend(local)
+
+def run(db_path, clients=8, duration=10.0, pool_size=Connection_Pool.POOL_SIZE):
+    """
+    Serves the API from a background thread and loads it with 'clients'
+    concurrent HTTP clients.
+
+    Returns:
+        dict: Overall and per-kind throughput, latency and status counts.
+    """
+    db = DatabaseManager(db_path)
+    member_ids = [row[0] for row in db.cursor.execute("SELECT id FROM Members ORDER BY id").fetchall()]
+    db.close_connection()
+
+    app = Api_Server.create_app(db_path, pool_size)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    samples = []
+    threads = [threading.Thread(target=worker, args=(base_url, member_ids, duration, seed, samples))
+               for seed in range(clients)]
+    started = time.perf_counter()
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        elapsed = time.perf_counter() - started
+        server.shutdown()
+        app.config['POOL'].close_all()
+
+    def summarize(rows):
+        latencies = [seconds for _, _, seconds in rows]
+        statuses = {}
+        for _, status, _ in rows:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        return {
+            'requests': len(rows),
+            'requests_per_s': len(rows) / elapsed if elapsed else 0.0,
+            'p50_ms': percentile(latencies, 0.50) * 1000,
+            'p95_ms': percentile(latencies, 0.95) * 1000,
+            'p99_ms': percentile(latencies, 0.99) * 1000,
+            'mean_ms': statistics.fmean(latencies) * 1000 if latencies else 0.0,
+            'statuses': statuses,
+        }
+
+    results = {'overall': summarize(samples)}
+    for kind, _ in REQUEST_MIX:
+        results[kind] = summarize([row for row in samples if row[0] == kind])
+    return results
+
+def main(argv=None):
+    """
+    Command line entry point: python -m benchmarks.load_test_api
+    """
+    parser = argparse.ArgumentParser(description="Load test the local JSON API.")
+    parser.add_argument("--db", default="bench_gym.db", help="Benchmark database (generated if missing)")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent HTTP clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run")
+    parser.add_argument("--pool-size", type=int, default=Connection_Pool.POOL_SIZE)
+    parser.add_argument("--output", help="Results JSON file (default: benchmarks/results/api-<timestamp>.json)")
+    args = parser.parse_args(argv)
+    App_Logging.setup_logging()
+
+    if not os.path.exists(args.db):
+        generate_database(args.db)
+
+    results = run(args.db, args.clients, args.duration, args.pool_size)
+    overall = results['overall']
+    logger.info("%s requests, %.0f req/s, p50 %.1f ms, p95 %.1f ms", overall['requests'],
+                overall['requests_per_s'], overall['p50_ms'], overall['p95_ms'])
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': {'db': args.db, 'clients': args.clients, 'duration_s': args.duration, 'pool_size': args.pool_size},
+        'results': results,
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, "api-" + datetime.now().strftime('%Y%m%d-%H%M%S') + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as file:
+        json.dump(report, file, indent=4)
+    logger.info("Load test results written to %s", output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
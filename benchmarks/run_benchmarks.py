@@ -0,0 +1,182 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Manage_Data import DatabaseManager
+from Member_Directory import MemberDirectory
+import App_Logging
+from benchmarks.generate_data import generate_database, generate_encodings
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+MATCH_TOLERANCE = 0.6 # face_recognition.compare_faces default
+
+# ------------------ Workloads ------------------
+# The table-population workloads call the same MemberDirectory helpers as
+# the windows (without Tk), so their cost can be tracked between releases.
+
+def load_directory(db):
+    """Home start-up: load the member directory every window shares."""
+    directory = MemberDirectory()
+    directory.load(db)
+    return directory
+
+def face_match(known, probes):
+    """MarkAttendance.process_frame matching: first known face within tolerance."""
+    matches = []
+    for probe in probes:
+        distances = np.linalg.norm(known - probe, axis=1)
+        hits = np.flatnonzero(distances <= MATCH_TOLERANCE)
+        matches.append(int(hits[0]) if len(hits) else None)
+    return matches
+
+# ------------------ Timing ------------------
+
+def time_case(func, repeat):
+    """
+    Runs func 'repeat' times and summarizes the wall-clock durations.
+
+    Returns:
+        dict: min/median/max seconds and the size of the last result.
+    """
+    durations = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        durations.append(time.perf_counter() - started)
+    return {
+        'min_s': min(durations),
+        'median_s': statistics.median(durations),
+        'max_s': max(durations),
+        'repeat': repeat,
+        'result_size': len(result) if hasattr(result, '__len__') else None,
+    }
+
+def percentile(values, fraction):
+    """Returns the value below which 'fraction' of the sorted values fall."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+def git_revision():
+    """Returns the current git commit hash, or None outside a git checkout."""
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=os.path.dirname(RESULTS_DIR),
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(db_path, repeat=3, encodings=10000):
+    """
+    Times every benchmark case against an existing database.
+
+    Returns:
+        tuple: (results, dataset) where results maps case name -> timing
+               summary and dataset holds the actual table sizes.
+    """
+    db = DatabaseManager(db_path)
+    results = {}
+    dataset = {'db': db_path, 'encodings': encodings if np is not None else 0}
+    try:
+        for table in ('Members', 'Attendance', 'Payment'):
+            dataset[table.lower()] = db.count_rows(table)
+        sample = db.cursor.execute("SELECT id, full_name, date_of_birth, phone_number FROM Members "
+                                   "ORDER BY id DESC LIMIT 1").fetchone()
+        member_id = sample[0]
+        today = datetime.now()
+        month_start = today.replace(day=1).strftime('%Y-%m-%d')
+        today_str = today.strftime('%Y-%m-%d')
+        reminder_data = {str(i): {'last_reminder_date': today.strftime('%Y-%m-%d')} for i in range(1, member_id, 2)}
+
+        directory = load_directory(db)
+
+        cases = {
+            'db.get_all_from_table.Members': lambda: db.get_all_from_table('Members'),
+            'db.get_all_from_table.Attendance': lambda: db.get_all_from_table('Attendance'),
+            'db.get_all_from_table.Payment': lambda: db.get_all_from_table('Payment'),
+            'db.get_member_by_details': lambda: [db.get_member_by_details(sample[1], sample[2], sample[3])],
+            'db.get_data_by_member_id.Attendance': lambda: db.get_data_by_member_id('Attendance', member_id),
+            'db.get_data_by_member_id.Payment': lambda: db.get_data_by_member_id('Payment', member_id),
+            'db.get_attendance_with_names': db.get_attendance_with_names,
+            'db.get_peak_hours': db.get_peak_hours,
+            'db.get_member_visit_counts.month': lambda: db.get_member_visit_counts(month_start, today_str),
+            'db.get_inactive_members.30d': lambda: db.get_inactive_members(30),
+            'gui.member_directory.load': lambda: load_directory(db),
+            # ViewData.display_table, MarkAttendance.update_table
+            'gui.attendance_rows': lambda: directory.named_rows(db.get_all_from_table('Attendance')),
+            # ViewData.display_table, Payment.refresh_payment_table
+            'gui.payment_rows': lambda: directory.named_rows(db.get_all_from_table('Payment')),
+            'reminders.selection': lambda: directory.due_for_reminder(reminder_data),
+        }
+        if np is not None:
+            known = generate_encodings(encodings)
+            probes = known[:5] + 0.01 # Five faces in one frame, all enrolled
+            cases['recognition.face_match'] = lambda: face_match(known, probes)
+        else:
+            logger.warning("numpy is not installed; skipping face matching benchmark.")
+
+        for name, func in cases.items():
+            logger.info("Benchmarking %s...", name)
+            results[name] = time_case(func, repeat)
+            logger.info("%s: median %.1f ms", name, results[name]['median_s'] * 1000)
+    finally:
+        db.close_connection()
+    return results, dataset
+
+def main(argv=None):
+    """
+    Command line entry point: python -m benchmarks.run_benchmarks
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the Gym Management System data paths.")
+    parser.add_argument("--db", default="bench_gym.db", help="Benchmark database (generated if missing)")
+    parser.add_argument("--regenerate", action="store_true", help="Rebuild the benchmark database first")
+    parser.add_argument("--members", type=int, default=10000)
+    parser.add_argument("--attendance", type=int, default=1000000)
+    parser.add_argument("--payments", type=int, default=100000)
+    parser.add_argument("--encodings", type=int, default=10000, help="Number of fake known faces")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Results JSON file (default: benchmarks/results/<timestamp>.json)")
+    args = parser.parse_args(argv)
+    App_Logging.setup_logging()
+
+    if args.regenerate or not os.path.exists(args.db):
+        generate_database(args.db, args.members, args.attendance, args.payments)
+
+    results, dataset = run(args.db, args.repeat, args.encodings)
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'dataset': dataset,
+        'results': results,
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, datetime.now().strftime('%Y%m%d-%H%M%S') + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as file:
+        json.dump(report, file, indent=4)
+    logger.info("Benchmark results written to %s", output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import App_Logging
+import Write_Queue
+from Manage_Data import DatabaseManager
+from benchmarks.run_benchmarks import RESULTS_DIR, git_revision, percentile
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+CHECKIN_DATE = "01-01-2025"
+
+def writer_process(db_path, first_member, threads, checkins, wal, single_writer, results):
+    """
+    One simulated client process (a kiosk, the desktop app...): 'threads'
+    threads each check their own member in 'checkins' times. Puts
+    {'latencies': [...], 'failures': n} on the results queue.
+    """
+    writer = Write_Queue.WriteQueue(db_path) if single_writer else None
+    latencies = []
+    failures = [0]
+    lock = threading.Lock()
+
+    def client(member_id):
+        db = DatabaseManager(db_path, wal=wal, writer=writer)
+        local = []
+        failed = 0
+        try:
+            for index in range(checkins):
+                started = time.perf_counter()
+                new_id = db.insert_attendance(member_id, CHECKIN_DATE, f"{index % 12 + 1:02d}:00:00 AM")
+                local.append(time.perf_counter() - started)
+                if new_id is None:
+                    failed += 1
+        finally:
+            db.close_connection()
+        with lock:
+            latencies.extend(local)
+            failures[0] += failed
+
+    workers = [threading.Thread(target=client, args=(first_member + offset,)) for offset in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    if writer is not None:
+        writer.close()
+    results.put({'latencies': latencies, 'failures': failures[0]})
+
+def prepare_database(db_path, members, wal):
+    """
+    Creates the database with one member per client thread.
+    """
+    db = DatabaseManager(db_path, wal=wal)
+    try:
+        db.run_write(lambda cursor: cursor.executemany(
+            "INSERT INTO Members (id, full_name, join_date) VALUES (?, ?, ?)",
+            [(member_id, f"Stress {member_id}", CHECKIN_DATE) for member_id in range(1, members + 1)]))
+    finally:
+        db.close_connection()
+
+def run(db_path, processes=4, threads=2, checkins=250, wal=True, single_writer=False):
+    """
+    Runs the writer processes against a fresh database and checks that
+    every check-in was stored.
+
+    Returns:
+        dict: Write counts, lost writes, throughput and latency percentiles.
+    """
+    members = processes * threads
+    prepare_database(db_path, members, wal)
+
+    context = multiprocessing.get_context("spawn") # Same behaviour on Windows and Linux
+    results = context.Queue()
+    children = [context.Process(target=writer_process,
+                                args=(db_path, 1 + index * threads, threads, checkins, wal, single_writer, results))
+                for index in range(processes)]
+    started = time.perf_counter()
+    for child in children:
+        child.start()
+    reports = [results.get() for _ in children]
+    for child in children:
+        child.join()
+    elapsed = time.perf_counter() - started
+
+    conn = sqlite3.connect(db_path)
+    try:
+        stored = dict(conn.execute("SELECT member_id, COUNT(*) FROM Attendance GROUP BY member_id").fetchall())
+        journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    finally:
+        conn.close()
+
+    latencies = [seconds for report in reports for seconds in report['latencies']]
+    attempted = members * checkins
+    written = sum(stored.values())
+    return {
+        'journal_mode': journal_mode,
+        'attempted': attempted,
+        'written': written,
+        'failed': sum(report['failures'] for report in reports),
+        'lost': sum(max(checkins - stored.get(member_id, 0), 0) for member_id in range(1, members + 1)),
+        'writes_per_s': written / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'max_ms': max(latencies, default=0.0) * 1000,
+    }
+
+def main(argv=None):
+    """
+    Command line entry point: python -m benchmarks.stress_writers
+    Exits with 1 if a write was lost or failed, or the slowest write took
+    longer than --max-latency-ms.
+    """
+    parser = argparse.ArgumentParser(description="Check members in from several processes at once.")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=2, help="Writing threads per process")
+    parser.add_argument("--checkins", type=int, default=250, help="Check-ins per thread")
+    parser.add_argument("--rollback-journal", action="store_true", help="Keep SQLite's default journal instead of WAL")
+    parser.add_argument("--single-writer", action="store_true", help="Route each process's writes through a WriteQueue")
+    parser.add_argument("--max-latency-ms", type=float, default=2000.0)
+    parser.add_argument("--output", help="Results JSON file (default: benchmarks/results/stress-<timestamp>.json)")
+    args = parser.parse_args(argv)
+    App_Logging.setup_logging()
+
+    workdir = tempfile.mkdtemp(prefix="gym_stress_")
+    db_path = os.path.join(workdir, "stress.db")
+    results = run(db_path, args.processes, args.threads, args.checkins,
+                  wal=not args.rollback_journal, single_writer=args.single_writer)
+    for name in os.listdir(workdir):
+        os.remove(os.path.join(workdir, name))
+    os.rmdir(workdir)
+
+    passed = not results['lost'] and not results['failed'] and results['max_ms'] <= args.max_latency_ms
+    logger.info("%s: %s/%s written, %s lost, %s failed, %.0f writes/s, p95 %.1f ms, max %.1f ms",
+                "PASS" if passed else "FAIL", results['written'], results['attempted'], results['lost'],
+                results['failed'], results['writes_per_s'], results['p95_ms'], results['max_ms'])
+    report = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': git_revision(),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'settings': {'processes': args.processes, 'threads': args.threads, 'checkins': args.checkins,
+                     'single_writer': args.single_writer, 'max_latency_ms': args.max_latency_ms},
+        'passed': passed,
+        'results': results,
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, "stress-" + datetime.now().strftime('%Y%m%d-%H%M%S') + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as file:
+        json.dump(report, file, indent=4)
+    logger.info("Stress test results written to %s", output)
+    return 0 if passed else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+import shutil
+
+import pytest
+
+import Branch_Sync
+from Manage_Data import DatabaseManager
+
+MEMBER = ("Asha Rao", "01-01-1990", "9876543210", "Female", "Old address", "Active", "01-01-2025",
+          "Monthly", "01-01-2025", "31-01-2025", "Ravi Rao", "9876500000")
+
+@pytest.fixture
+def branches(tmp_path):
+    """Two branches (1 and 2) started from a copy of one database with one member."""
+    db = DatabaseManager(str(tmp_path / "base.db"), profile=False)
+    member_id = db.insert_member(*MEMBER)
+    db.close_connection()
+    shutil.copy(tmp_path / "base.db", tmp_path / "b.db")
+    shutil.move(tmp_path / "base.db", tmp_path / "a.db")
+    a = DatabaseManager(str(tmp_path / "a.db"), profile=False)
+    b = DatabaseManager(str(tmp_path / "b.db"), profile=False)
+    Branch_Sync.init_branch(a, 1)
+    Branch_Sync.init_branch(b, 2)
+    yield a, b, member_id
+    a.close_connection()
+    b.close_connection()
+
+def exchange(a, b, tmp_path, round_number):
+    """Exports from both branches, then applies each file on the other side."""
+    to_b = str(tmp_path / f"a-to-b-{round_number}.jsonl.gz")
+    to_a = str(tmp_path / f"b-to-a-{round_number}.jsonl.gz")
+    Branch_Sync.export_changes(a, to_b, peer='b')
+    Branch_Sync.export_changes(b, to_a, peer='a')
+    return Branch_Sync.apply_changes(b, to_b), Branch_Sync.apply_changes(a, to_a)
+
+def rows(db, table):
+    return sorted(db.get_all_from_table(table))
+
+def test_new_rows_stay_in_own_id_block_after_syncs(branches, tmp_path):
+    a, b, member_id = branches
+    for round_number in range(3):
+        a_id = a.insert_attendance(member_id, "02-01-2025", f"09:0{round_number}:00 AM")
+        b_id = b.insert_attendance(member_id, "02-01-2025", f"10:0{round_number}:00 AM")
+        assert Branch_Sync.ID_BLOCK < a_id < 2 * Branch_Sync.ID_BLOCK
+        assert 2 * Branch_Sync.ID_BLOCK < b_id < 3 * Branch_Sync.ID_BLOCK
+        report_b, report_a = exchange(a, b, tmp_path, round_number)
+        assert not report_a['conflicts'] and not report_b['conflicts']
+
+    assert len(rows(a, 'Attendance')) == 6
+    assert rows(a, 'Attendance') == rows(b, 'Attendance')
+
+def test_id_clash_is_reported_not_overwritten(branches, tmp_path):
+    a, b, member_id = branches
+    exchange(a, b, tmp_path, 0)
+    # A row that takes an id from branch 2's block behind its back
+    clash_id = 2 * Branch_Sync.ID_BLOCK + 1
+    a.execute_write("INSERT INTO Attendance (id, member_id, date, check_in_time) VALUES (?, ?, ?, ?)",
+                    (clash_id, member_id, "02-01-2025", "09:00:00 AM"))
+    assert b.insert_attendance(member_id, "02-01-2025", "10:00:00 AM") == clash_id
+
+    report_b, report_a = exchange(a, b, tmp_path, 1)
+    assert [change['id'] for change, _ in report_a['conflicts']] == [clash_id]
+    assert [change['id'] for change, _ in report_b['conflicts']] == [clash_id]
+    assert a.get_rows_by_ids('Attendance', [clash_id])[clash_id][3] == "09:00:00 AM"
+    assert b.get_rows_by_ids('Attendance', [clash_id])[clash_id][3] == "10:00:00 AM"
+
+def test_concurrent_edits_converge_to_lower_branch(branches, tmp_path):
+    a, b, member_id = branches
+    a.update_field_by_id('Members', member_id, 'address', 'A-addr')
+    b.update_field_by_id('Members', member_id, 'address', 'B-addr')
+
+    report_b, report_a = exchange(a, b, tmp_path, 0)
+    assert [winner for _, winner in report_a['concurrent']] == [1]
+    assert [winner for _, winner in report_b['concurrent']] == [1]
+    exchange(a, b, tmp_path, 1)
+
+    assert rows(a, 'Members') == rows(b, 'Members')
+    assert rows(a, 'Members')[0][5] == 'A-addr'
+
+def test_edit_after_sync_is_not_concurrent(branches, tmp_path):
+    a, b, member_id = branches
+    a.update_field_by_id('Members', member_id, 'address', 'A-addr')
+    exchange(a, b, tmp_path, 0)
+    b.update_field_by_id('Members', member_id, 'address', 'B-addr')
+
+    report_b, report_a = exchange(a, b, tmp_path, 1)
+    assert not report_a['concurrent'] and not report_b['concurrent']
+    assert rows(a, 'Members')[0][5] == rows(b, 'Members')[0][5] == 'B-addr'
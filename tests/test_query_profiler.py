@@ -0,0 +1,45 @@
+import sqlite3
+
+from Query_Profiler import FULL_SCAN, ITER_BATCH, ProfilingCursor, QueryProfiler
+
+def profiled(rows=0):
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE Payment (id INTEGER PRIMARY KEY, member_id INTEGER)")
+    conn.execute("CREATE TABLE Attendance (id INTEGER PRIMARY KEY, member_id INTEGER)")
+    conn.execute("CREATE INDEX idx_attendance_member ON Attendance (member_id)")
+    conn.executemany("INSERT INTO Payment (member_id) VALUES (?)", [(i,) for i in range(rows)])
+    profiler = QueryProfiler()
+    return profiler, ProfilingCursor(conn.cursor(), profiler, conn)
+
+def test_full_scan_ignores_index_scans():
+    assert FULL_SCAN.match("SCAN Attendance").group(1) == "Attendance"
+    assert FULL_SCAN.match("SCAN TABLE Payment").group(1) == "Payment"
+    assert FULL_SCAN.match("SCAN Attendance USING INDEX idx_attendance_member") is None
+    assert FULL_SCAN.match("SCAN Members USING COVERING INDEX sqlite_autoindex_Members_1") is None
+
+def test_summary_flags_only_unindexed_scans():
+    # Fast queries are explained too, once per template
+    profiler, cursor = profiled()
+    for member_id in range(3):
+        cursor.execute("SELECT * FROM Attendance WHERE member_id = ?", (member_id,)).fetchall()
+        cursor.execute("SELECT * FROM Payment WHERE member_id = ?", (member_id,)).fetchall()
+    assert len(profiler.plans) == 2
+
+    scans = {group['sql']: group['full_scans'] for group in profiler.summary()}
+    assert scans["SELECT * FROM Attendance WHERE member_id = ?"] == []
+    assert scans["SELECT * FROM Payment WHERE member_id = ?"] == ["Payment"]
+
+def test_iteration_is_fetched_in_batches():
+    profiler, cursor = profiled(rows=ITER_BATCH * 2 + 7)
+    rows = iter(cursor.execute("SELECT * FROM Payment"))
+    next(rows)
+    assert profiler.records[-1]['rows'] == ITER_BATCH
+    assert sum(1 for _ in rows) == ITER_BATCH * 2 + 6
+    assert profiler.records[-1]['rows'] == ITER_BATCH * 2 + 7
+
+def test_records_are_capped():
+    profiler = QueryProfiler(max_records=5)
+    for _ in range(12):
+        profiler.start("SELECT 1", ())
+    assert len(profiler.records) == 5
+    assert profiler.statements == 12
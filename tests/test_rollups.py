@@ -0,0 +1,42 @@
+from Manage_Data import DatabaseManager
+
+def add_member(db, phone):
+    return db.insert_member("Asha Rao", "01-01-1990", phone, "Female", "Address", "Active", "01-01-2025",
+                            "Monthly", "01-01-2025", "31-01-2025", "Ravi Rao", "9876500000")
+
+def rollups(db):
+    return (sorted(db.cursor.execute("SELECT * FROM AttendanceDaily").fetchall()),
+            sorted(db.cursor.execute("SELECT * FROM AttendanceHourly").fetchall()))
+
+def assert_matches_rebuild(db):
+    incremental = rollups(db)
+    assert db.rebuild_attendance_rollups()
+    assert incremental == rollups(db)
+
+def test_rollups_follow_edits_and_deletes(tmp_path):
+    db = DatabaseManager(str(tmp_path / "gym.db"), profile=False)
+    first, second = add_member(db, "9876543210"), add_member(db, "9876543211")
+    moved = db.insert_attendance(first, "02-01-2025", "09:15:00 AM")
+    db.insert_attendance(first, "02-01-2025", "06:30:00 PM")
+    removed = db.insert_attendance(second, "02-01-2025", "09:45:00 AM")
+    db.insert_attendance(second, "03-01-2025", "07:00:00 AM")
+    assert_matches_rebuild(db)
+
+    db.update_fields_by_id('Attendance', moved, {'date': '04-01-2025', 'check_in_time': '10:00:00 AM'})
+    assert_matches_rebuild(db)
+    db.execute_write("DELETE FROM Attendance WHERE id = ?", (removed,))
+    assert_matches_rebuild(db)
+    db.fully_delete_member(second)
+    assert_matches_rebuild(db)
+    assert rollups(db)[1] == [("2025-01-02", 18, 1), ("2025-01-04", 10, 1)]
+    db.close_connection()
+
+def test_archiving_keeps_rollups(tmp_path):
+    db = DatabaseManager(str(tmp_path / "gym.db"), profile=False)
+    member_id = add_member(db, "9876543210")
+    db.insert_attendance(member_id, "02-01-2020", "09:15:00 AM")
+    before = rollups(db)
+    db.archive_attendance(older_than_days=30)
+    assert rollups(db) == before
+    assert_matches_rebuild(db)
+    db.close_connection()